@@ -1,44 +1,50 @@
 import argparse
+import asyncio
 
-from app.services import auth
-from app.database.database import engine, SessionLocal
+from app.services import auth, search
+from app.database.database import engine, AsyncSessionLocal
+from app.database.migrations import migrate
 from .database import schemas, tables
 
 
-def create_super_admin():
-    db = SessionLocal()
+async def create_super_admin():
     username = input("Enter username: ")
     email = input("Enter email: ")
     name = input("Enter name: ")
     password = input("Enter password: ")
-    auth.create_super_admin(
-        db,
-        schemas.UserCreateForm(
-            username=username,
-            email=email,
-            name=name,
-            password=password,
+    async with AsyncSessionLocal() as db:
+        await auth.create_super_admin(
+            db,
+            schemas.UserCreateForm(
+                username=username,
+                email=email,
+                name=name,
+                password=password,
+            )
         )
-    )
-    db.close()
 
 
-def init_super_admin():
-    db = SessionLocal()
+async def init_super_admin():
     username = "admin"
     email = "admin@localhost"
     name = "Admin"
     password = "admin"
-    auth.create_super_admin(
-        db,
-        schemas.UserCreateForm(
-            username=username,
-            email=email,
-            name=name,
-            password=password,
+    async with AsyncSessionLocal() as db:
+        await auth.create_super_admin(
+            db,
+            schemas.UserCreateForm(
+                username=username,
+                email=email,
+                name=name,
+                password=password,
+            )
         )
-    )
-    db.close()
+
+
+async def rebuild_search_index():
+    async with AsyncSessionLocal() as db:
+        count = await search.rebuild_ticket_index(db)
+    print(f"Indexed {count} tickets.")
 
 
 def main():
@@ -49,18 +55,32 @@ def main():
 
     init_super_admin_parser = subparsers.add_parser('init_super_admin')
 
+    migrate_parser = subparsers.add_parser('migrate')
+
+    rebuild_search_index_parser = subparsers.add_parser('rebuild_search_index')
+
     args = parser.parse_args()
 
     if args.command == 'create_super_admin':
-        create_super_admin()
+        asyncio.run(create_super_admin())
     elif args.command == 'init_super_admin':
-        init_super_admin()
+        asyncio.run(init_super_admin())
+    elif args.command == 'migrate':
+        column_names, index_names = migrate(engine)
+        for column_name in column_names:
+            print(f"Added column {column_name}.")
+        for index_name in index_names:
+            print(f"Created index {index_name}.")
+    elif args.command == 'rebuild_search_index':
+        asyncio.run(rebuild_search_index())
     else:
         print("Invalid command. Please follow the usage below.")
         print("Usage: python3 admin.py <command>")
         print("Commands:")
         print("  init_super_admin          Create an super-administrator when firstly installed.")
         print("  create_super_admin        Create an super-administrator by yourself.")
+        print("  migrate                   Create missing tables, columns and indexes after upgrading.")
+        print("  rebuild_search_index      Index all tickets for search, not needed on MySQL.")
         print("Github: https://github.com/celaraze/cela, docs here.")
 
 
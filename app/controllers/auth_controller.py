@@ -3,8 +3,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
 
 from ..dependencies import get_current_user, databaseSession
-from ..services.auth import authenticate, create_access_token, create_super_admin
-from ..services.user import get_roles
+from ..services.auth import authenticate, create_user_token, create_super_admin, invalidate_user
 from ..database import schemas, tables
 from ..utils import crypt
 
@@ -20,7 +19,11 @@ router = APIRouter(
 async def init(
         db: databaseSession,
 ):
-    admin = db.query(tables.User).filter(tables.User.username == "admin").first()
+    stmt = (
+        select(tables.User)
+        .where(tables.User.username.__eq__("admin"))
+    )
+    admin = (await db.scalars(stmt)).first()
     if admin:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -30,7 +33,7 @@ async def init(
     email = "admin@localhost"
     name = "Admin"
     password = "admin"
-    create_super_admin(
+    await create_super_admin(
         db,
         schemas.UserCreateForm(
             username=username,
@@ -50,18 +53,14 @@ async def login(
         db: databaseSession,
         form_data: OAuth2PasswordRequestForm = Depends(),
 ):
-    user = authenticate(db, form_data.username, form_data.password)
+    user = await authenticate(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    scopes = []
-    roles = get_roles(db, user)
-    for role in roles:
-        scopes.extend(role.scopes)
-    access_token = create_access_token(data={"user_id": user.id, "scopes": scopes})
+    access_token = await create_user_token(db, user.id)
     return {"access_token": access_token, "type": "bearer"}
 
 
@@ -83,7 +82,7 @@ async def update_me(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(current_user.id))
     )
-    user = db.execute(stmt).scalar_one()
+    user = (await db.execute(stmt)).scalar_one()
 
     if not user:
         raise HTTPException(
@@ -92,7 +91,8 @@ async def update_me(
         )
     for form in form_data:
         setattr(user, form.key, form.value)
-    db.commit()
+    await db.commit()
+    invalidate_user(user.id)
     return user
 
 
@@ -102,7 +102,7 @@ async def change_password(
         form_data: schemas.UserChangePasswordForm,
         current_user: schemas.User = Security(get_current_user, scopes=["auth:me"]),
 ):
-    user = authenticate(db, current_user.username, form_data.old_password)
+    user = await authenticate(db, current_user.username, form_data.old_password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -114,14 +114,15 @@ async def change_password(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(current_user.id))
     )
-    user = db.execute(stmt).scalar_one()
+    user = (await db.execute(stmt)).scalar_one()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not exists.",
         )
-    setattr(user, "hashed_password", crypt.hash_password(form_data.new_password))
-    db.commit()
+    setattr(user, "hashed_password", await crypt.hash_password_async(form_data.new_password))
+    await db.commit()
+    invalidate_user(user.id)
     return user
 
 
@@ -130,9 +131,5 @@ async def refresh_scopes(
         db: databaseSession,
         current_user: schemas.User = Security(get_current_user, scopes=["auth:me"]),
 ):
-    scopes = []
-    roles = get_roles(db, current_user)
-    for role in roles:
-        scopes.extend(role.scopes)
-    access_token = create_access_token(data={"user_id": current_user.id, "scopes": scopes})
+    access_token = await create_user_token(db, current_user.id)
     return {"access_token": access_token, "type": "bearer"}
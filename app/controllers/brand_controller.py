@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, status, Security
 from sqlalchemy import select
 
-from ..dependencies import get_oauth_scheme, get_current_user, databaseSession
+from ..dependencies import get_oauth_scheme, get_current_user, databaseSession, pagination
 from ..database import schemas, tables
 from ..utils import common
+from ..utils.serializer import serialize_rows
 from ..services.brand import get_devices
+from ..services.lookup import brand_cache
 
 oauth2_scheme = get_oauth_scheme()
 
@@ -23,18 +25,15 @@ router = APIRouter(
 @router.get("/", response_model=list[schemas.Brand])
 async def select_brands(
         db: databaseSession,
-        skip: int = 0,
-        limit: int = 100,
+        page: pagination,
         current_user: schemas.User = Security(get_current_user, scopes=["brand:list"]),
 ):
     stmt = (
         select(tables.Brand)
         .where(tables.Brand.deleted_at.is_(None))
-        .offset(skip)
-        .limit(limit)
     )
-    brands = db.scalars(stmt).all()
-    return brands
+    brands = await page.fetch(db, stmt, tables.Brand)
+    return serialize_rows(brands, schemas.Brand, page.response)
 
 
 # Get brand by id.
@@ -44,18 +43,13 @@ async def select_brand(
         brand_id: int,
         current_user: schemas.User = Security(get_current_user, scopes=["brand:info"]),
 ):
-    stmt = (
-        select(tables.Brand)
-        .where(tables.Brand.deleted_at.is_(None))
-        .where(tables.Brand.id.__eq__(brand_id))
-    )
-    brand = db.scalars(stmt).one_or_none()
+    brand = await brand_cache.get(db, brand_id)
     if not brand:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Brand not exists.",
         )
-    brand.creator = common.get_creator(db, brand.creator_id)
+    brand.creator = await common.get_creator(db, brand.creator_id)
     return brand
 
 
@@ -69,7 +63,9 @@ async def create_brand(
     form_data.creator_id = current_user.id
     brand = tables.Brand(**form_data.model_dump())
     db.add(brand)
-    db.commit()
+    await brand_cache.bump(db)
+    await db.commit()
+    brand_cache.invalidate()
     return brand
 
 
@@ -86,7 +82,7 @@ async def update_brand(
         .where(tables.Brand.deleted_at.is_(None))
         .where(tables.Brand.id.__eq__(brand_id))
     )
-    brand = db.scalars(stmt).one_or_none()
+    brand = (await db.scalars(stmt)).one_or_none()
     if not brand:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -94,7 +90,9 @@ async def update_brand(
         )
     for form in form_data:
         setattr(brand, form.key, form.value)
-    db.commit()
+    await brand_cache.bump(db)
+    await db.commit()
+    brand_cache.invalidate()
     return brand
 
 
@@ -110,22 +108,24 @@ async def delete_brand(
         .where(tables.Brand.deleted_at.is_(None))
         .where(tables.Brand.id.__eq__(brand_id))
     )
-    brand = db.scalars(stmt).one_or_none()
+    brand = (await db.scalars(stmt)).one_or_none()
     if not brand:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Brand not exists.",
         )
 
-    devices = get_devices(db, brand)
+    devices = await get_devices(db, brand)
 
     if devices:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Brand has devices, please update devices first.",
         )
-    setattr(brand, "deleted_at", common.now())
-    db.commit()
+    await common.soft_delete(db, tables.Brand, [brand_id])
+    await brand_cache.bump(db)
+    await db.commit()
+    brand_cache.invalidate()
     return brand
 
 
@@ -141,12 +141,12 @@ async def select_device_category_devices(
         .where(tables.Brand.deleted_at.is_(None))
         .where(tables.Brand.id.__eq__(brand_id))
     )
-    brand = db.scalars(stmt).one_or_none()
+    brand = (await db.scalars(stmt)).one_or_none()
     if not brand:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Brand not exists.",
         )
 
-    devices = get_devices(db, brand)
+    devices = await get_devices(db, brand)
     return devices
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, status, Security
 from sqlalchemy import select
 
-from ..dependencies import get_oauth_scheme, get_current_user, databaseSession
+from ..dependencies import get_oauth_scheme, get_current_user, databaseSession, pagination
 from ..database import schemas, tables
 from ..utils import common
+from ..utils.serializer import serialize_rows
 from ..services.device_category import get_devices
+from ..services.lookup import device_category_cache
 
 oauth2_scheme = get_oauth_scheme()
 
@@ -22,18 +24,15 @@ router = APIRouter(
 @router.get("/", response_model=list[schemas.DeviceCategory])
 async def get_device_categories(
         db: databaseSession,
-        skip: int = 0,
-        limit: int = 100,
+        page: pagination,
         current_user: schemas.User = Security(get_current_user, scopes=["device_category:list"]),
 ):
     stmt = (
         select(tables.DeviceCategory)
         .where(tables.DeviceCategory.deleted_at.is_(None))
-        .offset(skip)
-        .limit(limit)
     )
-    device_categories = db.scalars(stmt).all()
-    return device_categories
+    device_categories = await page.fetch(db, stmt, tables.DeviceCategory)
+    return serialize_rows(device_categories, schemas.DeviceCategory, page.response)
 
 
 # Get device category by id.
@@ -43,18 +42,13 @@ async def get_device_category(
         device_category_id: int,
         current_user: schemas.User = Security(get_current_user, scopes=["device_category:info"]),
 ):
-    stmt = (
-        select(tables.DeviceCategory)
-        .where(tables.DeviceCategory.deleted_at.is_(None))
-        .where(tables.DeviceCategory.id.__eq__(device_category_id))
-    )
-    device_category = db.scalars(stmt).one_or_none()
+    device_category = await device_category_cache.get(db, device_category_id)
     if not device_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device Category not exists.",
         )
-    device_category.creator = common.get_creator(db, device_category.creator_id)
+    device_category.creator = await common.get_creator(db, device_category.creator_id)
     return device_category
 
 
@@ -68,7 +62,9 @@ async def create_device_category(
     form_data.creator_id = current_user.id
     device_category = tables.DeviceCategory(**form_data.model_dump())
     db.add(device_category)
-    db.commit()
+    await device_category_cache.bump(db)
+    await db.commit()
+    device_category_cache.invalidate()
     return device_category
 
 
@@ -85,7 +81,7 @@ async def update_device_category(
         .where(tables.DeviceCategory.deleted_at.is_(None))
         .where(tables.DeviceCategory.id.__eq__(device_category_id))
     )
-    device_category = db.scalars(stmt).one_or_none()
+    device_category = (await db.scalars(stmt)).one_or_none()
     if not device_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -93,7 +89,9 @@ async def update_device_category(
         )
     for form in form_data:
         setattr(device_category, form.key, form.value)
-    db.commit()
+    await device_category_cache.bump(db)
+    await db.commit()
+    device_category_cache.invalidate()
     return device_category
 
 
@@ -109,22 +107,24 @@ async def delete_device_category(
         .where(tables.DeviceCategory.deleted_at.is_(None))
         .where(tables.DeviceCategory.id.__eq__(device_category_id))
     )
-    device_category = db.scalars(stmt).one_or_none()
+    device_category = (await db.scalars(stmt)).one_or_none()
     if not device_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device Category not exists.",
         )
 
-    devices = get_devices(db, device_category)
+    devices = await get_devices(db, device_category)
 
     if devices:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Device Category has devices, please update them first.",
         )
-    setattr(device_category, "deleted_at", common.now())
-    db.commit()
+    await common.soft_delete(db, tables.DeviceCategory, [device_category_id])
+    await device_category_cache.bump(db)
+    await db.commit()
+    device_category_cache.invalidate()
     return device_category
 
 
@@ -140,12 +140,12 @@ async def select_device_category_devices(
         .where(tables.DeviceCategory.deleted_at.is_(None))
         .where(tables.DeviceCategory.id.__eq__(device_category_id))
     )
-    device_category = db.scalars(stmt).one_or_none()
+    device_category = (await db.scalars(stmt)).one_or_none()
     if not device_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device Category not exists.",
         )
 
-    devices = get_devices(db, device_category)
+    devices = await get_devices(db, device_category)
     return devices
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, HTTPException, status, Security
+from fastapi import APIRouter, HTTPException, Request, status, Security
 from sqlalchemy import select
 
-from ..dependencies import get_oauth_scheme, get_current_user, databaseSession
+from ..dependencies import get_oauth_scheme, get_current_user, databaseSession, pagination, conditional
 from ..database import schemas, tables
 from ..utils import common
-from ..services.device import get_brand, get_category, get_user, get_historical_users
+from ..utils.etag import get_versions
+from ..utils.serializer import serialize_rows
+from ..services.device import device_details, device_detail_names, get_device_details, get_historical_users
+from ..services.asset_number import check_asset_number, remember_asset_number, forget_asset_number
+from ..services.device_import import CONTENT_TYPES, import_devices, read_lines
+from ..services.export import device_columns, export_response, select_columns
+from ..services.lookup import brand_cache, device_category_cache
 
 oauth2_scheme = get_oauth_scheme()
 
@@ -22,21 +28,34 @@ router = APIRouter(
 @router.get("/", response_model=list[schemas.Device])
 async def get_devices(
         db: databaseSession,
-        skip: int = 0,
-        limit: int = 100,
+        page: pagination,
+        etag: conditional,
         asset_number: str = None,
         current_user: schemas.User = Security(get_current_user, scopes=["device:list"]),
 ):
     stmt = (
         select(tables.Device)
+        .options(*device_details)
         .where(tables.Device.deleted_at.is_(None))
-        .offset(skip)
-        .limit(limit)
     )
     if asset_number:
         stmt = stmt.where(tables.Device.asset_number.__eq__(asset_number))
-    devices = db.scalars(stmt).all()
-    return devices
+    devices = await page.fetch(db, stmt, tables.Device)
+    etag.check([get_versions(device, *device_detail_names) for device in devices])
+    return serialize_rows(devices, schemas.Device, page.response)
+
+
+# Export all devices as CSV or NDJSON, filtered like the list above.
+@router.get("/export")
+async def export_devices(
+        format: str = "csv",
+        asset_number: str = None,
+        current_user: schemas.User = Security(get_current_user, scopes=["device:list"]),
+):
+    stmt = select_columns(tables.Device, device_columns)
+    if asset_number:
+        stmt = stmt.where(tables.Device.asset_number.__eq__(asset_number))
+    return export_response(stmt, device_columns, format, "devices")
 
 
 # Get device by id.
@@ -44,23 +63,22 @@ async def get_devices(
 async def get_device(
         db: databaseSession,
         device_id: int,
+        etag: conditional,
         current_user: schemas.User = Security(get_current_user, scopes=["device:info"]),
 ):
     stmt = (
         select(tables.Device)
+        .options(*device_details)
         .where(tables.Device.deleted_at.is_(None))
         .where(tables.Device.id.__eq__(device_id))
     )
-    device = db.scalars(stmt).one_or_none()
+    device = (await db.scalars(stmt)).one_or_none()
     if not device:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device not exists.",
         )
-    device.creator = common.get_creator(db, device.creator_id)
-    device.brand = get_brand(db, device)
-    device.category = get_category(db, device)
-    device.users = get_user(db, device)
+    etag.check(get_versions(device, *device_detail_names))
     return device
 
 
@@ -71,52 +89,29 @@ async def create_device(
         form_data: schemas.DeviceCreateForm,
         current_user: schemas.User = Security(get_current_user, scopes=["device:create"]),
 ):
-    stmt = (
-        select(tables.Device)
-        .where(tables.Device.deleted_at.is_(None))
-        .where(tables.Device.asset_number.__eq__(form_data.asset_number))
-    )
-    device = db.scalars(stmt).one_or_none()
-    if device:
+    # Every device registers its number in asset_numbers, so one lookup covers both.
+    if await check_asset_number(db, form_data.asset_number):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
-            detail="Device asset number already exists.",
+            detail="Asset number already exists.",
         )
 
-    stmt = (
-        select(tables.Brand)
-        .where(tables.Brand.deleted_at.is_(None))
-        .where(tables.Brand.id.__eq__(form_data.brand_id))
-    )
-    brand = db.scalars(stmt).one_or_none()
-    if not brand:
+    if not await brand_cache.exists(db, form_data.brand_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Brand not exists.",
         )
 
-    stmt = (
-        select(tables.DeviceCategory)
-        .where(tables.DeviceCategory.deleted_at.is_(None))
-        .where(tables.DeviceCategory.id.__eq__(form_data.category_id))
-    )
-    device_category = db.scalars(stmt).one_or_none()
-    if not device_category:
+    if not await device_category_cache.exists(db, form_data.category_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device category not exists.",
         )
 
-    if common.check_asset_number(db, form_data.asset_number):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Asset number already exists.",
-        )
-
     form_data.creator_id = current_user.id
     device = tables.Device(**form_data.model_dump())
     db.add(device)
-    db.commit()
+    await db.flush()
 
     asset_number_form = schemas.AssetNumberCreateForm(
         number=form_data.asset_number,
@@ -128,8 +123,26 @@ async def create_device(
     asset_number = tables.AssetNumber(**asset_number_form.model_dump())
     db.add(asset_number)
 
-    db.commit()
-    return device
+    await db.commit()
+    remember_asset_number(asset_number.number, asset_number.table_name, asset_number.table_id)
+    return await get_device_details(db, device.id)
+
+
+# Import devices from an NDJSON or CSV body, read as it streams in.
+@router.post("/bulk", response_model=schemas.DeviceImportResult)
+async def create_devices(
+        db: databaseSession,
+        request: Request,
+        current_user: schemas.User = Security(get_current_user, scopes=["device:create"]),
+):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content type must be one of {', '.join(CONTENT_TYPES)}.",
+        )
+    result = await import_devices(db, read_lines(request.stream()), content_type, current_user.id)
+    return result
 
 
 # Update device.
@@ -145,33 +158,31 @@ async def update_device(
         .where(tables.Device.deleted_at.is_(None))
         .where(tables.Device.id.__eq__(device_id))
     )
-    device = db.scalars(stmt).one_or_none()
+    device = (await db.scalars(stmt)).one_or_none()
     if not device:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device not exists.",
         )
     for form in form_data:
+        # Cached brands and categories are keyed by int, values such as "1" used to
+        # match in SQL and still do.
+        if form.key in ("brand_id", "category_id"):
+            try:
+                form.value = int(form.value)
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                    detail=f"{form.key} must be an integer.",
+                )
         if form.key == "brand_id":
-            stmt = (
-                select(tables.Brand)
-                .where(tables.Brand.deleted_at.is_(None))
-                .where(tables.Brand.id.__eq__(form.value))
-            )
-            brand = db.scalars(stmt).one_or_none()
-            if not brand:
+            if not await brand_cache.exists(db, form.value):
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Brand not exists.",
                 )
         elif form.key == "category_id":
-            stmt = (
-                select(tables.DeviceCategory)
-                .where(tables.DeviceCategory.deleted_at.is_(None))
-                .where(tables.DeviceCategory.id.__eq__(form.value))
-            )
-            device_category = db.scalars(stmt).one_or_none()
-            if not device_category:
+            if not await device_category_cache.exists(db, form.value):
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Device category not exists.",
@@ -185,8 +196,8 @@ async def update_device(
             continue
     for form in form_data:
         setattr(device, form.key, form.value)
-    db.commit()
-    return device
+    await db.commit()
+    return await get_device_details(db, device.id)
 
 
 # Delete device.
@@ -198,35 +209,26 @@ async def delete_device(
 ):
     stmt = (
         select(tables.Device)
+        .options(*device_details)
         .where(tables.Device.deleted_at.is_(None))
         .where(tables.Device.id.__eq__(device_id))
     )
-    device = db.scalars(stmt).one_or_none()
+    device = (await db.scalars(stmt)).one_or_none()
     if not device:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device not exists.",
         )
 
-    users = get_user(db, device)
-
-    if users:
+    if device.users:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Device has users, please update them first.",
         )
-    setattr(device, "deleted_at", common.now())
-
-    stmt = (
-        select(tables.AssetNumber)
-        .where(tables.AssetNumber.deleted_at.is_(None))
-        .where(tables.AssetNumber.table_name.__eq__("Device"))
-        .where(tables.AssetNumber.table_id.__eq__(device_id))
-    )
-    asset_number = db.scalars(stmt).one_or_none()
-    if asset_number:
-        setattr(asset_number, "deleted_at", common.now())
-    db.commit()
+    # The asset number is released along with the device.
+    await common.soft_delete(db, tables.Device, [device_id])
+    await db.commit()
+    forget_asset_number(device.asset_number)
     return device
 
 
@@ -244,7 +246,7 @@ async def get_device_users(
         .where(tables.Device.deleted_at.is_(None))
         .where(tables.Device.id.__eq__(device_id))
     )
-    device = db.scalars(stmt).one_or_none()
+    device = (await db.scalars(stmt)).one_or_none()
 
     if not device:
         raise HTTPException(
@@ -252,7 +254,7 @@ async def get_device_users(
             detail="Device not exists.",
         )
 
-    users = get_historical_users(db, device)
+    users = await get_historical_users(db, device)
     return users
 
 
@@ -267,11 +269,11 @@ async def select_role_historical_users(
         select(tables.Device)
         .where(tables.Device.id.__eq__(device_id))
     )
-    device = db.scalars(stmt).one_or_none()
+    device = (await db.scalars(stmt)).one_or_none()
     if not device:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device not exists.",
         )
-    historical_users = get_historical_users(db, device)
+    historical_users = await get_historical_users(db, device)
     return historical_users
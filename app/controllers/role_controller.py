@@ -1,10 +1,12 @@
 from fastapi import APIRouter, HTTPException, status, Security
 from sqlalchemy import select
 
-from ..dependencies import get_oauth_scheme, get_current_user, databaseSession
+from ..dependencies import get_oauth_scheme, get_current_user, databaseSession, pagination
 from ..database import schemas, tables
 from ..utils import common
+from ..utils.serializer import serialize_rows
 from ..services.role import get_users, get_historical_users
+from ..services.auth import invalidate_scopes
 
 oauth2_scheme = get_oauth_scheme()
 
@@ -23,18 +25,15 @@ router = APIRouter(
 @router.get("/", response_model=list[schemas.Role])
 async def select_roles(
         db: databaseSession,
-        skip: int = 0,
-        limit: int = 100,
+        page: pagination,
         current_user: schemas.User = Security(get_current_user, scopes=["role:list"]),
 ):
     stmt = (
         select(tables.Role)
         .where(tables.Role.deleted_at.is_(None))
-        .offset(skip)
-        .limit(limit)
     )
-    roles = db.scalars(stmt).all()
-    return roles
+    roles = await page.fetch(db, stmt, tables.Role)
+    return serialize_rows(roles, schemas.Role, page.response)
 
 
 # Get role by id.
@@ -49,13 +48,13 @@ async def select_role(
         .where(tables.Role.deleted_at.is_(None))
         .where(tables.Role.id.__eq__(role_id))
     )
-    role = db.scalars(stmt).one_or_none()
+    role = (await db.scalars(stmt)).one_or_none()
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Role not exists.",
         )
-    role.creator = common.get_creator(db, role.creator_id)
+    role.creator = await common.get_creator(db, role.creator_id)
     return role
 
 
@@ -74,7 +73,7 @@ async def create_role(
     form_data.creator_id = current_user.id
     role = tables.Role(**form_data.model_dump())
     db.add(role)
-    db.commit()
+    await db.commit()
     return role
 
 
@@ -91,7 +90,7 @@ async def update_role(
         .where(tables.Role.deleted_at.is_(None))
         .where(tables.Role.id.__eq__(role_id))
     )
-    role = db.scalars(stmt).one_or_none()
+    role = (await db.scalars(stmt)).one_or_none()
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -104,7 +103,8 @@ async def update_role(
         )
     for form in form_data:
         setattr(role, form.key, form.value)
-    db.commit()
+    await db.commit()
+    invalidate_scopes()
     return role
 
 
@@ -120,7 +120,7 @@ async def delete_role(
         .where(tables.Role.deleted_at.is_(None))
         .where(tables.Role.id.__eq__(role_id))
     )
-    role = db.scalars(stmt).one_or_none()
+    role = (await db.scalars(stmt)).one_or_none()
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -132,15 +132,16 @@ async def delete_role(
             detail="Role name 'superuser' is reserved.",
         )
 
-    users = get_users(db, role)
+    users = await get_users(db, role)
 
     if users:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Role has users, please update them first.",
         )
-    setattr(role, "deleted_at", common.now())
-    db.commit()
+    await common.soft_delete(db, tables.Role, [role_id])
+    await db.commit()
+    invalidate_scopes()
     return role
 
 
@@ -157,13 +158,13 @@ async def select_role_users(
         .where(tables.Role.deleted_at.is_(None))
         .where(tables.Role.id.__eq__(user_id))
     )
-    role = db.scalars(stmt).one_or_none()
+    role = (await db.scalars(stmt)).one_or_none()
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Role not exists.",
         )
-    users = get_users(db, role)
+    users = await get_users(db, role)
     return users
 
 
@@ -178,11 +179,11 @@ async def select_role_historical_users(
         select(tables.Role)
         .where(tables.Role.id.__eq__(role_id))
     )
-    role = db.scalars(stmt).one_or_none()
+    role = (await db.scalars(stmt)).one_or_none()
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Role not exists.",
         )
-    historical_users = get_historical_users(db, role)
+    historical_users = await get_historical_users(db, role)
     return historical_users
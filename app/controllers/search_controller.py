@@ -1,15 +1,18 @@
 from typing import Union
 
 from fastapi import APIRouter, HTTPException, status, Security
-from sqlalchemy import select
 
 from ..dependencies import get_oauth_scheme, get_current_user, databaseSession
-from ..database import schemas, tables
-from ..utils import common
+from ..database import schemas
 from ..services.role import get_users, get_historical_users
+from ..services.asset_number import get_assets
+from ..services.search import search_tickets, search_tickets_by_title
+from ..utils.config import get_config
 
 oauth2_scheme = get_oauth_scheme()
 
+MAX_BATCH = get_config().get("asset_number", {}).get("max_batch", 1000)
+
 router = APIRouter(
     prefix="/search",
     tags=["search"],
@@ -28,45 +31,57 @@ async def select_asset_number(
         asset_number: str,
         current_user: schemas.User = Security(get_current_user, scopes=["search:asset_number"]),
 ):
-    stmt = (
-        select(tables.AssetNumber)
-        .where(tables.AssetNumber.deleted_at.is_(None))
-        .where(tables.AssetNumber.number.__eq__(asset_number))
-    )
-    asset_number = db.scalars(stmt).one_or_none()
-    if not asset_number:
+    assets = await get_assets(db, [asset_number])
+    if asset_number not in assets:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Asset number not exists.",
         )
-
-    table = getattr(tables, asset_number.table_name)
-
-    stmt = (
-        select(table)
-        .where(table.deleted_at.is_(None))
-        .where(table.id.__eq__(asset_number.table_id))
-    )
-    asset = db.scalars(stmt).one_or_none()
+    asset = assets[asset_number]
     if not asset:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Asset not exists.",
         )
-    asset.creator = common.get_creator(db, asset.creator_id)
     return asset
 
 
-@router.get("/tickets/title/{keyword}", response_model=list[schemas.Ticket])
+# Search by many asset numbers at once, unknown numbers map to null.
+@router.post("/assets/asset_numbers", response_model=dict[str, Union[schemas.Device, None]])
+async def select_asset_numbers(
+        db: databaseSession,
+        asset_numbers: list[str],
+        current_user: schemas.User = Security(get_current_user, scopes=["search:asset_number"]),
+):
+    if len(asset_numbers) > MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH} asset numbers per request.",
+        )
+    assets = await get_assets(db, asset_numbers)
+    return {asset_number: assets.get(asset_number) for asset_number in asset_numbers}
+
+
+# Search tickets by title, description and comments, best match first.
+@router.get("/tickets", response_model=list[schemas.Ticket])
 async def select_tickets(
+        db: databaseSession,
+        q: str,
+        skip: int = 0,
+        limit: int = 20,
+        current_user: schemas.User = Security(get_current_user, scopes=["search:ticket"]),
+):
+    tickets = await search_tickets(db, q, skip, limit)
+    return tickets
+
+
+# Kept for older clients: titles containing the keyword, without the index.
+# Use /search/tickets for ranked search of titles, descriptions and comments.
+@router.get("/tickets/title/{keyword}", response_model=list[schemas.Ticket])
+async def select_tickets_by_title(
         db: databaseSession,
         keyword: str,
         current_user: schemas.User = Security(get_current_user, scopes=["search:ticket"]),
 ):
-    stmt = (
-        select(tables.Ticket)
-        .where(tables.Ticket.deleted_at.is_(None))
-        .where(tables.Ticket.title.ilike(f"%{keyword}%"))
-    )
-    tickets = db.scalars(stmt).all()
+    tickets = await search_tickets_by_title(db, keyword)
     return tickets
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Security
+
+from ..dependencies import get_oauth_scheme, get_current_user
+from ..database import schemas
+from ..database.database import pool_metrics, query_metrics
+from ..middlewares.footprint import footprint_writer
+from ..services.asset_number import asset_number_cache
+from ..services.auth import scope_cache, token_cache
+from ..services.lookup import brand_cache, device_category_cache
+from ..utils import crypt
+
+oauth2_scheme = get_oauth_scheme()
+
+router = APIRouter(
+    prefix="/system",
+    tags=["system"],
+    dependencies=[],
+    responses={404: {"description": "Not found"}},
+)
+
+
+# APIs for system.
+
+
+# Get runtime metrics of this worker.
+@router.get("/metrics")
+async def select_metrics(
+        current_user: schemas.User = Security(get_current_user, scopes=["system:metrics"]),
+):
+    return {
+        "database": pool_metrics.stats(),
+        "queries": query_metrics.stats(),
+        "crypt": crypt.pool.stats(),
+        "token_cache": token_cache.stats(),
+        "scope_cache": scope_cache.stats(),
+        "asset_number_cache": asset_number_cache.stats(),
+        "footprint": footprint_writer.stats(),
+        "lookup_cache": {
+            "brands": brand_cache.stats(),
+            "device_categories": device_category_cache.stats(),
+        },
+    }
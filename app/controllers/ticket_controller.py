@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, status, Security
 from sqlalchemy import select
 
-from ..dependencies import get_oauth_scheme, get_current_user, databaseSession
+from ..dependencies import get_oauth_scheme, get_current_user, databaseSession, pagination, conditional
 from ..database import schemas, tables
 from ..utils import common
+from ..utils.etag import get_versions
+from ..utils.serializer import serialize_rows
 from ..services.ticket import get_comments, get_minutes, check_work, start_work, end_work
+from ..services.search import index_ticket, unindex_ticket
+from ..services.export import ticket_columns, export_response, select_columns
 
 oauth2_scheme = get_oauth_scheme()
 
@@ -23,18 +27,27 @@ router = APIRouter(
 @router.get("/", response_model=list[schemas.Ticket])
 async def select_tickets(
         db: databaseSession,
-        skip: int = 0,
-        limit: int = 100,
+        page: pagination,
+        etag: conditional,
         current_user: schemas.User = Security(get_current_user, scopes=["ticket:list"]),
 ):
     stmt = (
         select(tables.Ticket)
         .where(tables.Ticket.deleted_at.is_(None))
-        .offset(skip)
-        .limit(limit)
     )
-    tickets = db.scalars(stmt).all()
-    return tickets
+    tickets = await page.fetch(db, stmt, tables.Ticket)
+    etag.check([get_versions(ticket) for ticket in tickets])
+    return serialize_rows(tickets, schemas.Ticket, page.response)
+
+
+# Export all tickets as CSV or NDJSON.
+@router.get("/export")
+async def export_tickets(
+        format: str = "csv",
+        current_user: schemas.User = Security(get_current_user, scopes=["ticket:list"]),
+):
+    stmt = select_columns(tables.Ticket, ticket_columns)
+    return export_response(stmt, ticket_columns, format, "tickets")
 
 
 # Get ticket by id.
@@ -42,6 +55,7 @@ async def select_tickets(
 async def select_ticket(
         db: databaseSession,
         ticket_id: int,
+        etag: conditional,
         current_user: schemas.User = Security(get_current_user, scopes=["ticket:info"]),
 ):
     stmt = (
@@ -49,15 +63,17 @@ async def select_ticket(
         .where(tables.Ticket.deleted_at.is_(None))
         .where(tables.Ticket.id.__eq__(ticket_id))
     )
-    ticket = db.scalars(stmt).one_or_none()
+    ticket = (await db.scalars(stmt)).one_or_none()
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ticket not exists.",
         )
-    ticket.comments = get_comments(db, ticket)
-    ticket.work_times = get_minutes(db, ticket)
-    ticket.creator = common.get_creator(db, ticket.creator_id)
+    ticket.creator = await common.get_creator(db, ticket.creator_id)
+    # Comments and minutes bump the ticket, so they are only loaded when sent.
+    etag.check(get_versions(ticket, "creator"))
+    ticket.comments = await get_comments(db, ticket)
+    ticket.work_times = await get_minutes(db, ticket)
     return ticket
 
 
@@ -71,7 +87,9 @@ async def create_ticket(
     form_data.creator_id = current_user.id
     ticket = tables.Ticket(**form_data.model_dump())
     db.add(ticket)
-    db.commit()
+    await db.flush()
+    await index_ticket(db, ticket)
+    await db.commit()
     return ticket
 
 
@@ -88,7 +106,7 @@ async def update_ticket(
         .where(tables.Ticket.deleted_at.is_(None))
         .where(tables.Ticket.id.__eq__(ticket_id))
     )
-    ticket = db.scalars(stmt).one_or_none()
+    ticket = (await db.scalars(stmt)).one_or_none()
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -96,7 +114,9 @@ async def update_ticket(
         )
     for form in form_data:
         setattr(ticket, form.key, form.value)
-    db.commit()
+    if any(form.key in ("title", "description") for form in form_data):
+        await index_ticket(db, ticket)
+    await db.commit()
     return ticket
 
 
@@ -112,16 +132,17 @@ async def delete_ticket(
         .where(tables.Ticket.deleted_at.is_(None))
         .where(tables.Ticket.id.__eq__(ticket_id))
     )
-    ticket = db.scalars(stmt).one_or_none()
+    ticket = (await db.scalars(stmt)).one_or_none()
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ticket not exists.",
         )
 
-    setattr(ticket, "deleter_id", current_user.id)
-    setattr(ticket, "deleted_at", common.now())
-    db.commit()
+    # Comments and work minutes of the ticket go with it.
+    await common.soft_delete(db, tables.Ticket, [ticket_id], deleter_id=current_user.id)
+    await unindex_ticket(db, ticket)
+    await db.commit()
     return ticket
 
 
@@ -138,7 +159,7 @@ async def create_ticket_has_comments(
         .where(tables.Ticket.deleted_at.is_(None))
         .where(tables.Ticket.id.__eq__(ticket_id))
     )
-    ticket = db.scalars(stmt).one_or_none()
+    ticket = (await db.scalars(stmt)).one_or_none()
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -149,7 +170,10 @@ async def create_ticket_has_comments(
     form_data.creator_id = current_user.id
     comment = tables.TicketComment(**form_data.model_dump())
     db.add(comment)
-    db.commit()
+    await common.touch(db, tables.Ticket, ticket.id)
+    await db.flush()
+    await index_ticket(db, ticket)
+    await db.commit()
     return comment
 
 
@@ -171,21 +195,21 @@ async def start_work_on_ticket(
         .where(tables.Ticket.deleted_at.is_(None))
         .where(tables.Ticket.id.__eq__(ticket_id))
     )
-    ticket = db.scalars(stmt).one_or_none()
+    ticket = (await db.scalars(stmt)).one_or_none()
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ticket not exists.",
         )
 
-    minute = check_work(db, ticket, current_user)
+    minute = await check_work(db, ticket, current_user)
     if minute:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Work on ticket already exists.",
         )
 
-    minute = start_work(db, ticket, current_user, form_data.message or None)
+    minute = await start_work(db, ticket, current_user, form_data.message or None)
     return minute
 
 
@@ -207,19 +231,19 @@ async def end_work_on_ticket(
         .where(tables.Ticket.deleted_at.is_(None))
         .where(tables.Ticket.id.__eq__(ticket_id))
     )
-    ticket = db.scalars(stmt).one_or_none()
+    ticket = (await db.scalars(stmt)).one_or_none()
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Ticket not exists.",
         )
 
-    minute = check_work(db, ticket, current_user)
+    minute = await check_work(db, ticket, current_user)
     if not minute:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Work on ticket not exists.",
         )
 
-    minute = end_work(db, ticket, current_user, form_data.message)
+    minute = await end_work(db, ticket, current_user, form_data.message)
     return minute
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, status, Security
 from sqlalchemy import select
 
-from ..dependencies import get_oauth_scheme, get_current_user, databaseSession
+from ..dependencies import get_oauth_scheme, get_current_user, databaseSession, pagination, conditional
 from ..database import schemas, tables
 from ..utils import common
+from ..utils.etag import get_versions
+from ..utils.serializer import serialize_rows
 from ..services.todo import get_minutes, check_work, start_work, end_work
 
 oauth2_scheme = get_oauth_scheme()
@@ -23,21 +25,20 @@ router = APIRouter(
 @router.get("/", response_model=list[schemas.Todo])
 async def select_todos(
         db: databaseSession,
-        skip: int = 0,
-        limit: int = 100,
+        page: pagination,
+        etag: conditional,
         include_finished: int = 0,
         current_user: schemas.User = Security(get_current_user, scopes=["todo:list"]),
 ):
     stmt = (
         select(tables.Todo)
         .where(tables.Todo.deleted_at.is_(None))
-        .offset(skip)
-        .limit(limit)
     )
     if not include_finished:
         stmt = stmt.where(tables.Todo.is_finished.__eq__(0))
-    todos = db.scalars(stmt).all()
-    return todos
+    todos = await page.fetch(db, stmt, tables.Todo)
+    etag.check([get_versions(todo) for todo in todos])
+    return serialize_rows(todos, schemas.Todo, page.response)
 
 
 # Get todo by id.
@@ -45,6 +46,7 @@ async def select_todos(
 async def select_todo(
         db: databaseSession,
         todo_id: int,
+        etag: conditional,
         current_user: schemas.User = Security(get_current_user, scopes=["todo:info"]),
 ):
     stmt = (
@@ -52,14 +54,16 @@ async def select_todo(
         .where(tables.Todo.deleted_at.is_(None))
         .where(tables.Todo.id.__eq__(todo_id))
     )
-    todo = db.scalars(stmt).one_or_none()
+    todo = (await db.scalars(stmt)).one_or_none()
     if not todo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Todo not exists.",
         )
-    todo.minutes = get_minutes(db, todo)
-    todo.creator = common.get_creator(db, todo.creator_id)
+    todo.creator = await common.get_creator(db, todo.creator_id)
+    # Minutes bump the todo, so they are only loaded when sent.
+    etag.check(get_versions(todo, "creator"))
+    todo.minutes = await get_minutes(db, todo)
     return todo
 
 
@@ -73,7 +77,7 @@ async def create_ticket(
     form_data.creator_id = current_user.id
     todo = tables.Todo(**form_data.model_dump())
     db.add(todo)
-    db.commit()
+    await db.commit()
     return todo
 
 
@@ -90,7 +94,7 @@ async def update_ticket(
         .where(tables.Todo.deleted_at.is_(None))
         .where(tables.Todo.id.__eq__(todo_id))
     )
-    todo = db.scalars(stmt).one_or_none()
+    todo = (await db.scalars(stmt)).one_or_none()
     if not todo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,7 +102,7 @@ async def update_ticket(
         )
     for form in form_data:
         setattr(todo, form.key, form.value)
-    db.commit()
+    await db.commit()
     return todo
 
 
@@ -114,16 +118,15 @@ async def delete_ticket(
         .where(tables.Todo.deleted_at.is_(None))
         .where(tables.Todo.id.__eq__(todo_id))
     )
-    todo = db.scalars(stmt).one_or_none()
+    todo = (await db.scalars(stmt)).one_or_none()
     if not todo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Todo not exists.",
         )
 
-    setattr(todo, "deleter_id", current_user.id)
-    setattr(todo, "deleted_at", common.now())
-    db.commit()
+    await common.soft_delete(db, tables.Todo, [todo_id])
+    await db.commit()
     return todo
 
 
@@ -145,21 +148,21 @@ async def start_work_on_todo(
         .where(tables.Todo.deleted_at.is_(None))
         .where(tables.Todo.id.__eq__(todo_id))
     )
-    todo = db.scalars(stmt).one_or_none()
+    todo = (await db.scalars(stmt)).one_or_none()
     if not todo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Todo not exists.",
         )
 
-    minute = check_work(db, todo)
+    minute = await check_work(db, todo)
     if minute:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Work on todo already exists.",
         )
 
-    minute = start_work(db, todo, current_user)
+    minute = await start_work(db, todo, current_user)
     return minute
 
 
@@ -181,19 +184,19 @@ async def end_work_on_ticket(
         .where(tables.Todo.deleted_at.is_(None))
         .where(tables.Todo.id.__eq__(todo_id))
     )
-    todo = db.scalars(stmt).one_or_none()
+    todo = (await db.scalars(stmt)).one_or_none()
     if not todo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Todo not exists.",
         )
 
-    minute = check_work(db, todo)
+    minute = await check_work(db, todo)
     if not minute:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Work on todo not exists.",
         )
     print(minute)
-    minute = end_work(db, todo, current_user)
+    minute = await end_work(db, todo, current_user)
     return minute
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException, status, Security
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, status, Security
 from sqlalchemy import select
 
-from ..dependencies import get_oauth_scheme, get_current_user, databaseSession
+from ..dependencies import get_oauth_scheme, get_current_user, databaseSession, pagination
 from ..database import schemas, tables
 from ..utils import crypt, common
+from ..utils.serializer import serialize_rows
 from ..services.user import get_roles, get_devices, get_historical_roles, get_historical_devices
+from ..services.auth import invalidate_user
+from ..services.export import user_columns, export_response, select_columns
 
 oauth2_scheme = get_oauth_scheme()
 
@@ -22,18 +27,25 @@ router = APIRouter(
 @router.get("/", response_model=list[schemas.User])
 async def get_users(
         db: databaseSession,
-        skip: int = 0,
-        limit: int = 100,
+        page: pagination,
         current_user: schemas.User = Security(get_current_user, scopes=["user:list"]),
 ):
     stmt = (
         select(tables.User)
         .where(tables.User.deleted_at.is_(None))
-        .offset(skip)
-        .limit(limit)
     )
-    users = db.scalars(stmt).all()
-    return users
+    users = await page.fetch(db, stmt, tables.User)
+    return serialize_rows(users, schemas.User, page.response)
+
+
+# Export all users as CSV or NDJSON.
+@router.get("/export")
+async def export_users(
+        format: str = "csv",
+        current_user: schemas.User = Security(get_current_user, scopes=["user:list"]),
+):
+    stmt = select_columns(tables.User, user_columns)
+    return export_response(stmt, user_columns, format, "users")
 
 
 # Get user by id.
@@ -48,14 +60,14 @@ async def get_user(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
 
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not exists.",
         )
-    user.creator = common.get_creator(db, user.creator_id)
+    user.creator = await common.get_creator(db, user.creator_id)
 
     return user
 
@@ -77,7 +89,7 @@ async def create_user(
         select(tables.User)
         .where(tables.User.email.__eq__(form_data.email))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -88,18 +100,18 @@ async def create_user(
         select(tables.User)
         .where(tables.User.username.__eq__(form_data.username))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Username already exists.",
         )
     form_data.creator_id = current_user.id
-    form_data.hashed_password = crypt.hash_password(form_data.password)
+    form_data.hashed_password = await crypt.hash_password_async(form_data.password)
     del form_data.password
     user = tables.User(**form_data.model_dump())
     db.add(user)
-    db.commit()
+    await db.commit()
     return user
 
 
@@ -116,7 +128,7 @@ async def update_user(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -130,17 +142,52 @@ async def update_user(
             )
         if form.key == "password":
             form.key = "hashed_password"
-            form.value = crypt.hash_password(form.value)
+            form.value = await crypt.hash_password_async(form.value)
         if (form.key == "username") and (form.value == "admin"):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Username name 'admin' is reserved.",
             )
         setattr(user, form.key, form.value)
-    db.commit()
+    await db.commit()
+    invalidate_user(user.id)
     return user
 
 
+# Soft delete many users at once, e.g. DELETE /users/?ids=2&ids=3.
+@router.delete("/", response_model=list[schemas.User])
+async def delete_users(
+        db: databaseSession,
+        ids: Annotated[list[int], Query()],
+        current_user: schemas.User = Security(get_current_user, scopes=["user:delete"]),
+):
+    ids = list(dict.fromkeys(ids))
+    stmt = (
+        select(tables.User)
+        .where(tables.User.deleted_at.is_(None))
+        .where(tables.User.id.in_(ids))
+        .order_by(tables.User.id)
+    )
+    users = (await db.scalars(stmt)).all()
+    missing = set(ids) - {user.id for user in users}
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Users not exist: {', '.join(str(user_id) for user_id in sorted(missing))}.",
+        )
+    if any(user.username == "admin" for user in users):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Username name 'admin' is reserved.",
+        )
+
+    await common.soft_delete(db, tables.User, ids)
+    await db.commit()
+    for user_id in ids:
+        invalidate_user(user_id)
+    return users
+
+
 # Soft delete user.
 @router.delete("/{user_id}", response_model=schemas.User)
 async def delete_user(
@@ -153,7 +200,7 @@ async def delete_user(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -164,34 +211,10 @@ async def delete_user(
             status_code=status.HTTP_409_CONFLICT,
             detail="Username name 'admin' is reserved.",
         )
-    # Delete user has roles and user has devices.
-
-    stmt = (
-        select(tables.UserHasRole)
-        .where(tables.UserHasRole.deleted_at.is_(None))
-        .where(tables.UserHasRole.user_id.__eq__(user_id))
-    )
-
-    user_has_roles = db.scalars(stmt).all()
-
-    for user_has_role in user_has_roles:
-        setattr(user_has_role, "deleted_at", common.now())
-        db.commit()
-
-    stmt = (
-        select(tables.UserHasDevice)
-        .where(tables.UserHasDevice.deleted_at.is_(None))
-        .where(tables.UserHasDevice.user_id.__eq__(user_id))
-    )
-
-    user_has_devices = db.scalars(stmt).all()
-
-    for user_has_device in user_has_devices:
-        setattr(user_has_device, "deleted_at", common.now())
-        db.commit()
-
-    setattr(user, "deleted_at", common.now())
-    db.commit()
+    # Roles and devices of the user go with it, in the same transaction.
+    await common.soft_delete(db, tables.User, [user_id])
+    await db.commit()
+    invalidate_user(user_id)
     return user
 
 
@@ -209,13 +232,13 @@ async def select_user_roles(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not exists.",
         )
-    roles = get_roles(db, user)
+    roles = await get_roles(db, user)
     return roles
 
 
@@ -230,13 +253,13 @@ async def select_user_historical_roles(
         select(tables.User)
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not exists.",
         )
-    historical_roles = get_historical_roles(db, user)
+    historical_roles = await get_historical_roles(db, user)
     return historical_roles
 
 
@@ -258,7 +281,7 @@ async def create_user_role(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -269,7 +292,7 @@ async def create_user_role(
         .where(tables.Role.deleted_at.is_(None))
         .where(tables.Role.id.__eq__(form_data.role_id))
     )
-    role = db.scalars(stmt).one_or_none()
+    role = (await db.scalars(stmt)).one_or_none()
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -283,7 +306,7 @@ async def create_user_role(
         .where(tables.UserHasRole.role_id.__eq__(form_data.role_id))
     )
 
-    user_has_role = db.scalars(stmt).one_or_none()
+    user_has_role = (await db.scalars(stmt)).one_or_none()
 
     if user_has_role:
         raise HTTPException(
@@ -294,7 +317,8 @@ async def create_user_role(
     form_data.creator_id = current_user.id
     user_has_role = tables.UserHasRole(**form_data.model_dump())
     db.add(user_has_role)
-    db.commit()
+    await db.commit()
+    invalidate_user(user_id)
 
     raise HTTPException(
         status_code=status.HTTP_200_OK,
@@ -315,14 +339,14 @@ async def delete_user_role(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
 
     stmt = (
         select(tables.Role)
         .where(tables.Role.deleted_at.is_(None))
         .where(tables.Role.id.__eq__(role_id))
     )
-    role = db.scalars(stmt).one_or_none()
+    role = (await db.scalars(stmt)).one_or_none()
 
     if (user and (user.username == "admin")) and (role and (role.name == "superuser")):
         raise HTTPException(
@@ -336,7 +360,7 @@ async def delete_user_role(
         .where(tables.UserHasRole.user_id.__eq__(user_id))
         .where(tables.UserHasRole.role_id.__eq__(role_id))
     )
-    user_has_role = db.scalars(stmt).one_or_none()
+    user_has_role = (await db.scalars(stmt)).one_or_none()
     if not user_has_role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -344,7 +368,8 @@ async def delete_user_role(
         )
 
     setattr(user_has_role, "deleted_at", common.now())
-    db.commit()
+    await db.commit()
+    invalidate_user(user_id)
 
     raise HTTPException(
         status_code=status.HTTP_200_OK,
@@ -366,13 +391,13 @@ async def select_user_devices(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not exists.",
         )
-    devices = get_devices(db, user)
+    devices = await get_devices(db, user)
     return devices
 
 
@@ -386,13 +411,13 @@ async def select_user_historical_devices(
         select(tables.User)
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not exists.",
         )
-    devices = get_historical_devices(db, user)
+    devices = await get_historical_devices(db, user)
     return devices
 
 
@@ -420,7 +445,7 @@ async def create_user_device(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -432,7 +457,7 @@ async def create_user_device(
         .where(tables.Device.deleted_at.is_(None))
         .where(tables.Device.id.__eq__(form_data.device_id))
     )
-    device = db.scalars(stmt).one_or_none()
+    device = (await db.scalars(stmt)).one_or_none()
     if not device:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -446,7 +471,7 @@ async def create_user_device(
         .where(tables.UserHasDevice.device_id.__eq__(form_data.device_id))
     )
 
-    user_has_device = db.scalars(stmt).one_or_none()
+    user_has_device = (await db.scalars(stmt)).one_or_none()
 
     if user_has_device:
         raise HTTPException(
@@ -460,7 +485,7 @@ async def create_user_device(
 
     user_has_device = tables.UserHasDevice(**form_data.model_dump())
     db.add(user_has_device)
-    db.commit()
+    await db.commit()
 
     raise HTTPException(
         status_code=status.HTTP_200_OK,
@@ -487,7 +512,7 @@ async def delete_user_device(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.id.__eq__(user_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -499,7 +524,7 @@ async def delete_user_device(
         .where(tables.Device.deleted_at.is_(None))
         .where(tables.Device.id.__eq__(form_data.device_id))
     )
-    device = db.scalars(stmt).one_or_none()
+    device = (await db.scalars(stmt)).one_or_none()
     if not device:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -512,7 +537,7 @@ async def delete_user_device(
         .where(tables.UserHasDevice.user_id.__eq__(user_id))
         .where(tables.UserHasDevice.device_id.__eq__(form_data.device_id))
     )
-    user_has_devices = db.scalars(stmt).all()
+    user_has_devices = (await db.scalars(stmt)).all()
     if not user_has_devices:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -525,7 +550,7 @@ async def delete_user_device(
         .where(tables.UserHasDevice.device_id.__eq__(form_data.device_id))
     )
 
-    old_user_has_device = db.scalars(stmt).one_or_none()
+    old_user_has_device = (await db.scalars(stmt)).one_or_none()
     if not old_user_has_device:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -544,10 +569,10 @@ async def delete_user_device(
 
     new_user_has_device = tables.UserHasDevice(**form_data.model_dump())
     db.add(new_user_has_device)
-    db.commit()
+    await db.commit()
 
     old_user_has_device.deleted_at = common.now()
-    db.commit()
+    await db.commit()
 
     if not new_user_has_device:
         raise HTTPException(
@@ -1,9 +1,62 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.utils.config import get_database_config
+from app.utils.config import get_config, get_database_config
+from .pool import PoolMetrics
+from .queries import QueryMetrics
+
+# Async drivers used when env.yml does not set database.async_url.
+ASYNC_DRIVERS = {
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+}
+
+# env.yml database.pool keys and the create_engine() arguments they map to.
+POOL_OPTIONS = {
+    "size": "pool_size",
+    "max_overflow": "max_overflow",
+    "recycle": "pool_recycle",
+    "pre_ping": "pool_pre_ping",
+    "timeout": "pool_timeout",
+}
+
+
+def get_async_database_url(database_config):
+    if database_config.get("async_url"):
+        return database_config["async_url"]
+    url = make_url(database_config["url"])
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for '{backend}', please set database.async_url in env.yml.")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def get_engine_options(database_config):
+    options = {}
+    pool_config = database_config.get("pool") or {}
+    for key, option in POOL_OPTIONS.items():
+        if key in pool_config:
+            options[option] = pool_config[key]
+    if "query_cache_size" in database_config:
+        options["query_cache_size"] = database_config["query_cache_size"]
+    return options
+
 
 SQLALCHEMY_DATABASE_URL = get_database_config()["url"]
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+SQLALCHEMY_ASYNC_DATABASE_URL = get_async_database_url(get_database_config())
+
+# The sync engine is kept for schema management and the admin CLI.
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **get_engine_options(get_database_config()))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Request handlers use the async engine, rows stay readable after commit.
+async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL, **get_engine_options(get_database_config()))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+pool_metrics = PoolMetrics(async_engine.sync_engine)
+query_metrics = QueryMetrics(
+    async_engine.sync_engine,
+    server_timing=get_config().get("queries", {}).get("server_timing", False),
+)
+
 Base = declarative_base()
@@ -0,0 +1,97 @@
+from sqlalchemy import Index, inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from .database import Base
+
+
+def get_index_names(engine, table_name):
+    return {index["name"] for index in inspect(engine).get_indexes(table_name)}
+
+
+def get_column_names(engine, table_name):
+    return {column["name"] for column in inspect(engine).get_columns(table_name)}
+
+
+# Columns added to existing tables, such as the version column every table got
+# for ETags, need an ALTER TABLE. Returns them as "table.column". New columns
+# must be nullable or have a server default, so existing rows get a value.
+def create_missing_columns(engine):
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not inspect(engine).has_table(table.name):
+            continue
+        existing = get_column_names(engine, table.name)
+        missing = [column for column in table.columns if column.name not in existing]
+        if not missing:
+            continue
+        table_name = engine.dialect.identifier_preparer.format_table(table)
+        with engine.begin() as connection:
+            for column in missing:
+                column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}"))
+        created += [f"{table.name}.{column.name}" for column in missing]
+    return created
+
+
+# MySQL FULLTEXT indexes created before they got the ngram parser never
+# tokenized CJK text. Indexes whose parser differs from the model are dropped,
+# so create_missing_indexes() creates them again.
+def drop_changed_parser_indexes(engine):
+    if engine.dialect.name != "mysql":
+        return []
+    dropped = []
+    for table in Base.metadata.sorted_tables:
+        if not inspect(engine).has_table(table.name):
+            continue
+        existing = {index["name"]: index for index in inspect(engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                continue
+            parser = existing[index.name].get("dialect_options", {}).get("mysql_with_parser")
+            if index.dialect_options["mysql"]["with_parser"] != parser:
+                index.drop(bind=engine)
+                dropped.append(index.name)
+    return dropped
+
+
+# deleted_at used to be indexed on every table, footprints included, which no
+# query filters by it. Those indexes only slow down writes, so the ones the
+# models no longer declare are dropped. Returns their names.
+def drop_unused_deleted_at_indexes(engine):
+    dropped = []
+    for table in Base.metadata.sorted_tables:
+        if "deleted_at" not in table.columns or not inspect(engine).has_table(table.name):
+            continue
+        index_name = f"ix_{table.name}_deleted_at"
+        declared = {index.name for index in table.indexes}
+        if index_name in get_index_names(engine, table.name) and index_name not in declared:
+            Index(index_name, table.c.deleted_at).drop(bind=engine)
+            dropped.append(index_name)
+    return dropped
+
+
+# create_all() only creates missing tables, so indexes added to existing
+# tables have to be created separately. Returns the names of the new indexes,
+# indexes limited to another dialect (e.g. FULLTEXT) are skipped by create().
+def create_missing_indexes(engine):
+    created = []
+    for table in Base.metadata.sorted_tables:
+        if not inspect(engine).has_table(table.name):
+            continue
+        existing = get_index_names(engine, table.name)
+        missing = [index for index in table.indexes if index.name not in existing]
+        if not missing:
+            continue
+        for index in missing:
+            index.create(bind=engine)
+        existing = get_index_names(engine, table.name)
+        created += sorted(index.name for index in missing if index.name in existing)
+    return created
+
+
+def migrate(engine):
+    Base.metadata.create_all(bind=engine)
+    columns = create_missing_columns(engine)
+    drop_changed_parser_indexes(engine)
+    drop_unused_deleted_at_indexes(engine)
+    return columns, create_missing_indexes(engine)
@@ -0,0 +1,119 @@
+import bisect
+import contextvars
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+# Upper bounds of the histogram buckets, the last bucket takes everything above.
+QUERY_COUNT_BOUNDS = (1, 2, 3, 5, 10, 20, 50)
+DB_MS_BOUNDS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+MAX_STATEMENT_LENGTH = 200
+
+# Statistics of the request being handled, set by QueryMiddleware. Engine events
+# run in the greenlet of the request task, which shares its context.
+current_stats = contextvars.ContextVar("current_query_stats", default=None)
+
+
+def shorten(statement: str) -> str:
+    statement = re.sub(r"\s+", " ", statement).strip()
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        statement = statement[:MAX_STATEMENT_LENGTH - 3] + "..."
+    return statement
+
+
+# Queries of one request.
+class QueryStats:
+    def __init__(self):
+        self.route = None
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+
+    def add(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def stats(self):
+        buckets = {f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {"buckets": buckets, "sum": round(self.sum, 3), "max": round(self.max, 3)}
+
+
+# Query count and database time of the requests of one route.
+class RouteQueries:
+    def __init__(self):
+        self.requests = 0
+        self.queries = Histogram(QUERY_COUNT_BOUNDS)
+        self.db_ms = Histogram(DB_MS_BOUNDS)
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+
+    def observe(self, stats: QueryStats):
+        self.requests += 1
+        self.queries.observe(stats.count)
+        self.db_ms.observe(stats.seconds * 1000)
+        if stats.slowest_statement is not None and stats.slowest_seconds * 1000 >= self.slowest_ms:
+            self.slowest_ms = stats.slowest_seconds * 1000
+            self.slowest_statement = shorten(stats.slowest_statement)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "queries": self.queries.stats(),
+            "db_ms": self.db_ms.stats(),
+            "slowest": {"ms": round(self.slowest_ms, 3), "statement": self.slowest_statement},
+        }
+
+
+# Times every statement of an engine and adds it to the statistics of the
+# current request. Statements run outside requests, such as footprint batches,
+# are only counted.
+class QueryMetrics:
+    def __init__(self, engine, server_timing: bool = False):
+        self.server_timing = server_timing
+        self.background_queries = 0
+        self.routes = {}
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._query_started_at = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - context._query_started_at
+        stats = current_stats.get()
+        if stats is None:
+            self.background_queries += 1
+            return
+        stats.add(statement, seconds)
+
+    def record(self, stats: QueryStats):
+        with self._lock:
+            if stats.route not in self.routes:
+                self.routes[stats.route] = RouteQueries()
+            self.routes[stats.route].observe(stats)
+
+    def stats(self):
+        with self._lock:
+            routes = {route: queries.stats() for route, queries in sorted(self.routes.items())}
+        return {"background_queries": self.background_queries, "routes": routes}
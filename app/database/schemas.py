@@ -9,7 +9,9 @@ from app.utils import common
 # schema for decoding token
 class AuthTokenData(BaseSchema):
     user_id: int
-    scopes: list[str] = []
+    # Tokens issued before scope versions carry their scopes instead.
+    scope_version: Union[str, None] = None
+    scopes: frozenset[str] = frozenset()
 
 
 # Form schemas.
@@ -29,7 +31,7 @@ class RoleCreateForm(BaseSchema):
     name: str
     scopes: list[str] = []
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class UserChangePasswordForm(BaseSchema):
@@ -44,26 +46,26 @@ class UserCreateForm(BaseSchema):
     password: Union[str, None] = None
     hashed_password: Union[str, None] = None
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class BrandCreateForm(BaseSchema):
     name: str
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class DeviceCategoryCreateForm(BaseSchema):
     name: str
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class UserHasRoleCreateForm(BaseSchema):
     user_id: int
     role_id: int
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class UserHasDeviceCreateOrUpdateForm(BaseSchema):
@@ -74,7 +76,7 @@ class UserHasDeviceCreateOrUpdateForm(BaseSchema):
     expired_at: Union[datetime, None] = None
     status: int = 0
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
     deleted_at: Union[datetime, None] = None
 
 
@@ -85,7 +87,7 @@ class FootprintCreateForm(BaseSchema):
     response_status_code: int
     response_body: str
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class DeviceCreateForm(BaseSchema):
@@ -98,7 +100,7 @@ class DeviceCreateForm(BaseSchema):
     brand_id: int
     category_id: int
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class AssetNumberCreateForm(BaseSchema):
@@ -106,7 +108,7 @@ class AssetNumberCreateForm(BaseSchema):
     table_name: str
     table_id: int
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class TicketCreateForm(BaseSchema):
@@ -119,14 +121,14 @@ class TicketCreateForm(BaseSchema):
     expired_at: Union[datetime, None] = None
     deleter_id: Union[int, None] = None
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class TicketCommentCreateForm(BaseSchema):
     ticket_id: int
     comment: str
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class TicketMinuteCreateForm(BaseSchema):
@@ -134,7 +136,7 @@ class TicketMinuteCreateForm(BaseSchema):
     flag: int = 0
     message: Union[str, None] = None
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class TodoCreateForm(BaseSchema):
@@ -144,7 +146,7 @@ class TodoCreateForm(BaseSchema):
     is_finished: bool = False
     finished_at: Union[datetime, None] = None
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 class TodoMinuteCreateForm(BaseSchema):
@@ -152,7 +154,7 @@ class TodoMinuteCreateForm(BaseSchema):
     flag: int = 0
     is_finished: int = 0
     creator_id: int = 0
-    created_at: str = common.now()
+    created_at: datetime = common.now()
 
 
 # Model schemas.
@@ -416,6 +418,18 @@ class User(BaseSchema):
         from_attributes = True
 
 
+class DeviceImportError(BaseSchema):
+    line: int
+    asset_number: Union[str, None] = None
+    detail: str
+
+
+class DeviceImportResult(BaseSchema):
+    created: int
+    failed: int
+    errors: list[DeviceImportError] = []
+
+
 class AssetNumber(BaseSchema):
     id: int
     number: str
@@ -1,15 +1,25 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Integer, String, DateTime, JSON, Text
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Boolean, Index, Integer, String, DateTime, JSON, Text, literal_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database.database import Base
 
 
+# deleted_at is only indexed on tables whose lists filter on it, the others
+# look rows up by key or through (foreign key, deleted_at) indexes.
 class Additions:
     creator_id: Mapped[int] = mapped_column(Integer, nullable=True, comment="创建者 ID")
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=True, comment="创建时间")
     deleted_at: Mapped[datetime] = mapped_column(DateTime, nullable=True, comment="删除时间")
+    # Bumped by every UPDATE of the row.
+    version: Mapped[int] = mapped_column(
+        Integer,
+        default=1,
+        server_default="1",
+        onupdate=literal_column("version + 1"),
+        comment="版本",
+    )
 
 
 class Footprint(Base, Additions):
@@ -24,6 +34,10 @@ class Footprint(Base, Additions):
 
 class UserHasRole(Base, Additions):
     __tablename__ = "user_has_roles"
+    __table_args__ = (
+        Index("ix_user_has_roles_user_id_deleted_at", "user_id", "deleted_at"),
+        Index("ix_user_has_roles_role_id_deleted_at", "role_id", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     user_id: Mapped[int] = mapped_column(Integer, comment="用户 ID")
     role_id: Mapped[int] = mapped_column(Integer, comment="角色 ID")
@@ -31,6 +45,10 @@ class UserHasRole(Base, Additions):
 
 class UserHasDevice(Base, Additions):
     __tablename__ = "user_has_devices"
+    __table_args__ = (
+        Index("ix_user_has_devices_user_id_deleted_at", "user_id", "deleted_at"),
+        Index("ix_user_has_devices_device_id_deleted_at", "device_id", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     user_id: Mapped[int] = mapped_column(Integer, comment="用户 ID")
     device_id: Mapped[int] = mapped_column(Integer, comment="设备 ID")
@@ -42,6 +60,9 @@ class UserHasDevice(Base, Additions):
 
 class User(Base, Additions):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_deleted_at", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     username: Mapped[str] = mapped_column(String(255), unique=True, index=True, comment="用户名")
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, comment="邮箱地址")
@@ -52,6 +73,9 @@ class User(Base, Additions):
 
 class Role(Base, Additions):
     __tablename__ = "roles"
+    __table_args__ = (
+        Index("ix_roles_deleted_at", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     name: Mapped[str] = mapped_column(String(255), comment="名称")
     scopes: Mapped[list[str]] = mapped_column(JSON, comment="权限")
@@ -59,18 +83,29 @@ class Role(Base, Additions):
 
 class Brand(Base, Additions):
     __tablename__ = "brands"
+    __table_args__ = (
+        Index("ix_brands_deleted_at", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     name: Mapped[str] = mapped_column(String(255), comment="名称")
 
 
 class DeviceCategory(Base, Additions):
     __tablename__ = "device_categories"
+    __table_args__ = (
+        Index("ix_device_categories_deleted_at", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     name: Mapped[str] = mapped_column(String(255), comment="名称")
 
 
 class Device(Base, Additions):
     __tablename__ = "devices"
+    __table_args__ = (
+        Index("ix_devices_deleted_at", "deleted_at"),
+        Index("ix_devices_brand_id_deleted_at", "brand_id", "deleted_at"),
+        Index("ix_devices_category_id_deleted_at", "category_id", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     hostname: Mapped[str] = mapped_column(String(255), comment="主机名")
     asset_number: Mapped[str] = mapped_column(String(255), index=True, comment="资产编号")
@@ -81,9 +116,38 @@ class Device(Base, Additions):
     brand_id: Mapped[int] = mapped_column(Integer, comment="品牌 ID")
     category_id: Mapped[int] = mapped_column(Integer, comment="分类 ID")
 
+    # Relations are only loaded when asked for, see services.device.device_details.
+    brand: Mapped[Brand] = relationship(
+        primaryjoin="and_(foreign(Device.brand_id) == Brand.id, Brand.deleted_at.is_(None))",
+        viewonly=True,
+        lazy="raise",
+    )
+    category: Mapped[DeviceCategory] = relationship(
+        primaryjoin="and_(foreign(Device.category_id) == DeviceCategory.id, DeviceCategory.deleted_at.is_(None))",
+        viewonly=True,
+        lazy="raise",
+    )
+    creator: Mapped[User] = relationship(
+        primaryjoin="foreign(Device.creator_id) == User.id",
+        viewonly=True,
+        lazy="raise",
+    )
+    # The user currently holding the device.
+    users: Mapped[User] = relationship(
+        secondary="user_has_devices",
+        primaryjoin="and_(Device.id == foreign(UserHasDevice.device_id), UserHasDevice.deleted_at.is_(None))",
+        secondaryjoin="and_(User.id == foreign(UserHasDevice.user_id), User.deleted_at.is_(None))",
+        uselist=False,
+        viewonly=True,
+        lazy="raise",
+    )
+
 
 class AssetNumber(Base, Additions):
     __tablename__ = "asset_numbers"
+    __table_args__ = (
+        Index("ix_asset_numbers_table_name_table_id", "table_name", "table_id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     number: Mapped[str] = mapped_column(String(255), index=True, comment="编号")
     table_name: Mapped[str] = mapped_column(String(255), comment="表名")
@@ -92,6 +156,14 @@ class AssetNumber(Base, Additions):
 
 class Ticket(Base, Additions):
     __tablename__ = "tickets"
+    __table_args__ = (
+        Index("ix_tickets_deleted_at", "deleted_at"),
+        # ngram splits CJK text, which has no spaces between words, into tokens.
+        Index(
+            "ft_tickets_title_description", "title", "description",
+            mysql_prefix="FULLTEXT", mysql_with_parser="ngram",
+        ).ddl_if(dialect="mysql"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     title: Mapped[str] = mapped_column(String(255), comment="标题")
     description: Mapped[str] = mapped_column(Text, comment="描述")
@@ -105,13 +177,43 @@ class Ticket(Base, Additions):
 
 class TicketComment(Base, Additions):
     __tablename__ = "ticket_comments"
+    __table_args__ = (
+        Index("ix_ticket_comments_ticket_id_deleted_at", "ticket_id", "deleted_at"),
+        Index(
+            "ft_ticket_comments_comment", "comment",
+            mysql_prefix="FULLTEXT", mysql_with_parser="ngram",
+        ).ddl_if(dialect="mysql"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     ticket_id: Mapped[int] = mapped_column(Integer, comment="工单 ID")
     comment: Mapped[str] = mapped_column(Text, nullable=True, comment="评论")
 
 
+# Inverted index of ticket title, description and comments, used for search
+# on databases without FULLTEXT support.
+class TicketSearchTerm(Base):
+    __tablename__ = "ticket_search_terms"
+    __table_args__ = (
+        Index("ix_ticket_search_terms_term_ticket_id", "term", "ticket_id"),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
+    term: Mapped[str] = mapped_column(String(64), comment="词项")
+    ticket_id: Mapped[int] = mapped_column(Integer, index=True, comment="工单 ID")
+    weight: Mapped[int] = mapped_column(Integer, comment="权重")
+
+
+# Bumped on every write to a cached lookup table, so other workers notice.
+class LookupVersion(Base):
+    __tablename__ = "lookup_versions"
+    name: Mapped[str] = mapped_column(String(64), primary_key=True, comment="表名")
+    version: Mapped[int] = mapped_column(Integer, default=0, comment="版本")
+
+
 class TicketMinute(Base, Additions):
     __tablename__ = "ticket_minutes"
+    __table_args__ = (
+        Index("ix_ticket_minutes_ticket_id_creator_id_flag_deleted_at", "ticket_id", "creator_id", "flag", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     ticket_id: Mapped[int] = mapped_column(Integer, comment="工单 ID")
     flag: Mapped[int] = mapped_column(Integer, default=0, comment="标识：0开始1结束")
@@ -120,6 +222,9 @@ class TicketMinute(Base, Additions):
 
 class Todo(Base, Additions):
     __tablename__ = "todos"
+    __table_args__ = (
+        Index("ix_todos_deleted_at", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     title: Mapped[str] = mapped_column(String(255), comment="标题")
     priority: Mapped[int] = mapped_column(Integer, comment="优先级,0低1中2高3紧急")
@@ -130,6 +235,9 @@ class Todo(Base, Additions):
 
 class TodoMinute(Base, Additions):
     __tablename__ = "todo_minutes"
+    __table_args__ = (
+        Index("ix_todo_minutes_todo_id_flag_is_finished_deleted_at", "todo_id", "flag", "is_finished", "deleted_at"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, comment="ID")
     todo_id: Mapped[int] = mapped_column(Integer, comment="待办 ID")
     flag: Mapped[int] = mapped_column(Integer, default=0, comment="标识：0开始1结束")
@@ -1,19 +1,21 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.database import engine
+from app.database.database import AsyncSessionLocal
 from .database import schemas, tables
 
-from .services.auth import decode_access_token
+from .services.auth import decode_access_token, cache_token, get_cached_token, get_scopes
+from .utils.etag import Conditional
+from .utils.pagination import Pagination
 
 
-def get_database_session() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+async def get_database_session() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as session:
         yield session
 
 
@@ -59,11 +61,15 @@ def get_oauth_scheme():
             "todo:update": "Update todo.",
             "todo:delete": "Delete todo.",
             "todo:work": "Work on todo.",
+
+            "system:metrics": "Read runtime metrics of the server.",
         }
     )
 
 
-databaseSession = Annotated[Session, Depends(get_database_session)]
+databaseSession = Annotated[AsyncSession, Depends(get_database_session)]
+pagination = Annotated[Pagination, Depends()]
+conditional = Annotated[Conditional, Depends()]
 tokenDependency = Annotated[str, Depends(get_oauth_scheme())]
 
 
@@ -81,31 +87,42 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": authenticate_value},
     )
-    try:
-        payload = decode_access_token(token)
-        user_id: int = payload.get("user_id")
-        if user_id is None:
-            raise credentials_exception
-        token_scopes = payload.get("scopes", [])
-        token_data = schemas.AuthTokenData(user_id=user_id, scopes=token_scopes)
-    except Exception:
-        raise credentials_exception
-
-    stmt = (
-        select(tables.User)
-        .where(tables.User.deleted_at.is_(None))
-        .where(tables.User.id.__eq__(token_data.user_id))
-    )
-    user = db.scalars(stmt).one_or_none()
-
-    if user is None:
-        raise credentials_exception
-    for security_scope in security_scopes.scopes:
-        if (security_scope not in token_data.scopes) and ("su" not in token_data.scopes):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not enough permissions",
-                headers={"WWW-Authenticate": authenticate_value},
+    cached = get_cached_token(token)
+    if cached:
+        token_data, user = cached
+    else:
+        try:
+            payload = decode_access_token(token)
+            user_id: int = payload.get("user_id")
+            if user_id is None:
+                raise credentials_exception
+            token_data = schemas.AuthTokenData(
+                user_id=user_id,
+                scope_version=payload.get("sv"),
+                scopes=payload.get("scopes", []),
             )
-    user.scopes = token_data.scopes
+        except Exception:
+            raise credentials_exception
+
+        stmt = (
+            select(tables.User)
+            .where(tables.User.deleted_at.is_(None))
+            .where(tables.User.id.__eq__(token_data.user_id))
+        )
+        user = (await db.scalars(stmt)).one_or_none()
+
+        if user is None:
+            raise credentials_exception
+        cache_token(token, token_data, user, payload["exp"])
+    if token_data.scope_version is not None:
+        scopes = await get_scopes(db, token_data.user_id, token_data.scope_version)
+    else:
+        scopes = token_data.scopes
+    if ("su" not in scopes) and not scopes.issuperset(security_scopes.scopes):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+            headers={"WWW-Authenticate": authenticate_value},
+        )
+    user.scopes = scopes
     return user
@@ -1,6 +1,14 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from .database import tables
-from app.database.database import engine
+from app.database.database import engine, pool_metrics, query_metrics
+from app.middlewares.footprint import FootprintMiddleware, footprint_writer
+from app.middlewares.queries import QueryMiddleware
+from app.utils.config import get_config, register_reload_signal
+from app.utils.crypt import PasswordPoolBusy
 from .controllers import (
     auth_controller,
     role_controller,
@@ -9,12 +17,15 @@ from .controllers import (
     device_category_controller,
     device_controller,
     search_controller,
+    system_controller,
     ticket_controller,
     todo_controller,
 )
 
 tables.Base.metadata.create_all(bind=engine)
 
+register_reload_signal()
+
 tags_metadata = [
     {
         "name": "auth",
@@ -26,6 +37,15 @@ description = """
 `Cela` API helps you do awesome stuff. 🚀
 """
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    footprint_writer.start()
+    yield
+    # Footprints still queued are written before the worker exits.
+    await footprint_writer.stop()
+
+
 app = FastAPI(
     title="Cela",
     description=description,
@@ -41,8 +61,35 @@ app = FastAPI(
         "url": "https://opensource.org/licenses/MIT",
     },
     openapi_tags=tags_metadata,
+    lifespan=lifespan,
 )
 
+if get_config().get("footprint", {}).get("enabled", True):
+    app.add_middleware(FootprintMiddleware, writer=footprint_writer)
+# Added last so it wraps the other middlewares and sees every query of a request.
+if get_config().get("queries", {}).get("enabled", True):
+    app.add_middleware(QueryMiddleware, metrics=query_metrics)
+
+
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many password operations, please retry later."},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    pool_metrics.record_timeout()
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "No database connection available, please retry later."},
+        headers={"Retry-After": "1"},
+    )
+
+
 app.include_router(auth_controller.router)
 app.include_router(role_controller.router)
 app.include_router(user_controller.router)
@@ -50,6 +97,7 @@ app.include_router(brand_controller.router)
 app.include_router(device_category_controller.router)
 app.include_router(device_controller.router)
 app.include_router(search_controller.router)
+app.include_router(system_controller.router)
 app.include_router(ticket_controller.router)
 app.include_router(todo_controller.router)
 
@@ -0,0 +1,269 @@
+import asyncio
+import json
+from collections import deque
+from urllib.parse import parse_qsl
+
+from sqlalchemy import insert
+
+from app.database import tables
+from app.database.database import AsyncSessionLocal
+from app.services.auth import decode_access_token
+from app.utils import common
+from app.utils.config import get_config
+
+# Values of keys containing these words never reach the footprints table,
+# e.g. password, new_password, access_token.
+SECRET_WORDS = ("password", "token", "secret")
+
+
+def is_secret(key) -> bool:
+    return isinstance(key, str) and any(word in key.lower() for word in SECRET_WORDS)
+
+
+def redact(value):
+    if isinstance(value, dict):
+        # Update forms send fields as {"key": "password", "value": "..."}.
+        if is_secret(value.get("key")) and "value" in value:
+            value = {**value, "value": "***"}
+        return {key: "***" if is_secret(key) else redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+# Collects a body up to a limit, the rest is only counted.
+class BodyCapture:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.size = 0
+        self.chunks = []
+        self.kept = 0
+
+    def add(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.kept < self.limit and chunk:
+            chunk = chunk[:self.limit - self.kept]
+            self.chunks.append(chunk)
+            self.kept += len(chunk)
+
+    @property
+    def truncated(self):
+        return self.size > self.kept
+
+    def load(self, content_type: str = ""):
+        if not self.size:
+            return None
+        # A cut body cannot be parsed and redacted, so none of it is kept.
+        if self.truncated:
+            return {"truncated": True, "size": self.size}
+        body = b"".join(self.chunks)
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return redact(dict(parse_qsl(body.decode("utf-8", "replace"))))
+        try:
+            return redact(json.loads(body))
+        except ValueError:
+            return {"body": body.decode("utf-8", "replace")}
+
+
+# Footprints wait in a bounded in-memory queue and are inserted in batches by a
+# background task, so requests never wait on the footprints table. When the
+# queue is full new footprints are dropped and counted.
+class FootprintWriter:
+    def __init__(
+            self,
+            methods=("POST", "PUT", "PATCH", "DELETE"),
+            queue_size: int = 10000,
+            batch_size: int = 200,
+            flush_interval: float = 1.0,
+            max_body_bytes: int = 4096,
+    ):
+        self.methods = set(methods)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_body_bytes = max_body_bytes
+        self.queued = 0
+        self.dropped = 0
+        self.truncated = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.peak_pending = 0
+        self.last_error = None
+        self._items = deque()
+        self._wakeup = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._stopping = False
+        self._task = None
+
+    def push(self, footprint: dict):
+        if len(self._items) >= self.queue_size:
+            self.dropped += 1
+            return False
+        self._items.append(footprint)
+        self.queued += 1
+        self.peak_pending = max(self.peak_pending, len(self._items))
+        self._wakeup.set()
+        if len(self._items) >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._batch_ready.set()
+        await self._task
+        self._task = None
+
+    async def run(self):
+        while True:
+            if not self._items:
+                if self._stopping:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Give the batch time to fill up, unless it is full already.
+            if len(self._items) < self.batch_size and not self._stopping:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self.write(self.take_batch())
+
+    def take_batch(self):
+        return [self._items.popleft() for _ in range(min(len(self._items), self.batch_size))]
+
+    # Write everything queued so far, including a batch the background task is writing.
+    async def flush(self):
+        while self._items:
+            await self.write(self.take_batch())
+        async with self._lock:
+            pass
+
+    async def write(self, batch):
+        if not batch:
+            return
+        async with self._lock:
+            try:
+                rows = [self.to_row(footprint) for footprint in batch]
+                async with AsyncSessionLocal() as db:
+                    await db.execute(insert(tables.Footprint), rows)
+                    await db.commit()
+            except Exception as e:
+                self.failed += len(batch)
+                self.last_error = repr(e)
+                return
+        self.written += len(batch)
+        self.batches += 1
+
+    # Decoding bodies and tokens happens here, off the request path.
+    def to_row(self, footprint: dict):
+        request_body = footprint["request_body"]
+        response_body = footprint["response_body"]
+        if request_body.truncated or response_body.truncated:
+            self.truncated += 1
+        return {
+            "action": footprint["action"],
+            "url": footprint["url"][:255],
+            "request_body": request_body.load(footprint["content_type"]),
+            "response_status_code": footprint["status_code"],
+            "response_body": response_body.load(),
+            "creator_id": get_creator_id(footprint["token"]),
+            "created_at": footprint["created_at"],
+        }
+
+    def stats(self):
+        return {
+            "pending": len(self._items),
+            "peak_pending": self.peak_pending,
+            "queue_size": self.queue_size,
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "truncated": self.truncated,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_error": self.last_error,
+        }
+
+
+def get_creator_id(token):
+    if not token:
+        return 0
+    try:
+        return decode_access_token(token).get("user_id") or 0
+    except Exception:
+        return 0
+
+
+# Records requests that change data into the footprints table through the writer.
+class FootprintMiddleware:
+    def __init__(self, app, writer: FootprintWriter):
+        self.app = app
+        self.writer = writer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.writer.methods:
+            await self.app(scope, receive, send)
+            return
+
+        request_body = BodyCapture(self.writer.max_body_bytes)
+        response_body = BodyCapture(self.writer.max_body_bytes)
+        status_code = 500
+
+        async def capture_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.add(message.get("body", b""))
+            return message
+
+        async def capture_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_body.add(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            # Redirects such as /brands -> /brands/ change nothing, the followed request is recorded.
+            if not 300 <= status_code < 400:
+                self.record(scope, request_body, status_code, response_body)
+
+    def record(self, scope, request_body, status_code, response_body):
+        headers = dict(scope["headers"])
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        url = scope["path"]
+        if scope.get("query_string"):
+            url += "?" + scope["query_string"].decode("latin-1")
+        self.writer.push({
+            "action": scope["method"],
+            "url": url,
+            "content_type": headers.get(b"content-type", b"").decode("latin-1"),
+            "request_body": request_body,
+            "status_code": status_code,
+            "response_body": response_body,
+            "token": authorization[7:] if authorization.startswith("Bearer ") else None,
+            "created_at": common.now(),
+        })
+
+
+footprint_writer = FootprintWriter(
+    methods=get_config().get("footprint", {}).get("methods", ("POST", "PUT", "PATCH", "DELETE")),
+    queue_size=get_config().get("footprint", {}).get("queue_size", 10000),
+    batch_size=get_config().get("footprint", {}).get("batch_size", 200),
+    flush_interval=get_config().get("footprint", {}).get("flush_interval_seconds", 1.0),
+    max_body_bytes=get_config().get("footprint", {}).get("max_body_bytes", 4096),
+)
@@ -0,0 +1,50 @@
+import time
+
+from app.database.queries import QueryMetrics, QueryStats, current_stats, shorten
+
+
+def get_route(scope):
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if route is not None else 'unmatched'}"
+
+
+def server_timing(stats: QueryStats, seconds: float) -> bytes:
+    metrics = [
+        f'db;dur={stats.seconds * 1000:.3f};desc="{stats.count} queries"',
+        f"app;dur={seconds * 1000:.3f}",
+    ]
+    if stats.slowest_statement is not None:
+        statement = shorten(stats.slowest_statement).replace("\\", "\\\\").replace('"', '\\"')
+        metrics.append(f'db-slowest;dur={stats.slowest_seconds * 1000:.3f};desc="{statement}"')
+    return ", ".join(metrics).encode("latin-1", "replace")
+
+
+# Counts and times the queries of every request and adds them to the histogram
+# of its route. With server_timing the numbers are also sent in a Server-Timing
+# header, the slowest statement included, so it is meant for debugging only.
+class QueryMiddleware:
+    def __init__(self, app, metrics: QueryMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        started_at = time.perf_counter()
+
+        async def timing_send(message):
+            if message["type"] == "http.response.start" and self.metrics.server_timing:
+                header = server_timing(stats, time.perf_counter() - started_at)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", header)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timing_send)
+        finally:
+            current_stats.reset(token)
+            stats.route = get_route(scope)
+            self.metrics.record(stats)
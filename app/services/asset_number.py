@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from app.database import tables
+from app.services.device import device_details
+from app.utils.cache import TTLCache
+from app.utils.config import get_config
+
+# Asset number -> (table name, table id) of live assets. Creates and deletes in
+# this worker keep it exact, the TTL bounds how long other workers' deletes linger.
+asset_number_cache = TTLCache(
+    maxsize=get_config().get("asset_number", {}).get("cache_size", 65536),
+    ttl=get_config().get("asset_number", {}).get("cache_ttl_seconds", 300),
+)
+
+# Numbers per IN (...) query, well below the bind parameter limits of the drivers.
+CHUNK_SIZE = 500
+
+# Eager loads of the tables an asset number can point at.
+table_options = {
+    "Device": device_details,
+}
+
+
+def remember_asset_number(number: str, table_name: str, table_id: int):
+    asset_number_cache.set(number, (table_name, table_id))
+
+
+def forget_asset_number(number: str):
+    asset_number_cache.delete(number)
+
+
+# Map asset numbers to (table name, table id), unknown numbers are left out.
+async def resolve_asset_numbers(db, numbers):
+    resolved = {}
+    missing = []
+    for number in dict.fromkeys(numbers):
+        location = asset_number_cache.get(number)
+        if location:
+            resolved[number] = location
+        else:
+            missing.append(number)
+    for start in range(0, len(missing), CHUNK_SIZE):
+        stmt = (
+            select(tables.AssetNumber.number, tables.AssetNumber.table_name, tables.AssetNumber.table_id)
+            .where(tables.AssetNumber.deleted_at.is_(None))
+            .where(tables.AssetNumber.number.in_(missing[start:start + CHUNK_SIZE]))
+        )
+        for number, table_name, table_id in (await db.execute(stmt)).all():
+            remember_asset_number(number, table_name, table_id)
+            resolved[number] = (table_name, table_id)
+    return resolved
+
+
+async def check_asset_number(db, number: str):
+    return number in await resolve_asset_numbers(db, [number])
+
+
+# Load the assets behind asset numbers, one query per table they point at.
+async def get_assets(db, numbers):
+    resolved = await resolve_asset_numbers(db, numbers)
+    ids = defaultdict(set)
+    for table_name, table_id in resolved.values():
+        ids[table_name].add(table_id)
+
+    assets = {}
+    for table_name, table_ids in ids.items():
+        table = getattr(tables, table_name)
+        table_ids = list(table_ids)
+        for start in range(0, len(table_ids), CHUNK_SIZE):
+            stmt = (
+                select(table)
+                .options(*table_options.get(table_name, ()))
+                .where(table.deleted_at.is_(None))
+                .where(table.id.in_(table_ids[start:start + CHUNK_SIZE]))
+            )
+            for asset in (await db.scalars(stmt)).all():
+                assets[(table_name, asset.id)] = asset
+    return {number: assets.get(location) for number, location in resolved.items()}
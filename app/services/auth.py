@@ -1,3 +1,5 @@
+import hashlib
+import time
 from datetime import timedelta, datetime, timezone
 from typing import Union
 
@@ -6,28 +8,112 @@ from sqlalchemy import select
 
 from ..database import schemas, tables
 from ..utils import crypt
+from ..utils.cache import TTLCache
 from ..utils.config import get_jwt_config
 from ..services.user import get_roles
 
+# Verified tokens, keyed by token digest, with a snapshot of their user.
+token_cache = TTLCache(
+    maxsize=get_jwt_config().get("cache_size", 4096),
+    ttl=get_jwt_config().get("cache_ttl_seconds", 60),
+)
+
+
+# Effective scopes of each user from all their roles, keyed by
+# (user id, scope version of the token): (user id, frozenset of scopes).
+scope_cache = TTLCache(
+    maxsize=get_jwt_config().get("cache_size", 4096),
+    ttl=get_jwt_config().get("cache_ttl_seconds", 60),
+)
+
 
 def create_access_token(data: dict):
+    jwt_config = get_jwt_config()
     to_encode = data.copy()
-    expires_delta = timedelta(minutes=get_jwt_config()['ttl_minutes'])
+    expires_delta = timedelta(minutes=jwt_config['ttl_minutes'])
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, get_jwt_config()['secret'], algorithm=get_jwt_config()['algorithm'])
+    encoded_jwt = jwt.encode(to_encode, jwt_config['secret'], algorithm=jwt_config['algorithm'])
     return encoded_jwt
 
 
 def decode_access_token(token: str):
-    payload = jwt.decode(token, get_jwt_config()['secret'], algorithms=[get_jwt_config()['algorithm']])
+    jwt_config = get_jwt_config()
+    payload = jwt.decode(token, jwt_config['secret'], algorithms=[jwt_config['algorithm']])
     return payload
 
 
-def authenticate(
+def token_digest(token: str):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def cache_token(token: str, token_data: schemas.AuthTokenData, user: tables.User, expire: int):
+    values = {column.key: getattr(user, column.key) for column in tables.User.__table__.columns}
+    token_cache.set(token_digest(token), (token_data, values), ttl=expire - time.time())
+
+
+def get_cached_token(token: str):
+    cached = token_cache.get(token_digest(token))
+    if cached is None:
+        return None
+    token_data, values = cached
+    # Hand out a fresh transient row so callers never share or expire the cached one.
+    return token_data, tables.User(**values)
+
+
+def invalidate_user(user_id: int):
+    token_cache.delete_where(lambda cached: cached[0].user_id == user_id)
+    scope_cache.delete_where(lambda cached: cached[0] == user_id)
+
+
+# Role scopes changed, every user holding the role may be affected.
+def invalidate_scopes():
+    scope_cache.clear()
+
+
+# Tokens carry this short digest instead of the scope list.
+def get_scope_version(scopes) -> str:
+    return hashlib.sha256("\n".join(sorted(scopes)).encode("utf-8")).hexdigest()[:8]
+
+
+async def load_scopes(db, user_id: int):
+    stmt = (
+        select(tables.Role.scopes)
+        .join(tables.UserHasRole, tables.Role.id == tables.UserHasRole.role_id)
+        .where(tables.UserHasRole.deleted_at.is_(None))
+        .where(tables.Role.deleted_at.is_(None))
+        .where(tables.UserHasRole.user_id.__eq__(user_id))
+    )
+    scopes = frozenset(scope for role_scopes in (await db.scalars(stmt)).all() for scope in role_scopes)
+    scope_cache.set((user_id, get_scope_version(scopes)), (user_id, scopes))
+    return scopes
+
+
+# A token issued after a role change on another worker has a new version and
+# loads the scopes once. Tokens issued before keep their version, whose entry
+# then holds the scopes loaded since, so they do not reload on every request.
+async def get_scopes(db, user_id: int, version: str):
+    cached = scope_cache.get((user_id, version))
+    if cached is not None:
+        return cached[1]
+    scopes = await load_scopes(db, user_id)
+    scope_cache.set((user_id, version), (user_id, scopes))
+    return scopes
+
+
+async def create_user_token(db, user_id: int):
+    scopes = await load_scopes(db, user_id)
+    data = {"user_id": user_id, "sv": get_scope_version(scopes)}
+    # Only for consumers reading scopes from the token, the API itself uses the version.
+    if get_jwt_config().get("embed_scopes", False):
+        data["scopes"] = sorted(scopes)
+    return create_access_token(data=data)
+
+
+async def authenticate(
         db,
         username: str,
         password: str,
@@ -37,21 +123,21 @@ def authenticate(
         .where(tables.User.deleted_at.is_(None))
         .where(tables.User.username.__eq__(username))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     if not user:
         return False
-    if not crypt.verify_hashed_password(password, user.hashed_password):
+    if not await crypt.verify_hashed_password_async(password, user.hashed_password):
         return False
     return user
 
 
-def create_super_admin(db, form_data: schemas.UserCreateForm):
+async def create_super_admin(db, form_data: schemas.UserCreateForm):
     try:
         stmt = (
             select(tables.Role)
             .where(tables.Role.name.__eq__("superuser"))
         )
-        role = db.scalars(stmt).one_or_none()
+        role = (await db.scalars(stmt)).one_or_none()
         if not role:
             print("Creating a superuser role.")
             role_create = schemas.RoleCreateForm(
@@ -60,7 +146,7 @@ def create_super_admin(db, form_data: schemas.UserCreateForm):
             )
             role = tables.Role(**role_create.model_dump())
             db.add(role)
-            db.commit()
+            await db.commit()
             print("Superuser role created successfully.")
         else:
             print("Superuser role already exists.")
@@ -69,17 +155,17 @@ def create_super_admin(db, form_data: schemas.UserCreateForm):
             select(tables.User)
             .where(tables.User.username.__eq__(form_data.username))
         )
-        user = db.scalars(stmt).one_or_none()
+        user = (await db.scalars(stmt)).one_or_none()
         if not user:
-            form_data.hashed_password = crypt.hash_password(form_data.password)
+            form_data.hashed_password = await crypt.hash_password_async(form_data.password)
             del form_data.password
             form_data.creator_id = form_data.creator_id
             user = tables.User(**form_data.model_dump())
             db.add(user)
-            db.commit()
+            await db.commit()
         else:
             print("User already exists.")
-        if role in get_roles(db, user):
+        if role in await get_roles(db, user):
             print("User already has superuser role.")
         else:
             form_data = schemas.UserHasRoleCreateForm(
@@ -88,7 +174,7 @@ def create_super_admin(db, form_data: schemas.UserCreateForm):
             )
             user_has_role = tables.UserHasRole(**form_data.model_dump())
             db.add(user_has_role)
-            db.commit()
+            await db.commit()
             print("Superuser role added to user.")
 
         print("Super admin created successfully.")
@@ -1,13 +1,15 @@
 from sqlalchemy import select
 
 from app.database import tables
+from app.services.device import device_details
 
 
-def get_devices(db, brand):
+async def get_devices(db, brand):
     stmt = (
         select(tables.Device)
+        .options(*device_details)
         .where(tables.Device.deleted_at.is_(None))
         .where(tables.Device.brand_id.__eq__(brand.id))
     )
-    devices = db.scalars(stmt).all()
+    devices = (await db.scalars(stmt)).all()
     return devices
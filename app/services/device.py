@@ -1,43 +1,52 @@
-from app.utils import common
 from sqlalchemy import select
+from sqlalchemy.orm import aliased, joinedload
 
 from app.database import tables, schemas
 
+# Brand, category, current holder and creator, joined into the device query.
+device_details = (
+    joinedload(tables.Device.brand),
+    joinedload(tables.Device.category),
+    joinedload(tables.Device.users),
+    joinedload(tables.Device.creator),
+)
+# Their versions are part of the device ETag.
+device_detail_names = ("brand", "category", "users", "creator")
 
-def get_user(db, device):
+
+async def get_device_details(db, device_id):
     stmt = (
-        select(tables.User, tables.UserHasDevice)
-        .join(tables.UserHasDevice, tables.User.id == tables.UserHasDevice.user_id)
-        .join(tables.Device, tables.Device.id == tables.UserHasDevice.device_id)
-        .where(tables.UserHasDevice.deleted_at.is_(None))
-        .where(tables.User.deleted_at.is_(None))
-        .where(tables.UserHasDevice.device_id.__eq__(device.id))
+        select(tables.Device)
+        .options(*device_details)
+        .where(tables.Device.id.__eq__(device_id))
     )
-    user = db.scalars(stmt).one_or_none()
-    return user
+    device = (await db.scalars(stmt)).one_or_none()
+    return device
 
 
 # Get historical users.
-def get_historical_users(db, device):
+async def get_historical_users(db, device):
+    creator_table = aliased(tables.User)
     stmt = (
-        select(tables.UserHasDevice, tables.User, tables.Device)
+        select(tables.UserHasDevice, tables.User, tables.Device, creator_table)
         .join(tables.User, tables.User.id == tables.UserHasDevice.user_id)
         .join(tables.Device, tables.Device.id == tables.UserHasDevice.device_id)
+        .outerjoin(creator_table, creator_table.id == tables.UserHasDevice.creator_id)
         .where(tables.UserHasDevice.deleted_at.isnot(None))
         .where(tables.UserHasDevice.device_id.__eq__(device.id))
     )
     historical_users = []
-    user_has_devices = db.execute(stmt).all()
+    user_has_devices = (await db.execute(stmt)).all()
     for user_has_device in user_has_devices:
         user_has_device_table = user_has_device[0]
         user_table = user_has_device[1]
-        creator = common.get_creator(db, user_has_device_table.creator_id)
-        creator = schemas.Creator(**creator.__dict__)
+        creator = user_has_device[3]
+        creator = schemas.Creator(**creator.__dict__) if creator else None
         historical_user = schemas.DeviceHistoricalUser(
             id=user_has_device_table.id,
             user_id=user_has_device_table.user_id,
             user_name=user_table.name,
-            user_username=user_table.scopes,
+            user_username=user_table.username,
             user_email=user_table.email,
             creator=creator,
             created_at=user_has_device_table.created_at,
@@ -46,22 +55,3 @@ def get_historical_users(db, device):
         historical_users.append(historical_user)
     return historical_users
 
-
-def get_brand(db, device):
-    stmt = (
-        select(tables.Brand)
-        .where(tables.Brand.deleted_at.is_(None))
-        .where(tables.Brand.id.__eq__(device.brand_id))
-    )
-    brand = db.scalars(stmt).one_or_none()
-    return brand
-
-
-def get_category(db, device):
-    stmt = (
-        select(tables.DeviceCategory)
-        .where(tables.DeviceCategory.deleted_at.is_(None))
-        .where(tables.DeviceCategory.id.__eq__(device.category_id))
-    )
-    category = db.scalars(stmt).one_or_none()
-    return category
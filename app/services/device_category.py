@@ -1,14 +1,16 @@
 from sqlalchemy import select
 
 from app.database import tables
+from app.services.device import device_details
 
 
-def get_devices(db, category):
+async def get_devices(db, category):
     stmt = (
         select(tables.Device)
+        .options(*device_details)
         .where(tables.Device.deleted_at.is_(None))
         .where(tables.Device.category_id.__eq__(category.id))
 
     )
-    devices = db.scalars(stmt).all()
+    devices = (await db.scalars(stmt)).all()
     return devices
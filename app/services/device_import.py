@@ -0,0 +1,170 @@
+import codecs
+import csv
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select, text
+
+from app.database import schemas, tables
+from app.services.asset_number import remember_asset_number
+from app.services.lookup import brand_cache, device_category_cache
+from app.utils import common
+
+# Rows validated, inserted and committed together.
+CHUNK_SIZE = 1000
+# Errors listed in the result, the rest are only counted.
+MAX_ERRORS = 1000
+
+CONTENT_TYPES = ("application/x-ndjson", "text/csv")
+
+
+# Decode a byte stream into lines, whatever the chunk boundaries are.
+async def read_lines(stream):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+# Yield (line number, row) of NDJSON or CSV lines, rows are dicts or an error message.
+# CSV takes a header line and one record per line.
+async def read_rows(lines, content_type: str):
+    header = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        if content_type == "text/csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [value.strip() for value in values]
+                continue
+            if len(values) != len(header):
+                yield line_number, f"Expected {len(header)} values, got {len(values)}."
+                continue
+            yield line_number, {key: value or None for key, value in zip(header, values)}
+        else:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_number, "Invalid JSON."
+                continue
+            if not isinstance(row, dict):
+                yield line_number, "Expected a JSON object."
+                continue
+            yield line_number, row
+
+
+class DeviceImport:
+    def __init__(self, db, creator_id: int):
+        self.db = db
+        self.creator_id = creator_id
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        # Asset numbers met earlier in this import.
+        self.asset_numbers = set()
+
+    def fail(self, line_number: int, detail: str, asset_number: str = None):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(schemas.DeviceImportError(line=line_number, asset_number=asset_number, detail=detail))
+
+    # Ids of the inserted devices, taken from the insert itself: looking them up by
+    # asset number could pick up a device another request created meanwhile.
+    async def insert_devices(self, devices):
+        dialect = self.db.bind.dialect
+        if dialect.insert_executemany_returning_sort_by_parameter_order:
+            stmt = insert(tables.Device).returning(tables.Device.id, sort_by_parameter_order=True)
+            device_ids = (await self.db.scalars(stmt, devices)).all()
+        else:
+            # MySQL has no RETURNING. One multi-row INSERT gets consecutive ids,
+            # starting at the id of its first row.
+            result = await self.db.execute(insert(tables.Device).values(devices))
+            step = (await self.db.execute(text("SELECT @@auto_increment_increment"))).scalar()
+            device_ids = [result.lastrowid + i * step for i in range(len(devices))]
+        return [(device_id, device["asset_number"]) for device_id, device in zip(device_ids, devices)]
+
+    async def insert_chunk(self, chunk):
+        brands = await brand_cache.load(self.db)
+        categories = await device_category_cache.load(self.db)
+        # Ids created by another worker since the last check are looked up again,
+        # once per chunk, as LookupCache.get_values does.
+        if any(form.brand_id not in brands for _, form in chunk):
+            brands = await brand_cache.load(self.db, check=True)
+        if any(form.category_id not in categories for _, form in chunk):
+            categories = await device_category_cache.load(self.db, check=True)
+        stmt = (
+            select(tables.AssetNumber.number)
+            .where(tables.AssetNumber.deleted_at.is_(None))
+            .where(tables.AssetNumber.number.in_({form.asset_number for _, form in chunk}))
+        )
+        taken = set((await self.db.scalars(stmt)).all())
+
+        devices = []
+        created_at = common.now()
+        for line_number, form in chunk:
+            if form.brand_id not in brands:
+                self.fail(line_number, "Brand not exists.", form.asset_number)
+            elif form.category_id not in categories:
+                self.fail(line_number, "Device category not exists.", form.asset_number)
+            elif form.asset_number in taken or form.asset_number in self.asset_numbers:
+                self.fail(line_number, "Asset number already exists.", form.asset_number)
+            else:
+                self.asset_numbers.add(form.asset_number)
+                form.creator_id = self.creator_id
+                form.created_at = created_at
+                devices.append(form.model_dump())
+        if not devices:
+            return
+
+        asset_numbers = [
+            {
+                "number": number,
+                "table_name": "Device",
+                "table_id": device_id,
+                "creator_id": self.creator_id,
+                "created_at": created_at,
+            }
+            for device_id, number in await self.insert_devices(devices)
+        ]
+        await self.db.execute(insert(tables.AssetNumber), asset_numbers)
+        await self.db.commit()
+        for asset_number in asset_numbers:
+            remember_asset_number(asset_number["number"], "Device", asset_number["table_id"])
+        self.created += len(devices)
+
+    async def run(self, rows):
+        chunk = []
+        async for line_number, row in rows:
+            if isinstance(row, str):
+                self.fail(line_number, row)
+                continue
+            try:
+                form = schemas.DeviceCreateForm(**row)
+            except ValidationError as e:
+                error = e.errors()[0]
+                location = ".".join(str(item) for item in error["loc"])
+                asset_number = row.get("asset_number")
+                asset_number = str(asset_number) if asset_number is not None else None
+                self.fail(line_number, f"{location}: {error['msg']}", asset_number)
+                continue
+            chunk.append((line_number, form))
+            if len(chunk) >= CHUNK_SIZE:
+                await self.insert_chunk(chunk)
+                chunk = []
+        if chunk:
+            await self.insert_chunk(chunk)
+        errors = sorted(self.errors, key=lambda error: error.line)
+        return schemas.DeviceImportResult(created=self.created, failed=self.failed, errors=errors)
+
+
+async def import_devices(db, lines, content_type: str, creator_id: int):
+    return await DeviceImport(db, creator_id).run(read_rows(lines, content_type))
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.database.database import AsyncSessionLocal
+
+# Rows fetched from the server-side cursor and written out together.
+CHUNK_SIZE = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Exported columns of each table, secrets like password hashes stay out.
+device_columns = (
+    "id", "hostname", "asset_number", "ipv4_address", "ipv6_address", "mac_address",
+    "description", "brand_id", "category_id", "creator_id", "created_at",
+)
+user_columns = ("id", "username", "email", "name", "is_active", "creator_id", "created_at")
+ticket_columns = (
+    "id", "title", "description", "asset_number", "status", "assignee_id",
+    "priority", "expired_at", "creator_id", "created_at",
+)
+
+
+def select_columns(table, names):
+    return (
+        select(*[getattr(table, name) for name in names])
+        .where(table.deleted_at.is_(None))
+        .order_by(table.id)
+    )
+
+
+def to_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def write_csv(rows, names=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if names:
+        writer.writerow(names)
+    writer.writerows([to_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def write_ndjson(rows, names):
+    return "".join(
+        json.dumps(dict(zip(names, row)), default=to_value, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+# Stream the rows of a select as CSV or NDJSON, one chunk per CHUNK_SIZE rows.
+# Rows come from a server-side cursor, so memory does not grow with the table.
+# The body is sent after the route returns, so the export opens its own session.
+async def export_rows(stmt, names, export_format: str):
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=CHUNK_SIZE))
+        try:
+            if export_format == "csv":
+                yield write_csv([], names).encode("utf-8")
+            async for rows in result.partitions():
+                if export_format == "csv":
+                    yield write_csv(rows).encode("utf-8")
+                else:
+                    yield write_ndjson(rows, names).encode("utf-8")
+        finally:
+            await result.close()
+
+
+def export_response(stmt, names, export_format: str, filename: str):
+    if export_format not in MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format, use one of {', '.join(MEDIA_TYPES)}.",
+        )
+    return StreamingResponse(
+        export_rows(stmt, names, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,134 @@
+import time
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from app.database import tables
+from app.utils.config import get_config
+
+
+# Inserts the version row of a table or increments it in one statement, so two
+# workers bumping a table without a row never insert it twice.
+def get_bump_statement(dialect_name: str, name: str):
+    version = tables.LookupVersion.version + 1
+    if dialect_name == "mysql":
+        return mysql.insert(tables.LookupVersion).values(name=name, version=1).on_duplicate_key_update(version=version)
+    if dialect_name in ("sqlite", "postgresql"):
+        dialect = sqlite if dialect_name == "sqlite" else postgresql
+        return (
+            dialect.insert(tables.LookupVersion)
+            .values(name=name, version=1)
+            .on_conflict_do_update(index_elements=[tables.LookupVersion.name], set_={"version": version})
+        )
+    return None
+
+
+# Keeps all live rows of a small, rarely changing table in memory.
+# Writes in this worker drop the copy right away. Writes in other workers bump
+# the table's row in lookup_versions, which is checked every check_interval seconds
+# and whenever an id is not found.
+class LookupCache:
+    def __init__(self, table, check_interval: float = 5):
+        self.table = table
+        self.name = table.__tablename__
+        self.check_interval = check_interval
+        self.rows = None
+        self.version = None
+        self.checked_at = 0
+        # Loads started before an invalidation are not kept.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    async def load(self, db, check: bool = False):
+        if self.rows is not None and not check and time.monotonic() < self.checked_at + self.check_interval:
+            self.hits += 1
+            return self.rows
+        generation = self.generation
+        stmt = (
+            select(tables.LookupVersion.version)
+            .where(tables.LookupVersion.name.__eq__(self.name))
+        )
+        version = (await db.scalar(stmt)) or 0
+        if self.rows is not None and version == self.version and generation == self.generation:
+            self.checked_at = time.monotonic()
+            self.hits += 1
+            return self.rows
+        self.misses += 1
+        stmt = (
+            select(*self.table.__table__.columns)
+            .where(self.table.deleted_at.is_(None))
+        )
+        rows = {row["id"]: dict(row) for row in (await db.execute(stmt)).mappings()}
+        self.loads += 1
+        if generation == self.generation:
+            self.rows = rows
+            self.version = version
+            self.checked_at = time.monotonic()
+        return rows
+
+    async def get_values(self, db, item_id: int):
+        rows = await self.load(db)
+        if item_id not in rows:
+            # It may have been created by another worker since the last check.
+            rows = await self.load(db, check=True)
+        return rows.get(item_id)
+
+    # A fresh transient row, so callers never share the cached one.
+    async def get(self, db, item_id: int):
+        values = await self.get_values(db, item_id)
+        return self.table(**values) if values else None
+
+    async def exists(self, db, item_id: int):
+        return await self.get_values(db, item_id) is not None
+
+    # Call before committing a write to the table, and invalidate() after.
+    async def bump(self, db):
+        stmt = get_bump_statement(db.bind.dialect.name, self.name)
+        if stmt is not None:
+            await db.execute(stmt)
+        else:
+            await self.update_or_insert(db)
+        self.invalidate()
+
+    # For databases without an upsert: when another worker inserts the row first,
+    # the insert fails and the update is run again.
+    async def update_or_insert(self, db):
+        stmt = (
+            update(tables.LookupVersion)
+            .where(tables.LookupVersion.name.__eq__(self.name))
+            .values(version=tables.LookupVersion.version + 1)
+        )
+        if (await db.execute(stmt)).rowcount:
+            return
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(tables.LookupVersion).values(name=self.name, version=1))
+        except IntegrityError:
+            await db.execute(stmt)
+
+    def invalidate(self):
+        self.rows = None
+        self.version = None
+        self.generation += 1
+
+    def stats(self):
+        return {
+            "size": len(self.rows) if self.rows is not None else 0,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+        }
+
+
+brand_cache = LookupCache(
+    tables.Brand,
+    check_interval=get_config().get("lookup_cache", {}).get("check_interval_seconds", 5),
+)
+device_category_cache = LookupCache(
+    tables.DeviceCategory,
+    check_interval=get_config().get("lookup_cache", {}).get("check_interval_seconds", 5),
+)
@@ -1,10 +1,10 @@
-from app.utils import common
 from sqlalchemy import select
+from sqlalchemy.orm import aliased
 
 from app.database import tables, schemas
 
 
-def get_users(db, role):
+async def get_users(db, role):
     stmt = (
         select(tables.User, tables.UserHasRole)
         .join(tables.UserHasRole, tables.User.id == tables.UserHasRole.user_id)
@@ -13,31 +13,33 @@ def get_users(db, role):
         .where(tables.User.deleted_at.is_(None))
         .where(tables.UserHasRole.role_id.__eq__(role.id))
     )
-    users = db.scalars(stmt).all()
+    users = (await db.scalars(stmt)).all()
     return users
 
 
 # Get historical users.
-def get_historical_users(db, role):
+async def get_historical_users(db, role):
+    creator_table = aliased(tables.User)
     stmt = (
-        select(tables.UserHasRole, tables.User, tables.Role)
+        select(tables.UserHasRole, tables.User, tables.Role, creator_table)
         .join(tables.User, tables.User.id == tables.UserHasRole.user_id)
         .join(tables.Role, tables.Role.id == tables.UserHasRole.role_id)
+        .outerjoin(creator_table, creator_table.id == tables.UserHasRole.creator_id)
         .where(tables.UserHasRole.deleted_at.isnot(None))
         .where(tables.UserHasRole.role_id.__eq__(role.id))
     )
     historical_users = []
-    user_has_roles = db.execute(stmt).all()
+    user_has_roles = (await db.execute(stmt)).all()
     for user_has_role in user_has_roles:
         user_has_role_table = user_has_role[0]
         user_table = user_has_role[1]
-        creator = common.get_creator(db, user_has_role_table.creator_id)
-        creator = schemas.Creator(**creator.__dict__)
+        creator = user_has_role[3]
+        creator = schemas.Creator(**creator.__dict__) if creator else None
         historical_user = schemas.RoleHistoricalUser(
             id=user_has_role_table.id,
             user_id=user_has_role_table.user_id,
             user_name=user_table.name,
-            user_username=user_table.scopes,
+            user_username=user_table.username,
             user_email=user_table.email,
             creator=creator,
             created_at=user_has_role_table.created_at,
@@ -0,0 +1,164 @@
+import re
+from collections import Counter, defaultdict
+
+from sqlalchemy import delete, func, insert, select, union_all
+from sqlalchemy.dialects.mysql import match
+
+from app.database import tables
+from app.services.ticket import get_comments
+
+# Hiragana, katakana, CJK ideographs and hangul have no spaces between words.
+CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+TOKEN_PATTERN = re.compile(f"[{CJK}]+|[^\\W_{CJK}]+")
+TERM_LENGTH = 64
+TITLE_WEIGHT = 3
+
+
+# Words are split on anything but letters and digits, CJK runs into overlapping bigrams.
+def tokenize(text):
+    terms = []
+    for token in TOKEN_PATTERN.findall((text or "").lower()):
+        if len(token) > 1 and re.match(f"[{CJK}]", token):
+            terms += [token[i:i + 2] for i in range(len(token) - 1)]
+        else:
+            terms.append(token[:TERM_LENGTH])
+    return terms
+
+
+# MySQL keeps its FULLTEXT indexes up to date by itself.
+def use_fulltext(db):
+    return db.bind.dialect.name == "mysql"
+
+
+def get_term_weights(ticket, comments):
+    weights = Counter()
+    for term in tokenize(ticket.title):
+        weights[term] += TITLE_WEIGHT
+    for text in [ticket.description] + [comment.comment for comment in comments]:
+        for term in tokenize(text):
+            weights[term] += 1
+    return weights
+
+
+def get_term_rows(ticket, comments):
+    weights = get_term_weights(ticket, comments)
+    return [{"term": term, "ticket_id": ticket.id, "weight": weight} for term, weight in weights.items()]
+
+
+# Rebuild the terms of one ticket, call it after its text or comments change.
+async def index_ticket(db, ticket):
+    if use_fulltext(db):
+        return
+    await unindex_ticket(db, ticket)
+    rows = get_term_rows(ticket, await get_comments(db, ticket))
+    if rows:
+        await db.execute(insert(tables.TicketSearchTerm), rows)
+
+
+async def unindex_ticket(db, ticket):
+    if use_fulltext(db):
+        return
+    stmt = (
+        delete(tables.TicketSearchTerm)
+        .where(tables.TicketSearchTerm.ticket_id.__eq__(ticket.id))
+    )
+    await db.execute(stmt)
+
+
+# Index every ticket again, in batches, for databases that existed before search.
+async def rebuild_ticket_index(db, batch_size: int = 500):
+    if use_fulltext(db):
+        return 0
+    await db.execute(delete(tables.TicketSearchTerm))
+    count = 0
+    last_id = 0
+    while True:
+        stmt = (
+            select(tables.Ticket)
+            .where(tables.Ticket.deleted_at.is_(None))
+            .where(tables.Ticket.id > last_id)
+            .order_by(tables.Ticket.id)
+            .limit(batch_size)
+        )
+        tickets = (await db.scalars(stmt)).all()
+        if not tickets:
+            break
+        stmt = (
+            select(tables.TicketComment)
+            .where(tables.TicketComment.deleted_at.is_(None))
+            .where(tables.TicketComment.ticket_id.in_([ticket.id for ticket in tickets]))
+        )
+        comments = defaultdict(list)
+        for comment in (await db.scalars(stmt)).all():
+            comments[comment.ticket_id].append(comment)
+        rows = []
+        for ticket in tickets:
+            rows += get_term_rows(ticket, comments[ticket.id])
+        if rows:
+            await db.execute(insert(tables.TicketSearchTerm), rows)
+        await db.commit()
+        db.expunge_all()
+        count += len(tickets)
+        last_id = tickets[-1].id
+    await db.commit()
+    return count
+
+
+# Tickets matching the keyword in their title, description or comments, best match first.
+async def search_tickets(db, keyword: str, skip: int = 0, limit: int = 20):
+    if use_fulltext(db):
+        ticket_match = match(tables.Ticket.title, tables.Ticket.description, against=keyword)
+        comment_match = match(tables.TicketComment.comment, against=keyword)
+        matches = union_all(
+            select(tables.Ticket.id.label("ticket_id"), ticket_match.label("score"))
+            .where(ticket_match),
+            select(tables.TicketComment.ticket_id, comment_match.label("score"))
+            .where(tables.TicketComment.deleted_at.is_(None))
+            .where(comment_match),
+        ).subquery()
+        ranked = (
+            select(matches.c.ticket_id, func.sum(matches.c.score).label("score"))
+            .group_by(matches.c.ticket_id)
+            .subquery()
+        )
+        ranking = [ranked.c.score.desc()]
+    else:
+        terms = set(tokenize(keyword))
+        if not terms:
+            return []
+        # Tickets containing more of the terms come first, then the heavier ones.
+        ranked = (
+            select(
+                tables.TicketSearchTerm.ticket_id,
+                func.count().label("matched"),
+                func.sum(tables.TicketSearchTerm.weight).label("score"),
+            )
+            .where(tables.TicketSearchTerm.term.in_(terms))
+            .group_by(tables.TicketSearchTerm.ticket_id)
+            .subquery()
+        )
+        ranking = [ranked.c.matched.desc(), ranked.c.score.desc()]
+
+    stmt = (
+        select(tables.Ticket)
+        .join(ranked, ranked.c.ticket_id == tables.Ticket.id)
+        .where(tables.Ticket.deleted_at.is_(None))
+        .order_by(*ranking, tables.Ticket.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    tickets = (await db.scalars(stmt)).all()
+    return tickets
+
+
+# Substring match on the title only, what /search/tickets/title/{keyword} has
+# always done. It scans the table, new callers should use search_tickets().
+async def search_tickets_by_title(db, keyword: str):
+    stmt = (
+        select(tables.Ticket)
+        .where(tables.Ticket.deleted_at.is_(None))
+        .where(tables.Ticket.title.ilike(f"%{keyword}%"))
+        .order_by(tables.Ticket.id)
+    )
+    tickets = (await db.scalars(stmt)).all()
+    return tickets
@@ -1,29 +1,30 @@
 from sqlalchemy import select
 
 from app.database import tables, schemas
+from app.utils import common
 
 
-def get_comments(db, ticket):
+async def get_comments(db, ticket):
     stmt = (
         select(tables.TicketComment)
         .where(tables.TicketComment.deleted_at.is_(None))
         .where(tables.TicketComment.ticket_id.__eq__(ticket.id))
     )
-    comments = db.scalars(stmt).all()
+    comments = (await db.scalars(stmt)).all()
     return comments
 
 
-def get_minutes(db, ticket):
+async def get_minutes(db, ticket):
     stmt = (
         select(tables.TicketMinute)
         .where(tables.TicketMinute.deleted_at.is_(None))
         .where(tables.TicketMinute.ticket_id.__eq__(ticket.id))
     )
-    minutes = db.scalars(stmt).all()
+    minutes = (await db.scalars(stmt)).all()
     return minutes
 
 
-def check_work(db, ticket, user):
+async def check_work(db, ticket, user):
     stmt = (
         select(tables.TicketMinute)
         .where(tables.TicketMinute.deleted_at.is_(None))
@@ -31,11 +32,11 @@ def check_work(db, ticket, user):
         .where(tables.TicketMinute.creator_id.__eq__(user.id))
         .where(tables.TicketMinute.flag.__eq__(0))
     )
-    minute = db.scalars(stmt).one_or_none()
+    minute = (await db.scalars(stmt)).one_or_none()
     return minute
 
 
-def start_work(db, ticket, user, message):
+async def start_work(db, ticket, user, message):
     form_data = schemas.TicketMinuteCreateForm(
         ticket_id=ticket.id,
         flag=0,
@@ -44,11 +45,12 @@ def start_work(db, ticket, user, message):
     )
     minute = tables.TicketMinute(**form_data.model_dump())
     db.add(minute)
-    db.commit()
+    await common.touch(db, tables.Ticket, ticket.id)
+    await db.commit()
     return minute
 
 
-def end_work(db, ticket, user, message):
+async def end_work(db, ticket, user, message):
     form_data = schemas.TicketMinuteCreateForm(
         ticket_id=ticket.id,
         flag=1,
@@ -57,5 +59,6 @@ def end_work(db, ticket, user, message):
     )
     minute = tables.TicketMinute(**form_data.model_dump())
     db.add(minute)
-    db.commit()
+    await common.touch(db, tables.Ticket, ticket.id)
+    await db.commit()
     return minute
@@ -1,19 +1,20 @@
 from sqlalchemy import select
 
 from app.database import tables, schemas
+from app.utils import common
 
 
-def get_minutes(db, todo):
+async def get_minutes(db, todo):
     stmt = (
         select(tables.TodoMinute)
         .where(tables.TodoMinute.deleted_at.is_(None))
         .where(tables.TodoMinute.todo_id.__eq__(todo.id))
     )
-    minutes = db.scalars(stmt).all()
+    minutes = (await db.scalars(stmt)).all()
     return minutes
 
 
-def check_work(db, todo):
+async def check_work(db, todo):
     stmt = (
         select(tables.TodoMinute)
         .where(tables.TodoMinute.deleted_at.is_(None))
@@ -21,11 +22,11 @@ def check_work(db, todo):
         .where(tables.TodoMinute.todo_id.__eq__(todo.id))
         .where(tables.TodoMinute.flag.__eq__(0))
     )
-    minute = db.scalars(stmt).one_or_none()
+    minute = (await db.scalars(stmt)).one_or_none()
     return minute
 
 
-def start_work(db, todo, user):
+async def start_work(db, todo, user):
     form_data = schemas.TodoMinuteCreateForm(
         todo_id=todo.id,
         flag=0,
@@ -33,11 +34,12 @@ def start_work(db, todo, user):
     )
     minute = tables.TodoMinute(**form_data.model_dump())
     db.add(minute)
-    db.commit()
+    await common.touch(db, tables.Todo, todo.id)
+    await db.commit()
     return minute
 
 
-def end_work(db, todo, user):
+async def end_work(db, todo, user):
     form_data = schemas.TodoMinuteCreateForm(
         todo_id=todo.id,
         flag=1,
@@ -45,7 +47,8 @@ def end_work(db, todo, user):
     )
     minute = tables.TodoMinute(**form_data.model_dump())
     db.add(minute)
-    db.commit()
+    await common.touch(db, tables.Todo, todo.id)
+    await db.commit()
 
     stmt = (
         select(tables.TodoMinute)
@@ -54,8 +57,8 @@ def end_work(db, todo, user):
         .where(tables.TodoMinute.flag.__eq__(0))
         .where(tables.TodoMinute.is_finished.__eq__(0))
     )
-    minutes = db.scalars(stmt).all()
+    minutes = (await db.scalars(stmt)).all()
     for minute in minutes:
         minute.is_finished = 1
-        db.commit()
+        await db.commit()
     return minute
@@ -1,39 +1,41 @@
-from app.utils import common
-from sqlalchemy import select, alias
-from sqlalchemy.orm import aliased
+from sqlalchemy import select
+from sqlalchemy.orm import aliased, joinedload
 
 from app.database import tables, schemas
 
 
-def get_devices(db, user):
+async def get_devices(db, user):
     stmt = (
         select(tables.Device, tables.UserHasDevice)
+        .options(joinedload(tables.Device.brand), joinedload(tables.Device.category))
         .join(tables.UserHasDevice, tables.Device.id == tables.UserHasDevice.device_id)
         .join(tables.User, tables.User.id == tables.UserHasDevice.user_id)
         .where(tables.UserHasDevice.deleted_at.is_(None))
         .where(tables.Device.deleted_at.is_(None))
         .where(tables.UserHasDevice.user_id.__eq__(user.id))
     )
-    devices = db.scalars(stmt).all()
+    devices = (await db.scalars(stmt)).all()
     return devices
 
 
 # Get historical devices.
-def get_historical_devices(db, user):
+async def get_historical_devices(db, user):
+    creator_table = aliased(tables.User)
     stmt = (
-        select(tables.UserHasDevice, tables.Device, tables.User)
+        select(tables.UserHasDevice, tables.Device, tables.User, creator_table)
         .join(tables.Device, tables.Device.id == tables.UserHasDevice.device_id)
         .join(tables.User, tables.User.id == tables.UserHasDevice.user_id)
+        .outerjoin(creator_table, creator_table.id == tables.UserHasDevice.creator_id)
         .where(tables.UserHasDevice.deleted_at.isnot(None))
         .where(tables.UserHasDevice.user_id.__eq__(user.id))
     )
     historical_devices = []
-    user_has_devices = db.execute(stmt).all()
+    user_has_devices = (await db.execute(stmt)).all()
     for user_has_device in user_has_devices:
         user_has_device_table = user_has_device[0]
         device_table = user_has_device[1]
-        creator = common.get_creator(db, user_has_device_table.creator_id)
-        creator = schemas.Creator(**creator.__dict__)
+        creator = user_has_device[3]
+        creator = schemas.Creator(**creator.__dict__) if creator else None
         historical_device = schemas.UserHistoricalDevice(
             id=user_has_device_table.id,
             device_id=user_has_device_table.device_id,
@@ -48,7 +50,7 @@ def get_historical_devices(db, user):
     return historical_devices
 
 
-def get_roles(db, user):
+async def get_roles(db, user):
     stmt = (
         select(tables.Role, tables.UserHasRole)
         .join(tables.UserHasRole, tables.Role.id == tables.UserHasRole.role_id)
@@ -58,26 +60,28 @@ def get_roles(db, user):
         .where(tables.UserHasRole.user_id.__eq__(user.id))
     )
 
-    roles = db.scalars(stmt).all()
+    roles = (await db.scalars(stmt)).all()
     return roles
 
 
 # Get historical roles.
-def get_historical_roles(db, user):
+async def get_historical_roles(db, user):
+    creator_table = aliased(tables.User)
     stmt = (
-        select(tables.UserHasRole, tables.Role, tables.User)
+        select(tables.UserHasRole, tables.Role, tables.User, creator_table)
         .join(tables.Role, tables.Role.id == tables.UserHasRole.role_id)
         .join(tables.User, tables.User.id == tables.UserHasRole.user_id)
+        .outerjoin(creator_table, creator_table.id == tables.UserHasRole.creator_id)
         .where(tables.UserHasRole.deleted_at.isnot(None))
         .where(tables.UserHasRole.user_id.__eq__(user.id))
     )
     historical_roles = []
-    user_has_roles = db.execute(stmt).all()
+    user_has_roles = (await db.execute(stmt)).all()
     for user_has_role in user_has_roles:
         user_has_role_table = user_has_role[0]
         role_table = user_has_role[1]
-        creator = common.get_creator(db, user_has_role_table.creator_id)
-        creator = schemas.Creator(**creator.__dict__)
+        creator = user_has_role[3]
+        creator = schemas.Creator(**creator.__dict__) if creator else None
         historical_role = schemas.UserHistoricalRole(
             id=user_has_role_table.id,
             role_id=user_has_role_table.role_id,
@@ -1,31 +1,72 @@
 from datetime import datetime
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from app.database import tables, schemas
 
 
+# Whole seconds, as the string this returned before, so stored times do not change.
 def now():
-    now_string = datetime.now()
-    return now_string.strftime("%Y-%m-%d %H:%M:%S")
+    return datetime.now().replace(microsecond=0)
 
 
-def get_creator(db, creator_id):
+async def get_creator(db, creator_id):
     stmt = (
         select(tables.User)
         .where(tables.User.id.__eq__(creator_id))
     )
-    user = db.scalars(stmt).one_or_none()
+    user = (await db.scalars(stmt)).one_or_none()
     return user
 
 
-def check_asset_number(db, asset_number):
+
+# Rows soft deleted along with their parent: (table, column holding the parent id, extra conditions).
+soft_delete_cascades = {
+    tables.User: (
+        (tables.UserHasRole, tables.UserHasRole.user_id),
+        (tables.UserHasDevice, tables.UserHasDevice.user_id),
+    ),
+    tables.Device: (
+        (tables.AssetNumber, tables.AssetNumber.table_id, tables.AssetNumber.table_name.__eq__("Device")),
+    ),
+    tables.Ticket: (
+        (tables.TicketComment, tables.TicketComment.ticket_id),
+        (tables.TicketMinute, tables.TicketMinute.ticket_id),
+    ),
+    tables.Todo: (
+        (tables.TodoMinute, tables.TodoMinute.todo_id),
+    ),
+}
+
+
+# Soft delete rows by id and their cascades, one UPDATE per table.
+# Extra values are set on the parent rows, e.g. deleter_id. Committing is up to the caller.
+async def soft_delete(db, table, ids, **values):
+    deleted_at = now()
+    stmt = (
+        update(table)
+        .where(table.deleted_at.is_(None))
+        .where(table.id.in_(ids))
+        .values(deleted_at=deleted_at, version=table.version + 1, **values)
+    )
+    result = await db.execute(stmt)
+    for child, column, *conditions in soft_delete_cascades.get(table, ()):
+        stmt = (
+            update(child)
+            .where(child.deleted_at.is_(None))
+            .where(column.in_(ids), *conditions)
+            .values(deleted_at=deleted_at, version=child.version + 1)
+        )
+        await db.execute(stmt)
+    return result.rowcount
+
+
+# Bump the version of a row whose responses include rows of another table,
+# e.g. a ticket when a comment is added. Committing is up to the caller.
+async def touch(db, table, item_id):
     stmt = (
-        select(tables.AssetNumber)
-        .where(tables.AssetNumber.deleted_at.is_(None))
-        .where(tables.AssetNumber.number.__eq__(asset_number))
+        update(table)
+        .where(table.id.__eq__(item_id))
+        .values(version=table.version + 1)
     )
-    asset_number = db.scalars(stmt).one_or_none()
-    if asset_number:
-        return True
-    return False
+    await db.execute(stmt)
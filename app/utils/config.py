@@ -1,15 +1,49 @@
 import os
+import signal
+import threading
+from types import MappingProxyType
 
 import yaml
 
+CONFIG_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config", "env.yml")
 
+_config = None
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def load_config():
+    with open(CONFIG_FILE_PATH, "r") as f:
+        return _freeze(yaml.safe_load(f))
+
+
+# The config is parsed once per process and shared read-only.
 def get_config():
-    try:
-        current_file_path = os.path.dirname(os.path.abspath(__file__))
-        with open(f"{current_file_path}/../config/env.yml", "r") as f:
-            return yaml.safe_load(f)
-    except Exception:
-        raise
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config
+
+
+# Re-read env.yml, the database url still needs a restart to take effect.
+def reload_config():
+    global _config
+    _config = load_config()
+    return _config
+
+
+def register_reload_signal():
+    if not hasattr(signal, "SIGHUP"):
+        return
+    if threading.current_thread() is not threading.main_thread():
+        return
+    signal.signal(signal.SIGHUP, lambda signum, frame: reload_config())
 
 
 def get_database_config():
@@ -1,5 +1,74 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
 
+from .config import get_config
+
+
+# Raised when too many password operations are already waiting for the pool.
+class PasswordPoolBusy(Exception):
+    pass
+
+
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop.
+# More threads than CPUs only slow every hash down, so there is one per CPU by default.
+class PasswordPool:
+    def __init__(self, max_workers: int = None, max_pending: int = 64):
+        max_workers = max_workers or os.cpu_count() or 1
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.running = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crypt")
+        self._lock = threading.Lock()
+
+    def _work(self, func, *args):
+        with self._lock:
+            self.running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy()
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._work, func, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": self.running,
+            "queued": self.pending - self.running,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+pool = PasswordPool(
+    max_workers=get_config().get("crypt", {}).get("max_workers"),
+    max_pending=get_config().get("crypt", {}).get("max_pending", 64),
+)
+
 
 def verify_hashed_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
@@ -7,3 +76,11 @@ def verify_hashed_password(plain_password: str, hashed_password: str) -> bool:
 
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+async def verify_hashed_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await pool.run(verify_hashed_password, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    return await pool.run(hash_password, password)
@@ -0,0 +1,59 @@
+import hashlib
+import json
+
+from fastapi import HTTPException, Request, Response, status
+
+
+# Id and version of a row and of the related rows it is returned with.
+# Every UPDATE bumps the version column, so the list changes whenever the
+# response could. Rows must come from a SELECT of this request: after an ORM
+# UPDATE, version is expired until the row is selected again.
+def get_versions(row, *relations):
+    versions = [row.id, row.version]
+    for relation in relations:
+        value = getattr(row, relation)
+        if value is None:
+            versions.append(None)
+        elif isinstance(value, (list, tuple)):
+            versions.append([[item.id, item.version] for item in value])
+        else:
+            versions.append([value.id, value.version])
+    return versions
+
+
+def make_etag(value):
+    data = json.dumps(value, default=str, separators=(",", ":"))
+    return '"' + hashlib.sha256(data.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def get_request_etags(request: Request):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return set()
+    # If-None-Match compares weakly, so W/"x" matches "x".
+    return {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+# Conditional GET for read endpoints.
+# check() is called with the versions of what is about to be returned, before
+# the related rows that only bump the parent are loaded. It sets the ETag of
+# the response, or answers 304 right away when the client has it already.
+class Conditional:
+    def __init__(self, request: Request, response: Response):
+        self.request = request
+        self.response = response
+
+    def check(self, value):
+        etag = make_etag(value)
+        request_etags = get_request_etags(self.request)
+        if etag in request_etags or "*" in request_etags:
+            # Headers set so far, such as X-Next-Cursor of a list page, are kept
+            # so a client walking pages can go on after a 304.
+            headers = {key: value for key, value in self.response.headers.items() if key != "content-length"}
+            headers["ETag"] = etag
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers=headers,
+            )
+        self.response.headers["ETag"] = etag
+        return etag
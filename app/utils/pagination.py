@@ -0,0 +1,94 @@
+import base64
+import json
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(order_by: str, value, last_id: int) -> str:
+    data = json.dumps([order_by, value, last_id], default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        order_by, value, last_id = json.loads(data)
+    except (ValueError, TypeError):
+        order_by, last_id = None, None
+    if not isinstance(order_by, str) or not isinstance(last_id, int):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+    return order_by, value, last_id
+
+
+# Keyset pages stay cheap only when the sort column leads an index,
+# and need a value to seek from, so nullable columns are left out.
+def get_sortable_columns(table):
+    columns = {column.key for column in table.__table__.primary_key.columns}
+    for index in table.__table__.indexes:
+        column = index.columns[0]
+        if not column.nullable:
+            columns.add(column.key)
+    return columns
+
+
+# Shared query parameters of list endpoints.
+# skip/limit keeps working as before, after=<cursor>&limit=N seeks past the last
+# row of the previous page instead of counting rows to skip. Full pages carry the
+# cursor of the next one in the X-Next-Cursor header.
+class Pagination:
+    def __init__(
+            self,
+            response: Response,
+            skip: int = 0,
+            limit: int = 100,
+            after: str = None,
+            order_by: str = "id",
+    ):
+        self.response = response
+        self.skip = skip
+        self.limit = limit
+        self.after = after
+        self.order_by = order_by
+
+    def apply(self, stmt, table):
+        if self.order_by not in get_sortable_columns(table):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot order by {self.order_by}.",
+            )
+        column = getattr(table, self.order_by)
+        if column is table.id:
+            stmt = stmt.order_by(table.id)
+        else:
+            # Rows sharing a value are ordered by id, so no row is skipped or repeated.
+            stmt = stmt.order_by(column, table.id)
+
+        if self.after:
+            order_by, value, last_id = decode_cursor(self.after)
+            if order_by != self.order_by:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Cursor does not match order_by.",
+                )
+            if column is table.id:
+                stmt = stmt.where(table.id > last_id)
+            else:
+                stmt = stmt.where(or_(column > value, and_(column == value, table.id > last_id)))
+        else:
+            stmt = stmt.offset(self.skip)
+        return stmt.limit(self.limit)
+
+    async def fetch(self, db, stmt, table):
+        rows = (await db.scalars(self.apply(stmt, table))).all()
+        if rows and len(rows) == self.limit:
+            last = rows[-1]
+            self.response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                self.order_by, getattr(last, self.order_by), last.id
+            )
+        return rows
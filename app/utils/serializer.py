@@ -0,0 +1,168 @@
+import operator
+import types
+from typing import Union, get_args, get_origin
+
+import pydantic_core
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.utils.config import get_config
+
+REQUIRED = object()
+
+
+# The schema a field holds, and whether it holds a list of them.
+def get_nested_schema(annotation):
+    origin = get_origin(annotation)
+    if origin is Union or origin is types.UnionType:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return get_nested_schema(args[0]) if len(args) == 1 else (None, False)
+    if origin is list:
+        schema, _ = get_nested_schema(get_args(annotation)[0])
+        return (schema, True) if schema else (None, False)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+# The type a field holds, e.g. list for list[Role] and datetime for Union[datetime, None].
+def get_field_type(annotation):
+    origin = get_origin(annotation)
+    if origin is Union or origin is types.UnionType:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return get_field_type(args[0]) if len(args) == 1 else annotation
+    return origin or annotation
+
+
+# The python type of a mapped column, None for relations and other attributes.
+def get_column_type(row_class, name):
+    columns = getattr(getattr(getattr(row_class, name, None), "property", None), "columns", None)
+    if not columns:
+        return None
+    try:
+        return columns[0].type.python_type
+    except NotImplementedError:
+        return object
+
+
+# itemgetter and attrgetter return a bare value instead of a tuple for one name.
+def make_getter(getter_class, names):
+    if len(names) > 1:
+        return getter_class(*names)
+    return lambda source: tuple(getter_class(name)(source) for name in names)
+
+
+# Turns ORM rows into the dicts their schema would dump, reading fields the way
+# from_attributes does, but without validating them. Only meant for rows just
+# loaded from the database. Columns whose type differs from their field, such as
+# integer flags shown as booleans, are still converted by pydantic.
+class RowSerializer:
+    def __init__(self, schema):
+        schema.model_rebuild()
+        self.schema = schema
+        # Which fields are columns or relations, per ORM class.
+        self.plans = {}
+        self.nested = None
+
+    def get_nested(self):
+        if self.nested is None:
+            nested = []
+            for name, field in self.schema.model_fields.items():
+                schema, many = get_nested_schema(field.annotation)
+                if schema:
+                    nested.append((field.alias or name, get_serializer(schema), many))
+            self.nested = nested
+        return self.nested
+
+    def get_plan(self, row_class):
+        plan = self.plans.get(row_class)
+        if plan is None:
+            keys, names, missing, converters = [], [], [], []
+            field_keys = [field.alias or name for name, field in self.schema.model_fields.items()]
+            for name, field in self.schema.model_fields.items():
+                key = field.alias or name
+                if hasattr(row_class, name):
+                    keys.append(key)
+                    names.append(name)
+                    column_type = get_column_type(row_class, name)
+                    if column_type is not None and column_type is not get_field_type(field.annotation):
+                        converters.append((key, TypeAdapter(field.annotation).validate_python))
+                elif field.is_required():
+                    missing.append((key, name, REQUIRED))
+                else:
+                    missing.append((key, name, field.get_default(call_default_factory=True)))
+            # Keys are put back in field order when attributes are missing in between.
+            order = field_keys if keys + [key for key, _, _ in missing] != field_keys else None
+            plan = (
+                keys,
+                make_getter(operator.itemgetter, names),
+                make_getter(operator.attrgetter, names),
+                missing,
+                converters,
+                order,
+            )
+            self.plans[row_class] = plan
+        return plan
+
+    # Rows shared by many others, such as the brand of every device, are
+    # turned into a dict once per dump.
+    def to_dict(self, row, memo):
+        # The same row can be dumped with several schemas, e.g. as creator and as holder.
+        memo_key = (self, id(row))
+        values = memo.get(memo_key)
+        if values is not None:
+            return values
+        keys, get_items, get_attributes, missing, converters, order = self.get_plan(type(row))
+        try:
+            # Loaded rows keep their values in __dict__, which skips the attribute descriptors.
+            values = dict(zip(keys, get_items(row.__dict__)))
+        except KeyError:
+            values = dict(zip(keys, get_attributes(row)))
+        # Attributes set on single rows, such as user.scopes.
+        for key, name, default in missing:
+            values[key] = getattr(row, name) if default is REQUIRED else getattr(row, name, default)
+        for key, convert in converters:
+            values[key] = convert(values[key])
+        if order:
+            values = {key: values[key] for key in order}
+        for key, serializer, many in self.get_nested():
+            value = values[key]
+            if value is None:
+                continue
+            if many:
+                values[key] = [serializer.to_dict(item, memo) for item in value]
+            else:
+                values[key] = serializer.to_dict(value, memo)
+        memo[memo_key] = values
+        return values
+
+    def dump_json(self, rows):
+        memo = {}
+        return pydantic_core.to_json([self.to_dict(row, memo) for row in rows])
+
+
+serializers = {}
+
+
+def get_serializer(schema):
+    serializer = serializers.get(schema)
+    if serializer is None:
+        serializer = serializers[schema] = RowSerializer(schema)
+    return serializer
+
+
+# The JSON response of a list endpoint, with the headers its dependencies set.
+def json_response(rows, schema, response: Response):
+    body = get_serializer(schema).dump_json(rows)
+    rows_response = Response(content=body, media_type="application/json")
+    rows_response.headers.raw.extend(response.headers.raw)
+    return rows_response
+
+
+# List endpoints return rows through this. With serializer.fast_lists enabled
+# the rows are dumped directly, otherwise FastAPI validates them against the
+# response_model as usual.
+def serialize_rows(rows, schema, response: Response):
+    if not get_config().get("serializer", {}).get("fast_lists", False):
+        return rows
+    return json_response(rows, schema, response)
@@ -0,0 +1,76 @@
+# Asset number resolve throughput: two queries per number (the old search
+# endpoint) against batches through the asset number service, cold and warm.
+# Seeds the asset numbers the first time it runs.
+# Run from the repository root against the database in env.yml:
+#   python -m benchmarks.bench_asset_numbers
+import asyncio
+import time
+
+from sqlalchemy import func, select
+
+from app.database import tables
+from app.database.database import engine, async_engine, AsyncSessionLocal
+from app.services.asset_number import asset_number_cache, get_assets
+from app.services.device import device_details
+
+ASSETS = 5000
+BURST = 200
+PREFIX = "BENCH-ASSET-"
+
+
+async def seed():
+    async with AsyncSessionLocal() as db:
+        stmt = select(func.count()).select_from(tables.AssetNumber).where(tables.AssetNumber.number.like(f"{PREFIX}%"))
+        if (await db.scalar(stmt)) >= ASSETS:
+            return
+        for i in range(ASSETS):
+            device = tables.Device(hostname="bench", asset_number=f"{PREFIX}{i}", brand_id=0, category_id=0)
+            db.add(device)
+            await db.flush()
+            db.add(tables.AssetNumber(number=device.asset_number, table_name="Device", table_id=device.id))
+        await db.commit()
+
+
+async def two_queries(db, numbers):
+    for number in numbers:
+        stmt = (
+            select(tables.AssetNumber)
+            .where(tables.AssetNumber.deleted_at.is_(None))
+            .where(tables.AssetNumber.number.__eq__(number))
+        )
+        asset_number = (await db.scalars(stmt)).one_or_none()
+        table = getattr(tables, asset_number.table_name)
+        stmt = (
+            select(table)
+            .options(*device_details)
+            .where(table.deleted_at.is_(None))
+            .where(table.id.__eq__(asset_number.table_id))
+        )
+        (await db.scalars(stmt)).one_or_none()
+
+
+async def run(name, func, clear_cache):
+    numbers = [f"{PREFIX}{i}" for i in range(ASSETS)]
+    started_at = time.perf_counter()
+    for start in range(0, ASSETS, BURST):
+        if clear_cache:
+            asset_number_cache.clear()
+        async with AsyncSessionLocal() as db:
+            await func(db, numbers[start:start + BURST])
+    seconds = time.perf_counter() - started_at
+    print(f"{name:<24}{ASSETS / seconds:>10.0f} numbers/s")
+
+
+async def main():
+    tables.Base.metadata.create_all(bind=engine)
+    await seed()
+    await run("two queries per number", two_queries, clear_cache=True)
+    await run("batch, cold cache", get_assets, clear_cache=True)
+    # The first pass fills the cache.
+    await run("batch, warming up", get_assets, clear_cache=False)
+    await run("batch, warm cache", get_assets, clear_cache=False)
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
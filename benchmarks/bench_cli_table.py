@@ -0,0 +1,85 @@
+# Rendering a 500 row device table in the CLI, with every label looked up
+# through trans(): reading config and language file on each lookup (what trans
+# did before) against the in-memory catalog.
+# Uses a temporary home directory, no server is needed.
+# Run from the repository root:
+#   python -m benchmarks.bench_cli_table
+import io
+import os
+import statistics
+import tempfile
+import time
+
+import yaml
+
+HOME = tempfile.mkdtemp()
+os.environ["HOME"] = HOME
+
+from rich.console import Console  # noqa: E402
+from rich.table import Table  # noqa: E402
+
+from client import util  # noqa: E402
+
+DEVICES = 500
+ROUNDS = 5
+COLUMNS = ("id", "hostname", "asset_number", "ipv4_address", "mac_address")
+
+
+def trans_per_call(lang_id: str):
+    with open(util.CONFIG_FILE_PATH, "r") as f:
+        lang = yaml.safe_load(f)["lang"]
+    with open(os.path.join(util.LANGS_PATH, f"{lang}.yml"), "r") as f:
+        return util.flatten(yaml.safe_load(f)).get(lang_id, lang_id)
+
+
+def render(trans, devices):
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column(trans("table.fields"))
+    table.add_column(trans("table.values"), justify="right")
+    for device in devices:
+        for column in COLUMNS:
+            table.add_row(trans(f"device.columns.{column}"), str(device[column]))
+    Console(file=io.StringIO(), width=120).print(table)
+
+
+def run(name, trans, devices, rounds):
+    timings = []
+    for _ in range(rounds):
+        util.reset_catalog()
+        started_at = time.perf_counter()
+        render(trans, devices)
+        timings.append((time.perf_counter() - started_at) * 1000)
+    print(f"{name:<20}{statistics.median(timings):>8.1f} ms")
+
+
+def main():
+    os.makedirs(os.path.dirname(util.CONFIG_FILE_PATH))
+    with open(util.CONFIG_FILE_PATH, "w") as f:
+        yaml.dump({"lang": "en_US"}, f)
+    devices = [
+        {
+            "id": i,
+            "hostname": f"pc-{i}",
+            "asset_number": f"PC{i:06d}",
+            "ipv4_address": "10.0.0.1",
+            "mac_address": "00:11:22:33:44:55",
+        }
+        for i in range(DEVICES)
+    ]
+    print(f"rendering {DEVICES} devices, {DEVICES * len(COLUMNS)} lookups")
+    # Two YAML parses per lookup take a while, once is enough.
+    run("per call", trans_per_call, devices, 1)
+    run("catalog", util.trans, devices, ROUNDS)
+
+    # Loading the catalog alone, from the language file and from the cache.
+    for name in ("yaml", "cache"):
+        if name == "yaml":
+            for path in os.listdir(util.CACHE_PATH):
+                os.remove(os.path.join(util.CACHE_PATH, path))
+        started_at = time.perf_counter()
+        util.load_catalog("en_US")
+        print(f"{'load from ' + name:<20}{(time.perf_counter() - started_at) * 1000:>8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Throughput of 200 concurrent clients reading todos through a blocking
+# Session on the event loop (the old request path) and through AsyncSession.
+# Run from the repository root against the database in env.yml:
+#   python -m benchmarks.bench_concurrency
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import tables
+from app.database.database import engine, async_engine, AsyncSessionLocal
+
+CLIENTS = 200
+REQUESTS_PER_CLIENT = 10
+
+
+async def sync_client():
+    for _ in range(REQUESTS_PER_CLIENT):
+        with Session(engine) as db:
+            db.scalars(select(tables.Todo).limit(100)).all()
+        await asyncio.sleep(0)
+
+
+async def async_client():
+    for _ in range(REQUESTS_PER_CLIENT):
+        async with AsyncSessionLocal() as db:
+            (await db.scalars(select(tables.Todo).limit(100))).all()
+
+
+async def run(client):
+    started_at = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(CLIENTS)))
+    return CLIENTS * REQUESTS_PER_CLIENT / (time.perf_counter() - started_at)
+
+
+async def main():
+    tables.Base.metadata.create_all(bind=engine)
+    for name, client in [("sync session", sync_client), ("async session", async_client)]:
+        print(f"{name:<16}{await run(client):>10.0f} requests/s")
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
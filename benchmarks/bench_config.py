@@ -0,0 +1,37 @@
+# Per-request config overhead of JWT encode/decode.
+# Run from the repository root: python -m benchmarks.bench_config
+import timeit
+
+from jose import jwt
+
+from app.services import auth
+from app.utils import config
+
+ROUNDS = 2000
+
+
+def parse_on_every_call():
+    # The old behaviour: every get_jwt_config() call re-read env.yml,
+    # three times to encode and twice to decode.
+    config.load_config()
+    secret = config.load_config()["jwt"]["secret"]
+    algorithm = config.load_config()["jwt"]["algorithm"]
+    token = jwt.encode({"user_id": 1}, secret, algorithm=algorithm)
+    secret = config.load_config()["jwt"]["secret"]
+    algorithm = config.load_config()["jwt"]["algorithm"]
+    jwt.decode(token, secret, algorithms=[algorithm])
+
+
+def cached():
+    token = auth.create_access_token({"user_id": 1})
+    auth.decode_access_token(token)
+
+
+def main():
+    for name, func in [("parse on every call", parse_on_every_call), ("cached", cached)]:
+        seconds = timeit.timeit(func, number=ROUNDS)
+        print(f"{name:<22}{seconds / ROUNDS * 1e6:>10.1f} us/request")
+
+
+if __name__ == '__main__':
+    main()
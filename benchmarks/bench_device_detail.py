@@ -0,0 +1,78 @@
+# Latency of loading one device with its brand, category, current holder and
+# creator: one query per relation (the old get_device) against the single
+# joined statement. Seeds a device the first time it runs.
+# Run from the repository root against the database in env.yml:
+#   python -m benchmarks.bench_device_detail
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select
+
+from app.database import tables
+from app.database.database import engine, async_engine, AsyncSessionLocal
+from app.services.device import get_device_details
+
+ROUNDS = 2000
+ASSET_NUMBER = "BENCH-DEVICE-DETAIL"
+
+
+async def seed():
+    async with AsyncSessionLocal() as db:
+        stmt = select(tables.Device).where(tables.Device.asset_number.__eq__(ASSET_NUMBER))
+        device = (await db.scalars(stmt)).first()
+        if device:
+            return device.id
+        user = tables.User(username="bench_holder", email="bench_holder@test.com", name="bench_holder",
+                           hashed_password="", creator_id=0)
+        brand = tables.Brand(name="bench_brand", creator_id=0)
+        category = tables.DeviceCategory(name="bench_category", creator_id=0)
+        db.add_all([user, brand, category])
+        await db.flush()
+        device = tables.Device(hostname="bench", asset_number=ASSET_NUMBER, brand_id=brand.id,
+                               category_id=category.id, creator_id=user.id)
+        db.add(device)
+        await db.flush()
+        db.add(tables.UserHasDevice(user_id=user.id, device_id=device.id, flag=1, status=0, creator_id=user.id))
+        await db.commit()
+        return device.id
+
+
+async def query_per_relation(db, device_id):
+    device = (await db.scalars(select(tables.Device).where(tables.Device.id.__eq__(device_id)))).one_or_none()
+    (await db.scalars(select(tables.User).where(tables.User.id.__eq__(device.creator_id)))).one_or_none()
+    (await db.scalars(select(tables.Brand).where(tables.Brand.id.__eq__(device.brand_id)))).one_or_none()
+    stmt = select(tables.DeviceCategory).where(tables.DeviceCategory.id.__eq__(device.category_id))
+    (await db.scalars(stmt)).one_or_none()
+    stmt = (
+        select(tables.User)
+        .join(tables.UserHasDevice, tables.User.id == tables.UserHasDevice.user_id)
+        .where(tables.UserHasDevice.deleted_at.is_(None))
+        .where(tables.UserHasDevice.device_id.__eq__(device_id))
+    )
+    (await db.scalars(stmt)).one_or_none()
+
+
+async def run(func, device_id):
+    latencies = []
+    for _ in range(ROUNDS):
+        # A fresh session per round, as every request gets one.
+        async with AsyncSessionLocal() as db:
+            started_at = time.perf_counter()
+            await func(db, device_id)
+            latencies.append(time.perf_counter() - started_at)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return quantiles[49], quantiles[98]
+
+
+async def main():
+    tables.Base.metadata.create_all(bind=engine)
+    device_id = await seed()
+    for name, func in [("query per relation", query_per_relation), ("joined", get_device_details)]:
+        p50, p99 = await run(func, device_id)
+        print(f"{name:<20}p50 {p50 * 1e3:>7.3f} ms    p99 {p99 * 1e3:>7.3f} ms")
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+# Time to import 100k devices from NDJSON through the bulk import service,
+# fed in 64 KiB chunks as the request body would arrive.
+# Run from the repository root against the database in env.yml:
+#   python -m benchmarks.bench_device_import
+import asyncio
+import json
+import time
+import uuid
+
+from app.database import tables
+from app.database.database import engine, async_engine, AsyncSessionLocal
+from app.services.device_import import import_devices, read_lines
+
+ROWS = 100_000
+CHUNK_BYTES = 64 * 1024
+
+
+async def seed():
+    async with AsyncSessionLocal() as db:
+        brand = tables.Brand(name="bench_brand", creator_id=0)
+        category = tables.DeviceCategory(name="bench_category", creator_id=0)
+        db.add_all([brand, category])
+        await db.commit()
+        return brand.id, category.id
+
+
+async def body(brand_id, category_id):
+    # Fresh asset numbers on every run.
+    prefix = uuid.uuid4().hex[:8]
+    lines = "".join(
+        json.dumps({
+            "hostname": f"bench-{i}",
+            "asset_number": f"{prefix}-{i}",
+            "brand_id": brand_id,
+            "category_id": category_id,
+        }) + "\n"
+        for i in range(ROWS)
+    ).encode("utf-8")
+    for start in range(0, len(lines), CHUNK_BYTES):
+        yield lines[start:start + CHUNK_BYTES]
+
+
+async def main():
+    tables.Base.metadata.create_all(bind=engine)
+    brand_id, category_id = await seed()
+    started_at = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        result = await import_devices(db, read_lines(body(brand_id, category_id)), "application/x-ndjson", 0)
+    seconds = time.perf_counter() - started_at
+    print(f"created {result.created}, failed {result.failed} in {seconds:.1f} s ({result.created / seconds:.0f} rows/s)")
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+# Export of a million devices through the streaming export, CSV and NDJSON:
+# throughput and how much the process grows while exporting.
+# Seeds the devices the first time it runs.
+# Run from the repository root against the database in env.yml:
+#   python -m benchmarks.bench_export
+import asyncio
+import resource
+import time
+
+from sqlalchemy import func, insert, select
+
+from app.database import tables
+from app.database.database import engine, async_engine
+from app.services.export import device_columns, export_rows, select_columns
+
+DEVICES = 1_000_000
+BATCH = 10_000
+PREFIX = "BENCH-EXPORT-"
+
+
+def seed():
+    with engine.begin() as connection:
+        stmt = select(func.count()).select_from(tables.Device).where(tables.Device.asset_number.like(f"{PREFIX}%"))
+        seeded = connection.scalar(stmt)
+        for start in range(seeded, DEVICES, BATCH):
+            devices = [
+                {"hostname": f"bench-{i}", "asset_number": f"{PREFIX}{i}", "brand_id": 0, "category_id": 0}
+                for i in range(start, min(start + BATCH, DEVICES))
+            ]
+            connection.execute(insert(tables.Device), devices)
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run(export_format, rows):
+    stmt = select_columns(tables.Device, device_columns)
+    rss_before = max_rss_mb()
+    size = 0
+    started_at = time.perf_counter()
+    async for chunk in export_rows(stmt, device_columns, export_format):
+        size += len(chunk)
+    seconds = time.perf_counter() - started_at
+    print(
+        f"{export_format:<8}{size / 1024 / 1024:>8.0f} MiB in {seconds:.1f} s"
+        f"{rows / seconds:>10.0f} rows/s, max RSS +{max_rss_mb() - rss_before:.0f} MiB"
+    )
+
+
+async def main():
+    tables.Base.metadata.create_all(bind=engine)
+    seed()
+    with engine.connect() as connection:
+        rows = connection.scalar(select(func.count()).select_from(tables.Device).where(tables.Device.deleted_at.is_(None)))
+    print(f"exporting {rows} devices")
+    await run("csv", rows)
+    await run("ndjson", rows)
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+# Request latency of a small JSON endpoint without footprints, with the
+# footprint middleware queueing to the batched writer, and with a footprint
+# inserted inline on every request (what a plain middleware would do).
+# Run from the repository root against the database in env.yml:
+#   python -m benchmarks.bench_footprint
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import insert
+
+from app.database import tables
+from app.database.database import engine, async_engine, AsyncSessionLocal
+from app.middlewares.footprint import FootprintMiddleware, FootprintWriter
+
+REQUESTS = 2000
+BODY = {"name": "bench_brand", "description": "x" * 200}
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.post("/brands/")
+    async def create_brand(form_data: dict):
+        return {"id": 1, **form_data}
+
+    return app
+
+
+class InlineFootprintMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+        if scope["type"] == "http":
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(tables.Footprint), [{
+                    "action": scope["method"],
+                    "url": scope["path"],
+                    "response_status_code": 200,
+                }])
+                await db.commit()
+
+
+async def run(name, app):
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(REQUESTS):
+            started_at = time.perf_counter()
+            response = await client.post("/brands/", json=BODY)
+            latencies.append((time.perf_counter() - started_at) * 1000)
+            assert response.status_code == 200
+    latencies.sort()
+    print(
+        f"{name:<20}p50 {statistics.median(latencies):.3f} ms"
+        f"  p99 {latencies[int(len(latencies) * 0.99)]:.3f} ms"
+    )
+
+
+async def main():
+    tables.Base.metadata.create_all(bind=engine)
+    await run("no footprints", make_app())
+
+    writer = FootprintWriter()
+    writer.start()
+    app = make_app()
+    app.add_middleware(FootprintMiddleware, writer=writer)
+    await run("batched writer", app)
+    await writer.stop()
+    print(f"{'':<20}{writer.written} written in {writer.batches} batches, {writer.dropped} dropped")
+
+    app = make_app()
+    app.add_middleware(InlineFootprintMiddleware)
+    await run("inline insert", app)
+    await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
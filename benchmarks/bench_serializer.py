@@ -0,0 +1,82 @@
+# Serialization of a 10k device list with brand, category, holder and creator:
+# validating into schemas and encoding with json (what FastAPI does with a custom
+# response class), validating and dumping with pydantic (FastAPI's default), and
+# dumping the rows directly (serializer.fast_lists).
+# Rows are built in memory, no database is needed.
+# Run from the repository root:
+#   python -m benchmarks.bench_serializer
+import json
+import statistics
+import time
+from datetime import datetime
+
+from pydantic import TypeAdapter
+
+from app.database import schemas, tables
+from app.utils.serializer import get_serializer
+
+DEVICES = 10_000
+ROUNDS = 5
+
+
+def make_devices():
+    created_at = datetime(2024, 1, 1, 8, 30)
+    creator = tables.User(
+        id=1, name="admin", username="admin", email="admin@example.com",
+        is_active=True, creator_id=0, created_at=created_at,
+    )
+    brand = tables.Brand(id=1, name="Lenovo", creator_id=1, created_at=created_at)
+    category = tables.DeviceCategory(id=1, name="Laptop", creator_id=1, created_at=created_at)
+    devices = []
+    for i in range(DEVICES):
+        device = tables.Device(
+            id=i + 1,
+            hostname=f"pc-{i}",
+            asset_number=f"PC{i:06d}",
+            ipv4_address="10.0.0.1",
+            mac_address="00:11:22:33:44:55",
+            description="bench",
+            brand_id=1,
+            category_id=1,
+            creator_id=1,
+            created_at=created_at,
+        )
+        device.brand = brand
+        device.category = category
+        device.creator = creator
+        device.users = creator if i % 2 else None
+        devices.append(device)
+    return devices
+
+
+def run(name, serialize, devices):
+    timings = []
+    for _ in range(ROUNDS):
+        started_at = time.perf_counter()
+        body = serialize(devices)
+        timings.append((time.perf_counter() - started_at) * 1000)
+    print(f"{name:<20}{statistics.median(timings):>8.1f} ms  {len(body) / 1024 / 1024:.1f} MiB")
+    return body
+
+
+def main():
+    devices = make_devices()
+    adapter = TypeAdapter(list[schemas.Device])
+    serializer = get_serializer(schemas.Device)
+
+    def validate_json(rows):
+        values = adapter.validate_python(rows, from_attributes=True)
+        return json.dumps(adapter.dump_python(values, mode="json")).encode("utf-8")
+
+    def validate_dump_json(rows):
+        return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+    print(f"serializing {DEVICES} devices, median of {ROUNDS}")
+    run("validate + json", validate_json, devices)
+    expected = run("validate + dump_json", validate_dump_json, devices)
+    body = run("rows dump_json", serializer.dump_json, devices)
+    assert body == expected
+
+
+if __name__ == '__main__':
+    main()
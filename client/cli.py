@@ -0,0 +1,82 @@
+import argparse
+import inspect
+import sys
+
+# `cela <group> <command> [args] [--option value]` calls the static method
+# <command> of the class registered for <group>, with an argparse parser built
+# from its signature. Importing fire alone took longer than the whole startup
+# target, and every command imports the services it needs itself, so a trivial
+# command only pays for what it uses.
+
+
+# Values of parameters without an annotation are read as Python literals, as
+# fire did: True, False, None and numbers, with true, false and null accepted
+# too. Anything else, such as pc-01 or 0042, stays a string.
+LITERALS = {"true": True, "false": False, "null": None}
+
+
+def parse_literal(value: str):
+    if value in LITERALS:
+        return LITERALS[value]
+    import ast
+
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def get_type(parameter):
+    if parameter.annotation is inspect.Parameter.empty:
+        return parse_literal
+    return parameter.annotation
+
+
+def get_commands(group):
+    return [name for name, value in vars(group).items() if isinstance(value, staticmethod)]
+
+
+def add_command(commands, name, function):
+    parser = commands.add_parser(name)
+    for parameter in inspect.signature(function).parameters.values():
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            parser.add_argument(parameter.name, nargs="+", type=get_type(parameter))
+        elif parameter.default is parameter.empty:
+            parser.add_argument(parameter.name, type=get_type(parameter))
+        elif parameter.annotation is bool:
+            parser.add_argument(f"--{parameter.name}", action="store_true")
+        else:
+            parser.add_argument(f"--{parameter.name}", type=get_type(parameter), default=parameter.default)
+    parser.set_defaults(function=function)
+
+
+def build_parser(groups, prog="cela"):
+    parser = argparse.ArgumentParser(prog=prog)
+    group_parsers = parser.add_subparsers(dest="group", metavar="<group>", required=True)
+    for group_name, group in groups.items():
+        group_parser = group_parsers.add_parser(group_name, help=", ".join(get_commands(group)))
+        commands = group_parser.add_subparsers(dest="command", required=True)
+        for name in get_commands(group):
+            add_command(commands, name, getattr(group, name))
+    return parser
+
+
+# The function to call with its positional and keyword arguments.
+def parse(groups, argv, prog="cela"):
+    namespace = build_parser(groups, prog).parse_args(argv)
+    function = namespace.function
+    args, kwargs = [], {}
+    for parameter in inspect.signature(function).parameters.values():
+        value = getattr(namespace, parameter.name)
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            args += value
+        elif parameter.default is parameter.empty:
+            args.append(value)
+        else:
+            kwargs[parameter.name] = value
+    return function, args, kwargs
+
+
+def run(groups, argv=None, prog="cela"):
+    function, args, kwargs = parse(groups, sys.argv[1:] if argv is None else argv, prog)
+    return function(*args, **kwargs)
@@ -1,60 +1,143 @@
-import fire
-from .services import base, todo
+from types import SimpleNamespace
+
+from client import cli
+
+# Every command imports the services it uses, so a command never pays for the
+# imports of another one (httpx and rich alone take longer than a trivial command).
 
 
 class ConfigCommands:
     @staticmethod
     def connect(server_url: str):
+        from client.services import base
         base.connect(server_url)
 
     @staticmethod
     def language():
+        from client.services import base
         base.switch_lang()
 
     @staticmethod
     def remove():
+        from client.services import base
         base.remove()
 
 
 class AuthCommands:
     @staticmethod
     def login(username: str, password: str):
+        from client.services import base
         base.login(username, password)
 
 
 class TodoCommands:
+    # The first 100 rows by default, --limit N or --all for more, and
+    # --output tsv for tab separated rows to pipe into other tools.
     @staticmethod
-    def list():
-        todo.select_todos()
+    def list(limit: int = 100, all: bool = False, output: str = "table"):
+        from client.services import todo
+        todo.select_todos(None if all else limit, output)
 
     @staticmethod
     def show(todo_id: int):
+        from client.services import todo
         todo.select_todo(todo_id)
 
     @staticmethod
     def create(title: str, priority: int = 0):
+        from client.services import todo
         todo.create_todo(title, priority)
 
+    # value is a literal, e.g. `cela todo update 1 priority 5` sends 5, not "5".
     @staticmethod
-    def update(todo_id: int, key: str, value: str):
+    def update(todo_id: int, key: str, value):
+        from client.services import todo
         todo.update_todo(todo_id, key, value)
 
+    # Several ids are deleted concurrently, e.g. `cela todo delete 1 2 3`.
     @staticmethod
-    def delete(todo_id: int):
-        todo.delete_todo(todo_id)
+    def delete(*todo_ids: int, concurrency: int = None):
+        from client.services import todo
+        if len(todo_ids) == 1:
+            todo.delete_todo(todo_ids[0])
+        else:
+            todo.delete_todos(todo_ids, concurrency)
 
     @staticmethod
     def start(todo_id: int):
+        from client.services import todo
         todo.start_work(todo_id)
 
     @staticmethod
     def end(todo_id: int):
+        from client.services import todo
         todo.end_work(todo_id)
 
 
-if __name__ == '__main__':
-    fire.Fire({
+class DeviceCommands:
+    # The first 100 rows by default, --limit N or --all for more, and
+    # --output tsv for tab separated rows to pipe into other tools.
+    @staticmethod
+    def list(limit: int = 100, all: bool = False, output: str = "table"):
+        from client.services import device
+        device.select_devices(None if all else limit, output)
+
+    @staticmethod
+    def show(device_id: int):
+        from client.services import device
+        device.select_device(device_id)
+
+    # One device from options, or one per row of a CSV file with --file.
+    @staticmethod
+    def create(
+            hostname: str = None,
+            asset_number: str = None,
+            brand_id: int = None,
+            category_id: int = None,
+            ipv4_address: str = None,
+            ipv6_address: str = None,
+            mac_address: str = None,
+            description: str = None,
+            file: str = None,
+            concurrency: int = None,
+    ):
+        from client.services import device
+        if file:
+            device.create_devices(file, concurrency)
+            return
+        device.create_device(SimpleNamespace(
+            hostname=hostname,
+            asset_number=asset_number,
+            brand_id=brand_id,
+            category_id=category_id,
+            ipv4_address=ipv4_address,
+            ipv6_address=ipv6_address,
+            mac_address=mac_address,
+            description=description,
+        ))
+
+    @staticmethod
+    def update(device_id: int, key: str, value):
+        from client.services import device
+        device.update_device(device_id, key, value)
+
+    @staticmethod
+    def delete(*device_ids: int, concurrency: int = None):
+        from client.services import device
+        if len(device_ids) == 1:
+            device.delete_device(device_ids[0])
+        else:
+            device.delete_devices(device_ids, concurrency)
+
+
+def main():
+    cli.run({
         'config': ConfigCommands,
         'auth': AuthCommands,
         'todo': TodoCommands,
+        'device': DeviceCommands,
     })
+
+
+if __name__ == '__main__':
+    main()
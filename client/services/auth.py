@@ -1,8 +1,8 @@
-import httpx
+from . import base
 
 
 def login(server_url: str, username: str, password: str):
-    return httpx.post(
+    return base.get_client().post(
         f"{server_url}/auth/login",
         data={
             "username": username,
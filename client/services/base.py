@@ -1,15 +1,54 @@
-import httpx
-from pick import pick
+import atexit
+import importlib.util
 
 from client.services import config, auth
 
 from client.util import trans
 
+_client = None
+
+
+# Settings shared by the blocking client and the async one of batch commands.
+# Timeouts, retries and HTTP/2 can be set under "http" in ~/.cela/config.yml.
+def get_client_options(transport_class, connections: int = 10):
+    import httpx
+
+    options = config.read_http()
+    # HTTP/2 needs the h2 package, pip install "httpx[http2]".
+    http2 = options.get("http2", True) and importlib.util.find_spec("h2") is not None
+    return {
+        "http2": http2,
+        "timeout": httpx.Timeout(options.get("timeout", 10), connect=options.get("connect_timeout", 5)),
+        # Only failed connection attempts are retried, so requests are never sent twice.
+        "transport": transport_class(http2=http2, retries=options.get("retries", 2)),
+        "limits": httpx.Limits(max_connections=connections, max_keepalive_connections=connections, keepalive_expiry=30),
+    }
+
+
+# One client for the whole invocation, so every request after the first reuses
+# the open connection instead of doing a new TCP and TLS handshake.
+def get_client():
+    global _client
+    if _client is None:
+        # Imported on first use, commands that send no request skip it.
+        import httpx
+
+        _client = httpx.Client(**get_client_options(httpx.HTTPTransport))
+        atexit.register(close_client)
+    return _client
+
+
+def close_client():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
 
 def connect(server_url: str):
     config.create_if_not_exist()
     print(trans("connecting"))
-    response = httpx.get(f"{server_url}/auth/init")
+    response = get_client().get(f"{server_url}/auth/init")
     if response.status_code not in [200, 409]:
         print(trans("connect_failed"))
         return
@@ -29,6 +68,8 @@ def login(username: str, password: str):
 
 
 def switch_lang():
+    from pick import pick
+
     options = ['en_US', 'zh_CN']
     selected = pick(options, trans("switch_languages"))
     config.write({"lang": selected[0]})
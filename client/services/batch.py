@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+from rich.console import Console
+from rich.table import Table
+
+from . import base
+from .config import read_server_url, read_access_token, read_http
+from ..util import trans
+
+console = Console()
+
+
+def get_detail(response):
+    try:
+        content = response.json()
+    except ValueError:
+        return response.text[:200]
+    if not isinstance(content, dict):
+        return ""
+    if response.status_code == 200:
+        return f"id {content['id']}" if "id" in content else ""
+    return str(content.get("detail") or "")
+
+
+# Sends one request per item over one AsyncClient, at most concurrency at a time.
+# send(client, item) returns the request of an item, e.g. client.delete(f"/todos/{item}").
+async def send_all(items, send, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(
+            base_url=read_server_url(),
+            headers={"Authorization": f"Bearer {read_access_token()}"},
+            **base.get_client_options(httpx.AsyncHTTPTransport, concurrency),
+    ) as client:
+        async def send_one(item):
+            async with semaphore:
+                try:
+                    response = await send(client, item)
+                except httpx.HTTPError as e:
+                    return None, str(e) or type(e).__name__
+            return response.status_code, get_detail(response)
+
+        return await asyncio.gather(*(send_one(item) for item in items))
+
+
+# Runs a batch and prints the result of every item, exits with 1 if any failed.
+# The concurrency defaults to http.concurrency in ~/.cela/config.yml, or 8.
+def run(items, send, concurrency: int = None, label=str):
+    concurrency = concurrency or read_http().get("concurrency", 8)
+    results = asyncio.run(send_all(items, send, concurrency))
+
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column(trans("batch.columns.item"))
+    table.add_column(trans("batch.columns.status"), justify="center")
+    table.add_column(trans("batch.columns.detail"))
+    failed = 0
+    for item, (status_code, detail) in zip(items, results):
+        if status_code == 200:
+            status = f"[green]{status_code}[/green]"
+        else:
+            failed += 1
+            status = f"[red]{status_code or trans('batch.no_response')}[/red]"
+        table.add_row(label(item), status, detail)
+    console.print(table)
+    console.print(
+        trans("batch.summary").format(succeeded=len(items) - failed, failed=failed),
+        style="bold red" if failed else "bold green",
+    )
+    if failed:
+        exit(1)
@@ -1,4 +1,4 @@
-import httpx
+from . import base
 from .config import read_server_url, read_access_token
 from rich.console import Console
 from rich.table import Table
@@ -22,7 +22,7 @@ def switch(args):
 
 
 def select_brands():
-    response = httpx.get(
+    response = base.get_client().get(
         f"{read_server_url()}/brands/",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -50,7 +50,7 @@ def select_brands():
 
 
 def select_brand(brand_id: int):
-    response = httpx.get(
+    response = base.get_client().get(
         f"{read_server_url()}/brands/{brand_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -82,7 +82,7 @@ def create_brand(name: str):
     create_form = {
         "name": name,
     }
-    response = httpx.post(
+    response = base.get_client().post(
         f"{read_server_url()}/brands/",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=create_form,
@@ -107,7 +107,7 @@ def update_brand(brand_id: int, key: str, value: str):
             "value": value,
         }
     ]
-    response = httpx.put(
+    response = base.get_client().put(
         f"{read_server_url()}/brands/{brand_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=update_form,
@@ -122,7 +122,7 @@ def update_brand(brand_id: int, key: str, value: str):
 
 
 def delete_brand(brand_id: int):
-    response = httpx.delete(
+    response = base.get_client().delete(
         f"{read_server_url()}/brand/{brand_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -2,14 +2,20 @@ import os
 import yaml
 from rich import print
 
+from client import util
 from client.util import trans
 
 CONFIG_FILE_PATH = os.path.join(os.path.expanduser('~'), '.cela', 'config.yml')
 
+# The config file is parsed once per invocation, write() keeps this copy current.
+_content = None
+
 
 def remove():
+    global _content
     if os.path.exists(CONFIG_FILE_PATH):
         os.remove(CONFIG_FILE_PATH)
+        _content = None
         print("Config file removed.")
     else:
         print("Config file not found.")
@@ -26,19 +32,19 @@ def create_if_not_exist():
 
 
 def read(key: str = None):
-    if not os.path.exists(CONFIG_FILE_PATH):
-        print("Config file not found.")
-        exit(1)
-    try:
-        with open(CONFIG_FILE_PATH, "r") as f:
-            content = yaml.safe_load(f)
-        if key:
-            return content[key]
-        return content
-    except yaml.YAMLError:
-        return {}
-    except KeyError:
-        raise
+    global _content
+    if _content is None:
+        if not os.path.exists(CONFIG_FILE_PATH):
+            print("Config file not found.")
+            exit(1)
+        try:
+            with open(CONFIG_FILE_PATH, "r") as f:
+                _content = yaml.safe_load(f) or {}
+        except yaml.YAMLError:
+            return {}
+    if key:
+        return _content[key]
+    return _content
 
 
 def write(key_values: dict):
@@ -48,6 +54,8 @@ def write(key_values: dict):
         content[key] = value
     with open(CONFIG_FILE_PATH, "w") as f:
         yaml.dump(content, f)
+    if "lang" in key_values:
+        util.reset_catalog()
 
 
 def read_server_url():
@@ -66,6 +74,14 @@ def read_access_token():
         exit(1)
 
 
+# Timeouts, retries and HTTP/2 of requests to the server, see base.get_client.
+def read_http():
+    if not os.path.exists(CONFIG_FILE_PATH):
+        return {}
+    content = read()
+    return (content or {}).get("http") or {}
+
+
 def read_lang():
     try:
         return read("lang")
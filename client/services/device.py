@@ -1,4 +1,7 @@
-import httpx
+import csv
+from collections import Counter
+
+from . import base, batch, pages
 from .config import read_server_url, read_access_token
 from rich.console import Console
 from rich.table import Table
@@ -21,42 +24,19 @@ def switch(args):
         delete_device(args.device_id)
 
 
-def select_devices():
-    response = httpx.get(
-        f"{read_server_url()}/devices/",
-        headers={"Authorization": f"Bearer {read_access_token()}"},
-    )
-    if response.status_code != 200:
-        console.print(trans("device.select_failed"), style="bold red")
-        console.print(response.status_code)
-        console.print(response.json()['detail'] or None, style="bold")
-        exit(1)
-
-    console.print(trans("device.list"), response.status_code, style="bold green")
-
-    devices = response.json()
-
-    table = Table(show_header=True, header_style="bold magenta")
-    table.add_column(trans("device.columns.id"), style="dim", width=12, justify="center")
-    table.add_column(trans("device.columns.hostname"), justify="center")
-    table.add_column(trans("device.columns.asset_number"), justify="center")
-    table.add_column(trans("device.columns.ipv4_address"), justify="center")
-    table.add_column(trans("device.columns.mac_address"), justify="center")
-
-    for device in devices:
-        table.add_row(
-            str(device["id"]),
-            device["hostname"],
-            device["asset_number"],
-            device["ipv4_address"],
-            device["mac_address"],
-        )
-
-    console.print(table)
+def select_devices(limit: int = 100, output: str = "table"):
+    pages.check_output(output)
+    rows = pages.iter_pages("/devices/", "device.select_failed", limit)
+    fields = ["id", "hostname", "asset_number", "ipv4_address", "mac_address"]
+    if output == "tsv":
+        pages.print_tsv(rows, fields)
+        return
+    console.print(trans("device.list"), style="bold green")
+    pages.print_table(rows, fields, "device", "bold magenta")
 
 
 def select_device(device_id: int):
-    response = httpx.get(
+    response = base.get_client().get(
         f"{read_server_url()}/devices/{device_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -98,7 +78,7 @@ def create_device(args):
         "brand_id": args.brand_id,
         "category_id": args.category_id,
     }
-    response = httpx.post(
+    response = base.get_client().post(
         f"{read_server_url()}/devices/",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=create_form,
@@ -123,7 +103,7 @@ def update_device(role_id: int, key: str, value: str):
             "value": value,
         }
     ]
-    response = httpx.put(
+    response = base.get_client().put(
         f"{read_server_url()}/devices/{role_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=update_form,
@@ -138,7 +118,7 @@ def update_device(role_id: int, key: str, value: str):
 
 
 def delete_device(role_id: int):
-    response = httpx.delete(
+    response = base.get_client().delete(
         f"{read_server_url()}/devices/{role_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -150,3 +130,27 @@ def delete_device(role_id: int):
         exit(1)
 
     console.print(trans("device.delete"), response.status_code, style="bold green")
+
+
+def delete_devices(device_ids, concurrency: int = None):
+    batch.run(device_ids, lambda client, device_id: client.delete(f"/devices/{device_id}"), concurrency)
+
+
+# Create a device for each row of a CSV file with a header row of device fields,
+# e.g. hostname,asset_number,brand_id,category_id. Empty cells are sent as null.
+def create_devices(file_path: str, concurrency: int = None):
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        rows = [{key: value or None for key, value in row.items()} for row in csv.DictReader(f)]
+    # The server checks asset numbers one request at a time, so concurrent
+    # rows sharing a number could both pass. Such files are refused up front.
+    asset_numbers = Counter(row.get("asset_number") for row in rows)
+    duplicates = [asset_number for asset_number, count in asset_numbers.items() if asset_number and count > 1]
+    if duplicates:
+        console.print(trans("device.duplicate_asset_numbers"), ", ".join(duplicates), style="bold red")
+        exit(1)
+    batch.run(
+        rows,
+        lambda client, row: client.post("/devices/", json=row),
+        concurrency,
+        label=lambda row: row.get("asset_number") or "",
+    )
@@ -0,0 +1,86 @@
+import sys
+
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+from . import base
+from .config import read_server_url, read_access_token, read_http
+from ..util import trans
+
+console = Console()
+# Errors go to stderr, so they do not end up in the rows piped from tsv output.
+error_console = Console(stderr=True)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+OUTPUTS = ("table", "tsv")
+
+
+# Yields the rows of a list endpoint page by page, following the cursor the
+# server sends with every full page, until limit rows are read (None reads all).
+# The page size can be set with http.page_size in ~/.cela/config.yml.
+def iter_pages(path: str, failed: str, limit: int = None):
+    page_size = read_http().get("page_size", 100)
+    params = {}
+    while limit is None or limit > 0:
+        params["limit"] = page_size if limit is None else min(page_size, limit)
+        response = base.get_client().get(
+            f"{read_server_url()}{path}",
+            params=params,
+            headers={"Authorization": f"Bearer {read_access_token()}"},
+        )
+        if response.status_code != 200:
+            error_console.print(trans(failed), style="bold red")
+            error_console.print(response.status_code)
+            error_console.print(response.json()['detail'] or None, style="bold")
+            exit(1)
+        rows = response.json()
+        if rows:
+            yield rows
+        if limit is not None:
+            limit -= len(rows)
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return
+        params["after"] = cursor
+
+
+def get_cell(value):
+    return "" if value is None else str(value)
+
+
+def check_output(output: str):
+    if output not in OUTPUTS:
+        error_console.print(trans("pages.unknown_output").format(output=output), style="bold red")
+        exit(2)
+
+
+# tsv writes a header of field names, then one line per row as pages arrive.
+def print_tsv(pages, fields):
+    write = sys.stdout.write
+    write("\t".join(fields) + "\n")
+    for rows in pages:
+        for row in rows:
+            cells = (get_cell(row[field]).replace("\t", " ").replace("\n", " ") for field in fields)
+            write("\t".join(cells) + "\n")
+        sys.stdout.flush()
+
+
+# Every page is printed as soon as it arrives, as a table without edges and with
+# the column widths of the first page, so the pages line up as one table.
+def print_table(pages, fields, prefix: str, header_style: str):
+    headers = [trans(f"{prefix}.columns.{field}") for field in fields]
+    widths = None
+    count = 0
+    for rows in pages:
+        cells = [[get_cell(row[field]) for field in fields] for row in rows]
+        if widths is None:
+            widths = [max(len(header), *(len(row[index]) for row in cells)) for index, header in enumerate(headers)]
+        table = Table(show_header=count == 0, header_style=header_style, box=box.SIMPLE_HEAD, show_edge=False)
+        for header, width in zip(headers, widths):
+            table.add_column(header, width=width, overflow="fold")
+        for row in cells:
+            table.add_row(*row)
+        console.print(table)
+        count += len(rows)
+    console.print(trans("pages.rows").format(count=count), style="dim")
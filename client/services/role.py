@@ -1,4 +1,4 @@
-import httpx
+from . import base
 from .config import read_server_url, read_access_token
 from rich.console import Console
 from rich.table import Table
@@ -22,7 +22,7 @@ def switch(args):
 
 
 def select_roles():
-    response = httpx.get(
+    response = base.get_client().get(
         f"{read_server_url()}/roles/",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -52,7 +52,7 @@ def select_roles():
 
 
 def select_role(role_id: int):
-    response = httpx.get(
+    response = base.get_client().get(
         f"{read_server_url()}/roles/{role_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -85,7 +85,7 @@ def create_role(name: str, scopes: str):
         "name": name,
         "scopes": scopes.split(","),
     }
-    response = httpx.post(
+    response = base.get_client().post(
         f"{read_server_url()}/roles/",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=create_form,
@@ -110,7 +110,7 @@ def update_role(role_id: int, key: str, value: str):
             "value": value,
         }
     ]
-    response = httpx.put(
+    response = base.get_client().put(
         f"{read_server_url()}/roles/{role_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=update_form,
@@ -125,7 +125,7 @@ def update_role(role_id: int, key: str, value: str):
 
 
 def delete_role(role_id: int):
-    response = httpx.delete(
+    response = base.get_client().delete(
         f"{read_server_url()}/roles/{role_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
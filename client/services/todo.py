@@ -1,4 +1,4 @@
-import httpx
+from . import base, batch, pages
 from .config import read_server_url, read_access_token
 from rich.console import Console
 from rich.table import Table
@@ -9,38 +9,19 @@ from ..util import trans, calculate_todo_minutes
 console = Console()
 
 
-def select_todos():
-    response = httpx.get(
-        f"{read_server_url()}/todos/",
-        headers={"Authorization": f"Bearer {read_access_token()}"},
-    )
-    if response.status_code != 200:
-        console.print(trans("todo.selects_failed"), style="bold red")
-        console.print(response.status_code)
-        console.print(response.json()['detail'] or None, style="bold")
-        exit(1)
-
-    console.print(trans("todo.list"), response.status_code, style="bold green")
-
-    todos = response.json()
-
-    table = Table(show_header=True, header_style="bold green")
-    table.add_column(trans("todo.columns.id"), style="dim", width=12)
-    table.add_column(trans("todo.columns.title"))
-    table.add_column(trans("todo.columns.priority"))
-
-    for todo in todos:
-        table.add_row(
-            str(todo["id"]),
-            todo["title"],
-            str(todo["priority"]),
-        )
-
-    console.print(table)
+def select_todos(limit: int = 100, output: str = "table"):
+    pages.check_output(output)
+    rows = pages.iter_pages("/todos/", "todo.selects_failed", limit)
+    fields = ["id", "title", "priority"]
+    if output == "tsv":
+        pages.print_tsv(rows, fields)
+        return
+    console.print(trans("todo.list"), style="bold green")
+    pages.print_table(rows, fields, "todo", "bold green")
 
 
 def select_todo(todo_id: int):
-    response = httpx.get(
+    response = base.get_client().get(
         f"{read_server_url()}/todos/{todo_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -92,7 +73,7 @@ def create_todo(title: str, priority: int = 0):
         "title": title,
         "priority": priority,
     }
-    response = httpx.post(
+    response = base.get_client().post(
         f"{read_server_url()}/todos/",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=create_form,
@@ -117,7 +98,7 @@ def update_todo(todo_id: int, key: str, value: str):
             "value": value,
         }
     ]
-    response = httpx.put(
+    response = base.get_client().put(
         f"{read_server_url()}/todos/{todo_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=update_form,
@@ -132,7 +113,7 @@ def update_todo(todo_id: int, key: str, value: str):
 
 
 def delete_todo(todo_id: int):
-    response = httpx.delete(
+    response = base.get_client().delete(
         f"{read_server_url()}/todos/{todo_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -146,11 +127,15 @@ def delete_todo(todo_id: int):
     console.print(trans("todo.delete"), response.status_code, style="bold green")
 
 
+def delete_todos(todo_ids, concurrency: int = None):
+    batch.run(todo_ids, lambda client, todo_id: client.delete(f"/todos/{todo_id}"), concurrency)
+
+
 def start_work(todo_id: int):
     form_data = {
         "todo_id": todo_id,
     }
-    response = httpx.post(
+    response = base.get_client().post(
         f"{read_server_url()}/todos/{todo_id}/start_work",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=form_data,
@@ -168,7 +153,7 @@ def end_work(todo_id: int):
     form_data = {
         "todo_id": todo_id,
     }
-    response = httpx.post(
+    response = base.get_client().post(
         f"{read_server_url()}/todos/{todo_id}/end_work",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=form_data,
@@ -1,4 +1,4 @@
-import httpx
+from . import base
 from .config import read_server_url, read_access_token
 from rich.console import Console
 from rich.table import Table
@@ -22,7 +22,7 @@ def switch(args):
 
 
 def select_users():
-    response = httpx.get(
+    response = base.get_client().get(
         f"{read_server_url()}/users/",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -56,7 +56,7 @@ def select_users():
 
 
 def select_user(user_id: int):
-    response = httpx.get(
+    response = base.get_client().get(
         f"{read_server_url()}/users/{user_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -92,7 +92,7 @@ def create_user(args):
         "email": args.email,
         "password": args.password,
     }
-    response = httpx.post(
+    response = base.get_client().post(
         f"{read_server_url()}/users/",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=create_form,
@@ -117,7 +117,7 @@ def update_user(user_id: int, key: str, value: str):
             "value": value,
         }
     ]
-    response = httpx.put(
+    response = base.get_client().put(
         f"{read_server_url()}/users/{user_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
         json=update_form,
@@ -132,7 +132,7 @@ def update_user(user_id: int, key: str, value: str):
 
 
 def delete_user(user_id: int):
-    response = httpx.delete(
+    response = base.get_client().delete(
         f"{read_server_url()}/users/{user_id}",
         headers={"Authorization": f"Bearer {read_access_token()}"},
     )
@@ -21,7 +21,10 @@ setup(
         'Programming Language :: Python :: 3.12',
     ],
     keywords='cela,asset,management,client',
-    install_requires=['pyyaml', 'pymysql', 'rich', 'httpx', 'fire', 'pick'],
+    install_requires=['pyyaml', 'pymysql', 'rich', 'httpx', 'pick'],
+    extras_require={
+        'http2': ['httpx[http2]'],
+    },
     entry_points={
         'console_scripts': [
             'cela=client.main:main',
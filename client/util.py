@@ -1,32 +1,80 @@
+import marshal
 import os
 
 import yaml
 from datetime import datetime
 
 CONFIG_FILE_PATH = os.path.join(os.path.expanduser('~'), '.cela', 'config.yml')
+LANGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'langs')
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cela', 'cache')
 
+_catalog = None
 
-def trans(lang_id: str):
+
+def read_lang():
+    try:
+        with open(CONFIG_FILE_PATH, "r") as f:
+            content = yaml.safe_load(f)
+        return content['lang']
+    except (OSError, yaml.YAMLError, TypeError, KeyError):
+        return "en_US"
+
+
+# Nested keys of a language file joined with dots, e.g. "device.columns.id".
+def flatten(content, prefix=""):
+    catalog = {}
+    for key, value in content.items():
+        if isinstance(value, dict):
+            catalog.update(flatten(value, f"{prefix}{key}."))
+        else:
+            catalog[f"{prefix}{key}"] = value
+    return catalog
+
+
+# A language file flattened into a dict. The result is kept in ~/.cela/cache
+# as marshal data, used until the language file changes.
+def load_catalog(lang: str):
+    lang_path = os.path.join(LANGS_PATH, f"{lang}.yml")
+    cache_path = os.path.join(CACHE_PATH, f"{lang}.marshal")
+    try:
+        stat = os.stat(lang_path)
+    except OSError:
+        return {}
+    key = [stat.st_mtime_ns, stat.st_size]
     try:
-        if not os.path.exists(CONFIG_FILE_PATH):
-            print(trans("config_file_not_found"))
-            exit(1)
-        try:
-            with open(CONFIG_FILE_PATH, "r") as f:
-                content = yaml.safe_load(f)
-                lang = content['lang']
-        except KeyError:
-            lang = "en_US"
-        try:
-            with open(f"client/langs/{lang}.yml", "r") as f:
-                content = yaml.safe_load(f)
-            return content[lang_id]
-        except TypeError:
-            return lang_id
-        except KeyError:
-            return lang_id
+        with open(cache_path, "rb") as f:
+            cached_key, catalog = marshal.load(f)
+        if cached_key == key:
+            return catalog
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    try:
+        with open(lang_path, "r") as f:
+            catalog = flatten(yaml.safe_load(f) or {})
     except yaml.YAMLError:
-        return lang_id
+        return {}
+    try:
+        os.makedirs(CACHE_PATH, exist_ok=True)
+        with open(f"{cache_path}.{os.getpid()}", "wb") as f:
+            marshal.dump([key, catalog], f)
+        os.replace(f"{cache_path}.{os.getpid()}", cache_path)
+    except OSError:
+        pass
+    return catalog
+
+
+# Drop the catalog after the language is switched.
+def reset_catalog():
+    global _catalog
+    _catalog = None
+
+
+# The language and its strings are loaded on the first call of an invocation.
+def trans(lang_id: str):
+    global _catalog
+    if _catalog is None:
+        _catalog = load_catalog(read_lang())
+    return _catalog.get(lang_id, lang_id)
 
 
 def calculate_todo_minutes(work_list):
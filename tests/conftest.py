@@ -0,0 +1,11 @@
+import pytest
+
+from tests import functions
+
+
+# Keep one event loop for the whole run, the async engine pools connections on it.
+@pytest.fixture(scope="session", autouse=True)
+def client():
+    with functions.client:
+        yield functions.client
+
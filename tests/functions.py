@@ -1,11 +1,15 @@
+from contextlib import contextmanager
 from typing import Union
 
 from fastapi.testclient import TestClient
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, event
 
-from app.database.database import SessionLocal, engine
+from app.database.database import SessionLocal, AsyncSessionLocal, engine, async_engine
 from app.database import schemas, tables
 from app.services import auth
+from app.services.asset_number import asset_number_cache
+from app.services.lookup import brand_cache, device_category_cache
+from app.middlewares.footprint import footprint_writer
 
 from app.main import app
 
@@ -13,20 +17,31 @@ client = TestClient(app)
 
 
 def start():
+    # Footprints of the previous test module must not land in the new tables.
+    flush_footprints()
     db = SessionLocal()
     tables.Base.metadata.drop_all(bind=engine)
     tables.Base.metadata.create_all(bind=engine)
     db.close()
+    # Cached rows of the previous test module are gone with its tables.
+    asset_number_cache.clear()
+    auth.scope_cache.clear()
+    brand_cache.invalidate()
+    device_category_cache.invalidate()
 
 
 def end():
+    flush_footprints()
     db = SessionLocal()
     tables.Base.metadata.drop_all(bind=engine)
     db.close()
 
 
+def flush_footprints():
+    client.portal.call(footprint_writer.flush)
+
+
 def create_admin(user: schemas.UserCreateForm):
-    db = SessionLocal()
     user_create = schemas.UserCreateForm(
         email=user.email,
         name=user.name,
@@ -34,8 +49,43 @@ def create_admin(user: schemas.UserCreateForm):
         username=user.username,
         creator_id=user.creator_id,
     )
-    auth.create_super_admin(db, user_create)
-    db.close()
+
+    async def create():
+        async with AsyncSessionLocal() as db:
+            await auth.create_super_admin(db, user_create)
+
+    # Run on the client's event loop so pooled async connections stay on one loop.
+    client.portal.call(create)
+
+
+# Collect the SQL statements and their parameters sent by request handlers inside the block.
+# Footprints are written by a background task whenever it gets to them, so they are left out.
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith("INSERT INTO footprints"):
+            statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+# Describe the tables a statement reads in full, according to the database's EXPLAIN.
+# Scans of derived tables are left out, "(join-1)" and "anon_1" in SQLite, "<derived2>" in MySQL.
+def find_full_scans(statement: str, parameters):
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+            scans = [row[3].split()[1] for row in rows if row[3].startswith("SCAN ") and " USING " not in row[3]]
+        else:
+            rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().all()
+            scans = [row["table"] for row in rows if row["type"] == "ALL"]
+    return [f"SCAN {table}" for table in scans if not table.startswith(("(", "anon_", "<"))]
 
 
 # Auth
@@ -89,9 +139,18 @@ def select_user(access_token: str, user_id: id):
     )
 
 
-def select_users(access_token: str):
+def select_users(access_token: str, params: Union[dict, None] = None):
     return client.get(
         f"/users",
+        params=params,
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+
+def export_users(access_token: str, params: Union[dict, None] = None):
+    return client.get(
+        f"/users/export",
+        params=params,
         headers={"Authorization": f"Bearer {access_token}"},
     )
 
@@ -119,6 +178,14 @@ def delete_user(access_token: str, user_id: id):
     )
 
 
+def delete_users(access_token: str, user_ids: list[int]):
+    return client.delete(
+        f"/users/",
+        params={"ids": user_ids},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+
 # Role
 
 def select_role(access_token: str, role_id: id):
@@ -199,9 +266,10 @@ def create_brand(access_token: str, form_data: dict):
     )
 
 
-def select_brands(access_token: str):
+def select_brands(access_token: str, params: Union[dict, None] = None):
     return client.get(
         f"/brands",
+        params=params,
         headers={"Authorization": f"Bearer {access_token}"},
     )
 
@@ -291,6 +359,14 @@ def create_device(access_token: str, form_data: dict):
     )
 
 
+def create_devices(access_token: str, content: str, content_type: str):
+    return client.post(
+        f"/devices/bulk",
+        headers={"Authorization": f"Bearer {access_token}", "Content-Type": content_type},
+        content=content,
+    )
+
+
 def select_devices(access_token: str, asset_number: Union[str, None] = None):
     query = ""
     if asset_number:
@@ -301,13 +377,24 @@ def select_devices(access_token: str, asset_number: Union[str, None] = None):
     )
 
 
-def select_device(access_token: str, device_id: id):
+def export_devices(access_token: str, params: Union[dict, None] = None):
     return client.get(
-        f"/devices/{device_id}",
+        f"/devices/export",
+        params=params,
         headers={"Authorization": f"Bearer {access_token}"},
     )
 
 
+def select_device(access_token: str, device_id: id, etag: Union[str, None] = None):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    if etag:
+        headers["If-None-Match"] = etag
+    return client.get(
+        f"/devices/{device_id}",
+        headers=headers,
+    )
+
+
 def update_device(access_token: str, device_id: id, form_data: list[dict]):
     return client.put(
         f"/devices/{device_id}",
@@ -355,6 +442,13 @@ def user_has_device_in(access_token: str, user_id: id, form_data: dict):
     )
 
 
+def select_metrics(access_token: str):
+    return client.get(
+        f"/system/metrics",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+
 def search_asset_numbers(access_token: str, asset_number: str):
     return client.get(
         f"/search/assets/asset_number/{asset_number}",
@@ -362,7 +456,23 @@ def search_asset_numbers(access_token: str, asset_number: str):
     )
 
 
-def search_tickets(access_token: str, keyword: str):
+def search_asset_numbers_batch(access_token: str, asset_numbers: list[str]):
+    return client.post(
+        f"/search/assets/asset_numbers",
+        headers={"Authorization": f"Bearer {access_token}"},
+        json=asset_numbers,
+    )
+
+
+def search_tickets(access_token: str, keyword: str, skip: int = 0, limit: int = 20):
+    return client.get(
+        f"/search/tickets",
+        params={"q": keyword, "skip": skip, "limit": limit},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+
+
+def search_tickets_by_title(access_token: str, keyword: str):
     return client.get(
         f"/search/tickets/title/{keyword}",
         headers={"Authorization": f"Bearer {access_token}"},
@@ -376,13 +486,24 @@ def select_tickets(access_token: str):
     )
 
 
-def select_ticket(access_token: str, ticket_id: id):
+def export_tickets(access_token: str, params: Union[dict, None] = None):
     return client.get(
-        f"/tickets/{ticket_id}",
+        f"/tickets/export",
+        params=params,
         headers={"Authorization": f"Bearer {access_token}"},
     )
 
 
+def select_ticket(access_token: str, ticket_id: id, etag: Union[str, None] = None):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    if etag:
+        headers["If-None-Match"] = etag
+    return client.get(
+        f"/tickets/{ticket_id}",
+        headers=headers,
+    )
+
+
 def create_ticket(access_token: str, form_data: dict):
     return client.post(
         f"/tickets",
@@ -430,17 +551,23 @@ def end_work_on_ticket(access_token: str, ticket_id: id, form_data: dict):
     )
 
 
-def select_todos(access_token: str):
+def select_todos(access_token: str, etag: Union[str, None] = None):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    if etag:
+        headers["If-None-Match"] = etag
     return client.get(
         f"/todos",
-        headers={"Authorization": f"Bearer {access_token}"},
+        headers=headers,
     )
 
 
-def select_todo(access_token: str, todo_id: id):
+def select_todo(access_token: str, todo_id: id, etag: Union[str, None] = None):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    if etag:
+        headers["If-None-Match"] = etag
     return client.get(
         f"/todos/{todo_id}",
-        headers={"Authorization": f"Bearer {access_token}"},
+        headers=headers,
     )
 
 
@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
 
 from app.database import schemas
+from app.services.auth import create_access_token, decode_access_token
 
 from app.main import app
 
@@ -105,5 +106,59 @@ def test_update():
     assert access_token
 
 
+def test_scopes():
+    payload = decode_access_token(access_token)
+    assert "sv" in payload
+    assert "scopes" not in payload
+
+    response = functions.select_me(access_token)
+    assert response.status_code == 200
+    assert response.json()['scopes'] == ["su"]
+    # Token, user and scopes are all cached now.
+    with functions.count_queries() as statements:
+        response = functions.select_me(access_token)
+    assert response.status_code == 200
+    assert statements == []
+
+    form_data = {
+        "email": "test_user@test.com",
+        "name": "test_user",
+        "password": "test_user",
+        "username": "test_user",
+    }
+    user_id = functions.create_user(access_token, form_data).json()['id']
+    role_id = functions.create_role(access_token, {"name": "reader", "scopes": ["auth:me"]}).json()['id']
+    response = functions.create_user_has_role(access_token, user_id, {"user_id": user_id, "role_id": role_id})
+    assert response.status_code == 200
+    user_access_token = functions.login("test_user", "test_user").json()['access_token']
+
+    response = functions.select_users(user_access_token)
+    assert response.status_code == 403
+
+    # Role changes apply to tokens already handed out.
+    response = functions.update_role(access_token, role_id, [{"key": "scopes", "value": ["auth:me", "user:list"]}])
+    assert response.status_code == 200
+    response = functions.select_users(user_access_token)
+    assert response.status_code == 200
+    # The token still carries the old scope version, it is looked up once only.
+    with functions.count_queries() as statements:
+        for _ in range(3):
+            response = functions.select_me(user_access_token)
+            assert response.status_code == 200
+    assert statements == []
+
+    response = functions.delete_user_has_role(access_token, user_id, role_id)
+    assert response.status_code == 200
+    response = functions.select_me(user_access_token)
+    assert response.status_code == 403
+
+    # Tokens carrying a scope list keep working with that list.
+    legacy_access_token = create_access_token({"user_id": user_id, "scopes": ["auth:me"]})
+    response = functions.select_me(legacy_access_token)
+    assert response.status_code == 200
+    response = functions.select_users(legacy_access_token)
+    assert response.status_code == 403
+
+
 def test_end():
     functions.end()
@@ -1,7 +1,10 @@
 from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert, select, update
 
-from app.database import schemas
+from app.database import schemas, tables
+from app.database.database import AsyncSessionLocal, engine
 from app.main import app
+from app.services.lookup import brand_cache
 
 from tests import functions
 
@@ -56,6 +59,38 @@ def test_select():
     assert response.json()['name'] == "test_brand"
 
 
+def test_pagination():
+    for i in range(3):
+        response = functions.create_brand(admin_access_token, {"name": f"test_page_brand_{i}"})
+        assert response.status_code == 200
+
+    response = functions.select_brands(admin_access_token)
+    assert response.status_code == 200
+    brand_ids = [brand['id'] for brand in response.json()]
+    assert len(brand_ids) == 5
+
+    page_ids = []
+    params = {"limit": 2}
+    while True:
+        response = functions.select_brands(admin_access_token, params)
+        assert response.status_code == 200
+        page_ids += [brand['id'] for brand in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": 2, "after": cursor}
+    assert page_ids == brand_ids
+
+    response = functions.select_brands(admin_access_token, {"skip": 2, "limit": 2})
+    assert [brand['id'] for brand in response.json()] == brand_ids[2:4]
+
+    response = functions.select_brands(admin_access_token, {"after": "not a cursor"})
+    assert response.status_code == 400
+
+    response = functions.select_brands(admin_access_token, {"order_by": "name"})
+    assert response.status_code == 400
+
+
 def test_update():
     form_data = [
         {
@@ -113,5 +148,85 @@ def test_delete():
     assert response.status_code == 404
 
 
+def test_cache():
+    brand_id = functions.create_brand(admin_access_token, {"name": "cached_brand"}).json()['id']
+    category_id = functions.create_device_category(admin_access_token, {"name": "cached_category"}).json()['id']
+    form_data = {
+        "hostname": "test_device",
+        "asset_number": "PC0002",
+        "brand_id": brand_id,
+        "category_id": category_id,
+    }
+    response = functions.create_device(admin_access_token, form_data)
+    assert response.status_code == 200
+
+    # Brands and categories are served from memory now.
+    form_data["asset_number"] = "PC0003"
+    with functions.count_queries() as statements:
+        response = functions.create_device(admin_access_token, form_data)
+    assert response.status_code == 200
+    for statement, _ in statements:
+        assert "FROM brands" not in statement
+        assert "FROM device_categories" not in statement
+        assert "FROM lookup_versions" not in statement
+
+    with functions.count_queries() as statements:
+        response = functions.select_brand(admin_access_token, brand_id)
+    assert response.status_code == 200
+    assert not any("FROM brands" in statement for statement, _ in statements)
+
+    # Another worker renames the brand and bumps the version.
+    with engine.begin() as connection:
+        connection.execute(update(tables.Brand).where(tables.Brand.id == brand_id).values(name="renamed_brand"))
+        connection.execute(
+            update(tables.LookupVersion)
+            .where(tables.LookupVersion.name == "brands")
+            .values(version=tables.LookupVersion.version + 1)
+        )
+    response = functions.select_brand(admin_access_token, brand_id)
+    assert response.json()['name'] == "cached_brand"
+    brand_cache.checked_at = 0
+    response = functions.select_brand(admin_access_token, brand_id)
+    assert response.json()['name'] == "renamed_brand"
+
+    # Ids created elsewhere are looked up again instead of reported missing.
+    with engine.begin() as connection:
+        new_brand_id = connection.execute(insert(tables.Brand).values(name="new_brand", creator_id=0)).inserted_primary_key[0]
+        connection.execute(
+            update(tables.LookupVersion)
+            .where(tables.LookupVersion.name == "brands")
+            .values(version=tables.LookupVersion.version + 1)
+        )
+    response = functions.select_brand(admin_access_token, new_brand_id)
+    assert response.status_code == 200
+
+    response = functions.select_metrics(admin_access_token)
+    assert response.json()["lookup_cache"]["brands"]["hits"] > 0
+
+
+def test_bump():
+    def select_version():
+        with engine.begin() as connection:
+            stmt = select(tables.LookupVersion.version).where(tables.LookupVersion.name == "brands")
+            return connection.scalar(stmt)
+
+    async def bump(upsert: bool):
+        async with AsyncSessionLocal() as db:
+            if upsert:
+                await brand_cache.bump(db)
+            else:
+                await brand_cache.update_or_insert(db)
+            await db.commit()
+
+    # Both the upsert and the fallback insert a missing row, then increment it.
+    for upsert in (True, False):
+        with engine.begin() as connection:
+            connection.execute(delete(tables.LookupVersion).where(tables.LookupVersion.name == "brands"))
+        functions.client.portal.call(bump, upsert)
+        assert select_version() == 1
+        functions.client.portal.call(bump, upsert)
+        assert select_version() == 2
+
+
 def test_end():
     functions.end()
@@ -0,0 +1,36 @@
+import pytest
+
+from client import cli
+from client.main import DeviceCommands, TodoCommands
+
+GROUPS = {"todo": TodoCommands, "device": DeviceCommands}
+
+
+def parse(*argv):
+    function, args, kwargs = cli.parse(GROUPS, list(argv))
+    return function.__qualname__, args, kwargs
+
+
+def test_parse():
+    assert parse("todo", "show", "3") == ("TodoCommands.show", [3], {})
+    assert parse("todo", "delete", "1", "2", "--concurrency=4") == ("TodoCommands.delete", [1, 2], {"concurrency": 4})
+    assert parse("todo", "list", "--all", "--output", "tsv") == (
+        "TodoCommands.list", [], {"limit": 100, "all": True, "output": "tsv"}
+    )
+    for argv in (["todo", "show", "x"], ["todo", "show"], ["todo", "show", "3", "--unknown", "1"], ["todo"], []):
+        with pytest.raises(SystemExit) as e:
+            parse(*argv)
+        assert e.value.code == 2
+
+
+def test_parse_literal():
+    assert parse("todo", "update", "1", "is_finished", "true")[1] == [1, "is_finished", True]
+    assert parse("todo", "update", "1", "is_finished", "False")[1] == [1, "is_finished", False]
+    assert parse("todo", "update", "1", "priority", "5")[1] == [1, "priority", 5]
+    assert parse("device", "update", "1", "description", "null")[1] == [1, "description", None]
+    # Text, special floats and numbers whose leading zeros would get lost stay strings.
+    assert parse("device", "update", "1", "hostname", "pc-01")[1] == [1, "hostname", "pc-01"]
+    assert parse("device", "update", "1", "asset_number", "0042")[1] == [1, "asset_number", "0042"]
+    assert parse("device", "update", "1", "description", "NaN")[1] == [1, "description", "NaN"]
+    # Annotated str parameters are never converted.
+    assert parse("todo", "create", "123")[1] == ["123"]
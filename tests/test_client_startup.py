@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+# Trivial CLI commands must start quickly: client.main imports nothing heavy and
+# every command imports the services it uses.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("httpx", "rich.console", "rich.table", "pick", "yaml", "fire")
+MAX_IMPORT_MS = 100
+
+
+def import_times(*args):
+    env = dict(os.environ, HOME=tempfile.mkdtemp())
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=60,
+    )
+    # Lines look like "import time:  self [us] | cumulative | imported package".
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1000
+    return result, times
+
+
+def test_import_main():
+    result, times = import_times("-c", "import client.main")
+    assert result.returncode == 0, result.stderr
+    for module in HEAVY_MODULES:
+        assert module not in times, module
+    assert times["client.main"] < MAX_IMPORT_MS
+
+
+def test_help():
+    result, times = import_times("-m", "client.main", "todo", "--help")
+    assert result.returncode == 0, result.stderr
+    assert "delete" in result.stdout
+    for module in HEAVY_MODULES:
+        assert module not in times, module
+    assert times["client.cli"] < MAX_IMPORT_MS
+
+
+def test_usage_error():
+    result, times = import_times("-m", "client.main", "todo", "show", "x")
+    assert result.returncode == 2
+    assert "todo_id" in result.stderr
+    assert "httpx" not in times
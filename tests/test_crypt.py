@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import httpx
+
+from app.database import schemas
+from app.main import app
+from app.utils import crypt
+
+from tests import functions
+
+
+def test_start():
+    functions.start()
+
+    form_data = schemas.UserCreateForm(
+        email="test_admin@test.com",
+        name="test_admin",
+        password="test_admin",
+        username="test_admin",
+    )
+    functions.create_admin(form_data)
+
+
+def test_async_api():
+    hashed_password = asyncio.run(crypt.hash_password_async("test_password"))
+    assert asyncio.run(crypt.verify_hashed_password_async("test_password", hashed_password))
+    assert not asyncio.run(crypt.verify_hashed_password_async("wrong_password", hashed_password))
+    assert crypt.pool.stats()["completed"] >= 3
+
+
+def test_login_storm():
+    # Time of one bcrypt check on this machine.
+    hashed_password = crypt.hash_password("test_password")
+    started_at = time.perf_counter()
+    crypt.verify_hashed_password("test_password", hashed_password)
+    check_seconds = time.perf_counter() - started_at
+
+    async def storm():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            logins = [
+                asyncio.create_task(
+                    client.post("/auth/login", data={"username": "test_admin", "password": "test_admin"})
+                )
+                for _ in range(12)
+            ]
+            latencies = []
+            while not all(login.done() for login in logins):
+                started_at = time.perf_counter()
+                response = await client.get("/")
+                latencies.append(time.perf_counter() - started_at)
+                assert response.status_code == 200
+                await asyncio.sleep(0.01)
+            responses = await asyncio.gather(*logins)
+        return latencies, responses
+
+    latencies, responses = functions.client.portal.call(storm)
+    assert all(response.status_code == 200 for response in responses)
+    assert crypt.pool.stats()["peak_pending"] > 1
+    # Checks running on the event loop would hold up "/" for at least one of
+    # them, on any machine.
+    assert max(latencies) < check_seconds
+
+
+def test_end():
+    functions.end()
@@ -1,6 +1,10 @@
+import json
+
 from fastapi.testclient import TestClient
+from sqlalchemy import select, update
 
-from app.database import schemas
+from app.database import schemas, tables
+from app.database.database import SessionLocal
 from app.main import app
 
 from tests import functions
@@ -9,6 +13,7 @@ client = TestClient(app)
 
 admin_access_token = ""
 device_id = 0
+second_device_id = 0
 brand_id = 0
 device_category_id = 0
 
@@ -49,6 +54,7 @@ def test_start():
 
 def test_create():
     global device_id
+    global second_device_id
 
     form_data = {
         "hostname": "test_device",
@@ -102,11 +108,91 @@ def test_create():
     response = functions.create_device(admin_access_token, form_data)
     assert response.status_code == 200
     assert response.json()['ipv4_address'] == "192.168.1.1"
+    second_device_id = response.json()['id']
 
     response = functions.search_asset_numbers(admin_access_token, "PC0002")
     assert response.status_code == 200
 
 
+def test_bulk_create():
+    lines = [
+        {"hostname": "bulk_device_1", "asset_number": "BULK0001", "brand_id": brand_id, "category_id": device_category_id},
+        {"hostname": "bulk_device_2", "asset_number": "BULK0002", "brand_id": brand_id, "category_id": device_category_id},
+        {"hostname": "bulk_device_3", "asset_number": "BULK0001", "brand_id": brand_id, "category_id": device_category_id},
+        {"hostname": "bulk_device_4", "asset_number": "PC0001", "brand_id": brand_id, "category_id": device_category_id},
+        {"hostname": "bulk_device_5", "asset_number": "BULK0005", "brand_id": 0, "category_id": device_category_id},
+        {"hostname": "bulk_device_6", "asset_number": "BULK0006", "brand_id": brand_id},
+    ]
+    content = "\n".join(json.dumps(line) for line in lines) + "\n\nnot json\n"
+    response = functions.create_devices(admin_access_token, content, "application/x-ndjson")
+    assert response.status_code == 200
+    result = response.json()
+    assert result['created'] == 2
+    assert result['failed'] == 5
+    assert [(error['line'], error['asset_number']) for error in result['errors']] == [
+        (3, "BULK0001"),
+        (4, "PC0001"),
+        (5, "BULK0005"),
+        (6, "BULK0006"),
+        (8, None),
+    ]
+    assert result['errors'][2]['detail'] == "Brand not exists."
+
+    content = (
+        "hostname,asset_number,brand_id,category_id,description\r\n"
+        f"bulk_device_7,BULK0007,{brand_id},{device_category_id},\r\n"
+        f"bulk_device_8,BULK0002,{brand_id},{device_category_id},duplicate\r\n"
+        f"bulk_device_9,BULK0009,{brand_id}\r\n"
+    )
+    response = functions.create_devices(admin_access_token, content, "text/csv")
+    assert response.status_code == 200
+    result = response.json()
+    assert result['created'] == 1
+    assert [error['line'] for error in result['errors']] == [3, 4]
+
+    response = functions.search_asset_numbers_batch(admin_access_token, ["BULK0001", "BULK0002", "BULK0007"])
+    assert response.status_code == 200
+    assert [device['hostname'] for device in response.json().values()] == [
+        "bulk_device_1",
+        "bulk_device_2",
+        "bulk_device_7",
+    ]
+
+    response = functions.create_devices(admin_access_token, content, "text/plain")
+    assert response.status_code == 415
+
+    # A brand another worker created within the cache check interval.
+    with SessionLocal() as db:
+        brand = tables.Brand(name="other_worker_brand", creator_id=0)
+        db.add(brand)
+        db.execute(
+            update(tables.LookupVersion)
+            .where(tables.LookupVersion.name.__eq__("brands"))
+            .values(version=tables.LookupVersion.version + 1)
+        )
+        db.commit()
+        other_brand_id = brand.id
+    content = f"hostname,asset_number,brand_id,category_id\r\nbulk_device_11,BULK0011,{other_brand_id},{device_category_id}\r\n"
+    response = functions.create_devices(admin_access_token, content, "text/csv")
+    assert response.json()['created'] == 1
+
+    # A device another request inserted, whose asset number is not recorded yet.
+    with SessionLocal() as db:
+        db.add(tables.Device(
+            hostname="other_device", asset_number="BULK0010",
+            brand_id=brand_id, category_id=device_category_id, creator_id=0,
+        ))
+        db.commit()
+    content = f"hostname,asset_number,brand_id,category_id\r\nbulk_device_10,BULK0010,{brand_id},{device_category_id}\r\n"
+    response = functions.create_devices(admin_access_token, content, "text/csv")
+    assert response.json()['created'] == 1
+    with SessionLocal() as db:
+        stmt = select(tables.AssetNumber.table_id).where(tables.AssetNumber.number.__eq__("BULK0010"))
+        table_ids = db.scalars(stmt).all()
+        stmt = select(tables.Device.id).where(tables.Device.hostname.__eq__("bulk_device_10"))
+        assert table_ids == [db.scalars(stmt).one()]
+
+
 def test_select():
     response = functions.select_devices(admin_access_token)
     assert response.status_code == 200
@@ -123,6 +209,18 @@ def test_select():
     assert response.json()['hostname'] == "test_device"
 
 
+def test_query_budget():
+    # Brand, category, holder and creator are joined, not loaded one by one.
+    with functions.count_queries() as statements:
+        response = functions.select_devices(admin_access_token)
+    assert response.status_code == 200
+    assert len(statements) <= 2
+    with functions.count_queries() as statements:
+        response = functions.select_device(admin_access_token, device_id)
+    assert response.status_code == 200
+    assert len(statements) <= 2
+
+
 def test_update():
     form_data = [
         {
@@ -147,6 +245,116 @@ def test_update():
     response = functions.update_device(admin_access_token, device_id, form_data)
     assert response.status_code == 423
 
+    response = functions.update_device(admin_access_token, device_id, [{"key": "brand_id", "value": str(brand_id)}])
+    assert response.status_code == 200
+    assert response.json()['brand']['id'] == brand_id
+    for value in (["1"], "one", None):
+        response = functions.update_device(admin_access_token, device_id, [{"key": "category_id", "value": value}])
+        assert response.status_code == 422
+
+
+def test_details():
+    form_data = {
+        "user_id": 1,
+        "device_id": second_device_id,
+        "flag": 1,
+        "message": "test details",
+        "expired_at": "2022-01-01 00:00:00",
+    }
+    response = functions.user_has_device_out(admin_access_token, 1, form_data)
+    assert response.status_code == 200
+
+    response = functions.select_me(admin_access_token)
+    assert response.status_code == 200
+
+    with functions.count_queries() as statements:
+        response = functions.select_device(admin_access_token, second_device_id)
+    assert response.status_code == 200
+    assert len(statements) == 1
+    device = response.json()
+    assert device['brand']['id'] == brand_id
+    assert device['category']['id'] == device_category_id
+    assert device['users']['id'] == 1
+    assert device['creator']['id'] == 1
+    etag = response.headers['etag']
+
+    form_data = {
+        "user_id": 1,
+        "device_id": second_device_id,
+    }
+    response = functions.user_has_device_in(admin_access_token, 1, form_data)
+    assert response.status_code == 200
+
+    # Returning the device changes its ETag.
+    response = functions.select_device(admin_access_token, second_device_id, etag)
+    assert response.status_code == 200
+    assert response.json()['users'] is None
+
+
+def test_etag():
+    response = functions.select_device(admin_access_token, second_device_id)
+    assert response.status_code == 200
+    etag = response.headers['etag']
+
+    with functions.count_queries() as statements:
+        response = functions.select_device(admin_access_token, second_device_id, etag)
+    assert response.status_code == 304
+    assert response.headers['etag'] == etag
+    assert response.content == b""
+    assert len(statements) == 1
+
+    response = functions.select_device(admin_access_token, second_device_id, f"W/{etag}, \"other\"")
+    assert response.status_code == 304
+
+    response = functions.update_device(admin_access_token, second_device_id, [{"key": "hostname", "value": "etag"}])
+    assert response.status_code == 200
+    response = functions.select_device(admin_access_token, second_device_id, etag)
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
+    etag = response.headers['etag']
+    response = functions.select_device(admin_access_token, second_device_id, etag)
+    assert response.status_code == 304
+
+    response = functions.select_devices(admin_access_token)
+    assert response.status_code == 200
+    etag = response.headers['etag']
+    response = functions.client.get(
+        "/devices/",
+        headers={"Authorization": f"Bearer {admin_access_token}", "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+    # A full page answered with 304 still carries the cursor of the next one.
+    headers = {"Authorization": f"Bearer {admin_access_token}"}
+    response = functions.client.get("/devices/?limit=1", headers=headers)
+    cursor = response.headers['x-next-cursor']
+    response = functions.client.get("/devices/?limit=1", headers={**headers, "If-None-Match": response.headers['etag']})
+    assert response.status_code == 304
+    assert response.headers['x-next-cursor'] == cursor
+
+
+def test_asset_numbers():
+    response = functions.search_asset_numbers(admin_access_token, "PC0404")
+    assert response.status_code == 404
+
+    response = functions.search_asset_numbers_batch(admin_access_token, ["PC0001", "PC0404", "PC0002"])
+    assert response.status_code == 200
+    assets = response.json()
+    assert list(assets) == ["PC0001", "PC0404", "PC0002"]
+    assert assets["PC0001"]['id'] == device_id
+    assert assets["PC0002"]['id'] == second_device_id
+    assert assets["PC0002"]['brand']['id'] == brand_id
+    assert assets["PC0404"] is None
+
+    # Numbers are cached now, only the devices are loaded.
+    with functions.count_queries() as statements:
+        response = functions.search_asset_numbers(admin_access_token, "PC0001")
+    assert response.status_code == 200
+    assert len(statements) == 1
+
+    response = functions.search_asset_numbers_batch(admin_access_token, ["PC0001"] * 1001)
+    assert response.status_code == 400
+
 
 def test_delete():
     response = functions.delete_device(admin_access_token, 0)
@@ -181,6 +389,18 @@ def test_delete():
     response = functions.select_device(admin_access_token, device_id)
     assert response.status_code == 404
 
+    response = functions.search_asset_numbers(admin_access_token, "PC0001")
+    assert response.status_code == 404
+
+    form_data = {
+        "hostname": "test_device",
+        "asset_number": "PC0001",
+        "brand_id": brand_id,
+        "category_id": device_category_id,
+    }
+    response = functions.create_device(admin_access_token, form_data)
+    assert response.status_code == 200
+
 
 def test_end():
     functions.end()
@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+import tracemalloc
+
+from sqlalchemy import insert
+
+from app.database import schemas, tables
+from app.database.database import engine
+from app.services.export import device_columns, export_rows, select_columns
+
+from tests import functions
+
+admin_access_token = ""
+brand_id = 0
+category_id = 0
+
+
+def test_start():
+    functions.start()
+
+    global admin_access_token
+    global brand_id
+    global category_id
+
+    form_data = schemas.UserCreateForm(
+        email="test_admin@test.com",
+        name="test_admin",
+        password="test_admin",
+        username="test_admin",
+    )
+    functions.create_admin(form_data)
+    response = functions.login("test_admin", "test_admin")
+    assert response.status_code == 200
+    admin_access_token = response.json()['access_token']
+
+    brand_id = functions.create_brand(admin_access_token, {"name": "test_brand"}).json()['id']
+    category_id = functions.create_device_category(admin_access_token, {"name": "test_category"}).json()['id']
+    for i in range(3):
+        form_data = {
+            "hostname": f"test_device_{i}",
+            "asset_number": f"PC000{i}",
+            "brand_id": brand_id,
+            "category_id": category_id,
+            "description": "Desk, \"left\" side" if i == 0 else None,
+        }
+        assert functions.create_device(admin_access_token, form_data).status_code == 200
+    form_data = {
+        "title": "No LAN connection",
+        "description": "The LAN connection is not working.",
+    }
+    assert functions.create_ticket(admin_access_token, form_data).status_code == 200
+
+
+def test_devices():
+    response = functions.export_devices(admin_access_token)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="devices.csv"'
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["asset_number"] for row in rows] == ["PC0000", "PC0001", "PC0002"]
+    assert rows[0]["description"] == "Desk, \"left\" side"
+    assert rows[1]["description"] == ""
+
+    response = functions.export_devices(admin_access_token, {"format": "ndjson", "asset_number": "PC0001"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["hostname"] == "test_device_1"
+    assert rows[0]["brand_id"] == brand_id
+    assert rows[0]["description"] is None
+
+    response = functions.export_devices(admin_access_token, {"format": "xml"})
+    assert response.status_code == 400
+
+
+def test_users():
+    response = functions.export_users(admin_access_token, {"format": "ndjson"})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["username"] for row in rows] == ["test_admin"]
+    assert "hashed_password" not in rows[0]
+
+
+def test_tickets():
+    response = functions.export_tickets(admin_access_token)
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["title"] for row in rows] == ["No LAN connection"]
+
+
+# Peak memory of an export must not grow with the number of rows exported.
+def test_memory():
+    def seed(count):
+        devices = [
+            {"hostname": f"memory_{i}", "asset_number": f"MEM{i}", "brand_id": brand_id, "category_id": category_id}
+            for i in range(count)
+        ]
+        with engine.begin() as connection:
+            connection.execute(insert(tables.Device), devices)
+
+    async def measure():
+        size = 0
+        tracemalloc.start()
+        async for chunk in export_rows(select_columns(tables.Device, device_columns), device_columns, "ndjson"):
+            size += len(chunk)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return size, peak
+
+    seed(5_000)
+    # Warm up statement caches before measuring.
+    functions.client.portal.call(measure)
+    small_size, small_peak = functions.client.portal.call(measure)
+    seed(40_000)
+    large_size, large_peak = functions.client.portal.call(measure)
+
+    assert large_size > small_size * 8
+    assert large_peak < small_peak * 1.5
+    assert large_peak < large_size / 4
+
+
+def test_end():
+    functions.end()
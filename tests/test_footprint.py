@@ -0,0 +1,137 @@
+from sqlalchemy import select
+
+from app.database import schemas, tables
+from app.database.database import SessionLocal
+from app.middlewares.footprint import FootprintWriter, BodyCapture
+
+from tests import functions
+
+admin_access_token = ""
+admin_id = 0
+
+
+def select_footprints():
+    functions.flush_footprints()
+    with SessionLocal() as db:
+        return db.scalars(select(tables.Footprint).order_by(tables.Footprint.id)).all()
+
+
+def test_start():
+    functions.start()
+
+    global admin_access_token
+    global admin_id
+
+    form_data = schemas.UserCreateForm(
+        email="test_admin@test.com",
+        name="test_admin",
+        password="test_admin",
+        username="test_admin",
+    )
+    functions.create_admin(form_data)
+    response = functions.login("test_admin", "test_admin")
+    assert response.status_code == 200
+    admin_access_token = response.json()['access_token']
+    admin_id = functions.select_me(admin_access_token).json()['id']
+
+
+def test_record():
+    footprints = select_footprints()
+    assert len(footprints) == 1
+    login = footprints[0]
+    assert login.action == "POST"
+    assert login.url == "/auth/login"
+    assert login.response_status_code == 200
+    assert login.request_body["username"] == "test_admin"
+    assert login.request_body["password"] == "***"
+    assert login.response_body["access_token"] == "***"
+
+    response = functions.create_brand(admin_access_token, {"name": "test_brand"})
+    assert response.status_code == 200
+    response = functions.delete_brand(admin_access_token, 0)
+    assert response.status_code == 404
+    # Reads are not recorded.
+    response = functions.select_brands(admin_access_token)
+    assert response.status_code == 200
+
+    footprints = select_footprints()
+    assert [(footprint.action, footprint.response_status_code) for footprint in footprints[1:]] == [
+        ("POST", 200),
+        ("DELETE", 404),
+    ]
+    assert footprints[1].request_body == {"name": "test_brand"}
+    assert footprints[1].response_body["name"] == "test_brand"
+    assert footprints[1].creator_id == admin_id
+
+
+def test_truncate():
+    form_data = {
+        "title": "Long ticket",
+        "description": "x" * 10000,
+    }
+    response = functions.create_ticket(admin_access_token, form_data)
+    assert response.status_code == 200
+
+    footprint = select_footprints()[-1]
+    assert footprint.url == "/tickets/"
+    assert footprint.request_body["truncated"] is True
+    assert footprint.request_body["size"] > 10000
+    assert "body" not in footprint.request_body
+
+    # A password cut together with the rest of a long body is not kept either.
+    form_data = [
+        {"key": "name", "value": "x" * 10000},
+        {"key": "password", "value": "secret_password"},
+    ]
+    response = functions.update_user(admin_access_token, 0, form_data)
+    assert response.status_code == 404
+    footprint = select_footprints()[-1]
+    assert footprint.request_body == {"truncated": True, "size": footprint.request_body["size"]}
+
+
+def test_redact():
+    response = functions.update_me_change_password(admin_access_token, "test_admin", "new_password")
+    assert response.status_code == 200
+    footprint = select_footprints()[-1]
+    assert footprint.url == "/auth/change_password"
+    assert footprint.request_body == {"old_password": "***", "new_password": "***"}
+
+    form_data = [
+        {"key": "password", "value": "test_admin"},
+        {"key": "email", "value": "new_admin@test.com"},
+    ]
+    response = functions.update_user(admin_access_token, admin_id, form_data)
+    assert response.status_code == 200
+    footprint = select_footprints()[-1]
+    assert footprint.url == f"/users/{admin_id}"
+    assert footprint.request_body == [
+        {"key": "password", "value": "***"},
+        {"key": "email", "value": "new_admin@test.com"},
+    ]
+
+
+def test_drop():
+    writer = FootprintWriter(queue_size=2)
+    footprint = {
+        "action": "POST",
+        "url": "/",
+        "content_type": "",
+        "request_body": BodyCapture(16),
+        "status_code": 200,
+        "response_body": BodyCapture(16),
+        "token": None,
+        "created_at": None,
+    }
+    assert writer.push(footprint)
+    assert writer.push(footprint)
+    assert not writer.push(footprint)
+    assert writer.stats()["pending"] == 2
+    assert writer.stats()["dropped"] == 1
+
+    response = functions.select_metrics(admin_access_token)
+    assert response.status_code == 200
+    assert response.json()["footprint"]["failed"] == 0
+
+
+def test_end():
+    functions.end()
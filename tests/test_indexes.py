@@ -0,0 +1,128 @@
+from sqlalchemy import inspect, text
+
+from app.database import schemas, tables
+from app.database.database import engine
+from app.database.migrations import create_missing_columns, create_missing_indexes, drop_unused_deleted_at_indexes
+
+from tests import functions
+
+admin_access_token = ""
+device_id = 0
+ticket_id = 0
+todo_id = 0
+
+
+def test_start():
+    functions.start()
+
+    global admin_access_token
+    global device_id
+    global ticket_id
+    global todo_id
+
+    form_data = schemas.UserCreateForm(
+        email="test_admin@test.com",
+        name="test_admin",
+        password="test_admin",
+        username="test_admin",
+    )
+    functions.create_admin(form_data)
+    response = functions.login("test_admin", "test_admin")
+    assert response.status_code == 200
+    admin_access_token = response.json()['access_token']
+
+    brand_id = functions.create_brand(admin_access_token, {"name": "test_brand"}).json()['id']
+    category_id = functions.create_device_category(admin_access_token, {"name": "test_category"}).json()['id']
+    form_data = {
+        "hostname": "test_device",
+        "asset_number": "PC0001",
+        "brand_id": brand_id,
+        "category_id": category_id,
+    }
+    device_id = functions.create_device(admin_access_token, form_data).json()['id']
+    form_data = {
+        "user_id": 1,
+        "device_id": device_id,
+        "flag": 1,
+        "message": "test indexes",
+        "expired_at": "2022-01-01 00:00:00",
+    }
+    response = functions.user_has_device_out(admin_access_token, 1, form_data)
+    assert response.status_code == 200
+
+    form_data = {
+        "title": "No LAN connection",
+        "description": "The LAN connection is not working.",
+    }
+    ticket_id = functions.create_ticket(admin_access_token, form_data).json()['id']
+    form_data = {
+        "ticket_id": ticket_id,
+        "comment": "Test comment.",
+    }
+    response = functions.create_ticket_comment(admin_access_token, ticket_id, form_data)
+    assert response.status_code == 200
+
+    todo_id = functions.create_todo(admin_access_token, {"title": "todo 1", "priority": 1}).json()['id']
+
+
+def test_hot_queries():
+    requests = [
+        lambda: functions.select_me(admin_access_token),
+        lambda: functions.select_devices(admin_access_token),
+        lambda: functions.select_device(admin_access_token, device_id),
+        lambda: functions.select_user_devices(admin_access_token, 1),
+        lambda: functions.select_user_historical_devices(admin_access_token, 1),
+        lambda: functions.select_user_roles(admin_access_token, 1),
+        lambda: functions.select_user_historical_roles(admin_access_token, 1),
+        lambda: functions.select_brand_devices(admin_access_token, 1),
+        lambda: functions.select_device_category_devices(admin_access_token, 1),
+        lambda: functions.search_asset_numbers(admin_access_token, "PC0001"),
+        lambda: functions.select_tickets(admin_access_token),
+        lambda: functions.search_tickets(admin_access_token, "LAN connection"),
+        lambda: functions.select_ticket(admin_access_token, ticket_id),
+        lambda: functions.start_work_on_ticket(admin_access_token, ticket_id, {"ticket_id": ticket_id}),
+        lambda: functions.select_todos(admin_access_token),
+        lambda: functions.select_todo(admin_access_token, todo_id),
+        lambda: functions.start_work_on_todo(admin_access_token, todo_id, {"todo_id": todo_id}),
+    ]
+    for request in requests:
+        with functions.count_queries() as statements:
+            response = request()
+        assert response.status_code == 200
+        for statement, parameters in statements:
+            if statement.lstrip().upper().startswith("SELECT"):
+                assert functions.find_full_scans(statement, parameters) == [], statement
+
+
+def test_create_missing_indexes():
+    index_name = "ix_user_has_devices_device_id_deleted_at"
+    index = next(index for index in tables.UserHasDevice.__table__.indexes if index.name == index_name)
+    index.drop(bind=engine)
+
+    assert create_missing_indexes(engine) == [index_name]
+    assert index_name in {item["name"] for item in inspect(engine).get_indexes("user_has_devices")}
+    assert create_missing_indexes(engine) == []
+
+
+def test_drop_unused_deleted_at_indexes():
+    with engine.begin() as connection:
+        connection.execute(text("CREATE INDEX ix_footprints_deleted_at ON footprints (deleted_at)"))
+
+    assert drop_unused_deleted_at_indexes(engine) == ["ix_footprints_deleted_at"]
+    assert "ix_footprints_deleted_at" not in {item["name"] for item in inspect(engine).get_indexes("footprints")}
+    assert "ix_devices_deleted_at" in {item["name"] for item in inspect(engine).get_indexes("devices")}
+    assert drop_unused_deleted_at_indexes(engine) == []
+
+
+def test_create_missing_columns():
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE brands DROP COLUMN version"))
+
+    assert create_missing_columns(engine) == ["brands.version"]
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT version FROM brands")).scalars().all() == [1]
+    assert create_missing_columns(engine) == []
+
+
+def test_end():
+    functions.end()
@@ -0,0 +1,93 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.database import schemas, tables
+from app.database.database import SessionLocal
+from app.services.device import device_details
+from app.utils.serializer import get_serializer, json_response
+
+from tests import functions
+
+admin_access_token = ""
+
+
+def test_start():
+    functions.start()
+
+    global admin_access_token
+
+    form_data = schemas.UserCreateForm(
+        email="test_admin@test.com",
+        name="test_admin",
+        password="test_admin",
+        username="test_admin",
+    )
+    functions.create_admin(form_data)
+    response = functions.login("test_admin", "test_admin")
+    assert response.status_code == 200
+    admin_access_token = response.json()['access_token']
+
+    brand_id = functions.create_brand(admin_access_token, {"name": "test_brand"}).json()['id']
+    category_id = functions.create_device_category(admin_access_token, {"name": "test_category"}).json()['id']
+    for number in range(3):
+        form_data = {
+            "hostname": f"test_device_{number}",
+            "asset_number": f"PC000{number}",
+            "brand_id": brand_id,
+            "category_id": category_id,
+            "description": None if number else "first",
+        }
+        response = functions.create_device(admin_access_token, form_data)
+        assert response.status_code == 200
+    form_data = {
+        "user_id": 1,
+        "device_id": response.json()['id'],
+        "flag": 1,
+        "message": "test serializer",
+        "expired_at": "2022-01-01 00:00:00",
+    }
+    response = functions.user_has_device_out(admin_access_token, 1, form_data)
+    assert response.status_code == 200
+
+    response = functions.create_role(admin_access_token, {"name": "reader", "scopes": ["auth:me"]})
+    assert response.status_code == 200
+    response = functions.create_ticket(admin_access_token, {"title": "title", "description": "description"})
+    assert response.status_code == 200
+    response = functions.create_todo(admin_access_token, {"title": "todo 1", "priority": 1})
+    assert response.status_code == 200
+
+
+def test_dump_json():
+    lists = [
+        (tables.Device, schemas.Device, device_details),
+        (tables.User, schemas.User, ()),
+        (tables.Role, schemas.Role, ()),
+        (tables.Brand, schemas.Brand, ()),
+        (tables.DeviceCategory, schemas.DeviceCategory, ()),
+        (tables.Ticket, schemas.Ticket, ()),
+        (tables.Todo, schemas.Todo, ()),
+    ]
+    with SessionLocal() as db:
+        for table, schema, options in lists:
+            rows = db.scalars(select(table).options(*options)).unique().all()
+            assert rows
+            adapter = TypeAdapter(list[schema])
+            expected = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+            assert get_serializer(schema).dump_json(rows) == expected, schema
+
+
+def test_json_response():
+    response = Response()
+    del response.headers["content-length"]
+    response.headers["X-Next-Cursor"] = "cursor"
+    with SessionLocal() as db:
+        rows = db.scalars(select(tables.Brand)).all()
+        rows_response = json_response(rows, schemas.Brand, response)
+    assert rows_response.media_type == "application/json"
+    assert rows_response.headers["X-Next-Cursor"] == "cursor"
+    assert rows_response.headers["content-length"] == str(len(rows_response.body))
+
+
+def test_end():
+    functions.end()
@@ -34,3 +34,70 @@
 # Commit on 2024-11-01 13:29:31
 # Commit on 2024-11-05 14:53:31
 # Commit on 2024-11-25 04:12:59
+
+from app.database import schemas
+from app.database.database import query_metrics
+
+from tests import functions
+
+admin_access_token = ""
+
+
+def test_start():
+    functions.start()
+
+    global admin_access_token
+
+    form_data = schemas.UserCreateForm(
+        email="test_admin@test.com",
+        name="test_admin",
+        password="test_admin",
+        username="test_admin",
+    )
+    functions.create_admin(form_data)
+    response = functions.login("test_admin", "test_admin")
+    assert response.status_code == 200
+    admin_access_token = response.json()['access_token']
+    assert admin_access_token
+
+
+def test_metrics():
+    response = functions.select_metrics("test_token")
+    assert response.status_code == 401
+
+    response = functions.select_metrics(admin_access_token)
+    assert response.status_code == 200
+    metrics = response.json()
+    assert metrics['database']['checkouts'] > 0
+    assert metrics['database']['checkouts'] >= metrics['database']['checkins']
+    assert metrics['crypt']['completed'] > 0
+    assert 'hits' in metrics['token_cache']
+
+
+def test_query_metrics():
+    response = functions.select_metrics(admin_access_token)
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+
+    response = functions.select_metrics(admin_access_token)
+    routes = response.json()['queries']['routes']
+    route = routes['POST /auth/login']
+    assert route['requests'] >= 1
+    assert route['queries']['sum'] >= 1
+    assert sum(route['queries']['buckets'].values()) == route['requests']
+    assert route['slowest']['statement'].startswith("SELECT")
+    assert routes['GET /system/metrics']['requests'] >= 1
+
+    query_metrics.server_timing = True
+    try:
+        response = functions.login("test_admin", "test_admin")
+    finally:
+        query_metrics.server_timing = False
+    assert response.status_code == 200
+    timing = response.headers['server-timing']
+    assert timing.startswith('db;dur=')
+    assert 'db-slowest;dur=' in timing
+
+
+def test_end():
+    functions.end()
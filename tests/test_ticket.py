@@ -1,7 +1,9 @@
 from fastapi.testclient import TestClient
 
 from app.database import schemas
+from app.database.database import AsyncSessionLocal
 from app.main import app
+from app.services.search import rebuild_ticket_index
 
 from tests import functions
 
@@ -104,12 +106,20 @@ def test_ticket_comments():
     response = functions.create_ticket_comment(admin_access_token, 0, form_data)
     assert response.status_code == 404
 
+    response = functions.select_ticket(admin_access_token, ticket_id)
+    assert response.status_code == 200
+    etag = response.headers['etag']
+    response = functions.select_ticket(admin_access_token, ticket_id, etag)
+    assert response.status_code == 304
+
     response = functions.create_ticket_comment(admin_access_token, ticket_id, form_data)
     assert response.status_code == 200
     assert response.json()['comment'] == "Test comment."
 
-    response = functions.select_ticket(admin_access_token, ticket_id)
+    # A new comment changes the ticket ETag.
+    response = functions.select_ticket(admin_access_token, ticket_id, etag)
     assert response.status_code == 200
+    assert response.headers['etag'] != etag
     assert response.json()['comments'][0]['comment'] == "Test comment."
 
 
@@ -170,5 +180,75 @@ def test_todo_minutes():
     assert end_time >= start_time
 
 
+def test_search():
+    def search(keyword, skip=0, limit=20):
+        response = functions.search_tickets(admin_access_token, keyword, skip, limit)
+        assert response.status_code == 200
+        return [ticket['id'] for ticket in response.json()]
+
+    form_data = {
+        "title": "Printer jammed",
+        "description": "Paper is stuck in the printer tray.",
+    }
+    printer_ticket_id = functions.create_ticket(admin_access_token, form_data).json()['id']
+    form_data = {
+        "title": "Monitor flicker",
+        "description": "The screen next to the printer flickers.",
+    }
+    monitor_ticket_id = functions.create_ticket(admin_access_token, form_data).json()['id']
+    form_data = {
+        "title": "网络连接失败",
+        "description": "无法访问内网。",
+    }
+    network_ticket_id = functions.create_ticket(admin_access_token, form_data).json()['id']
+
+    # Title matches weigh more than description matches.
+    assert search("printer") == [printer_ticket_id, monitor_ticket_id]
+    assert search("PRINTER tray") == [printer_ticket_id, monitor_ticket_id]
+    assert search("printer", skip=1, limit=1) == [monitor_ticket_id]
+    assert search("连接") == [network_ticket_id]
+    assert search("keyboard") == []
+    assert search("!") == []
+
+    form_data = {
+        "ticket_id": monitor_ticket_id,
+        "comment": "Replaced the toner.",
+    }
+    response = functions.create_ticket_comment(admin_access_token, monitor_ticket_id, form_data)
+    assert response.status_code == 200
+    assert search("toner") == [monitor_ticket_id]
+
+    form_data = [
+        {
+            "key": "title",
+            "value": "Monitor replaced",
+        }
+    ]
+    response = functions.update_ticket(admin_access_token, monitor_ticket_id, form_data)
+    assert response.status_code == 200
+    assert search("flicker") == []
+    assert search("replaced") == [monitor_ticket_id]
+
+    response = functions.delete_ticket(admin_access_token, printer_ticket_id)
+    assert response.status_code == 200
+    assert search("printer") == [monitor_ticket_id]
+
+    # The legacy route matches substrings of titles only.
+    response = functions.search_tickets_by_title(admin_access_token, "nitor rep")
+    assert response.status_code == 200
+    assert [ticket['id'] for ticket in response.json()] == [monitor_ticket_id]
+    response = functions.search_tickets_by_title(admin_access_token, "toner")
+    assert response.status_code == 200
+    assert response.json() == []
+
+    async def rebuild():
+        async with AsyncSessionLocal() as db:
+            return await rebuild_ticket_index(db, batch_size=2)
+
+    assert functions.client.portal.call(rebuild) > 0
+    assert search("printer") == [monitor_ticket_id]
+    assert search("toner") == [monitor_ticket_id]
+
+
 def test_end():
     functions.end()
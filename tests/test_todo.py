@@ -57,6 +57,18 @@ def test_select():
     assert response.json()['title'] == "todo 1"
 
 
+def test_query_budget():
+    with functions.count_queries() as statements:
+        response = functions.select_todos(admin_access_token)
+    assert response.status_code == 200
+    assert len(statements) <= 2
+    # The todo, its creator and its minutes.
+    with functions.count_queries() as statements:
+        response = functions.select_todo(admin_access_token, todo_id)
+    assert response.status_code == 200
+    assert len(statements) <= 3
+
+
 def test_update():
     form_data = [
         {
@@ -111,10 +123,24 @@ def test_todo_minute():
         "todo_id": todo_id,
     }
 
+    etag = functions.select_todo(admin_access_token, todo_id).headers['etag']
+    list_etag = functions.select_todos(admin_access_token).headers['etag']
+    response = functions.select_todo(admin_access_token, todo_id, etag)
+    assert response.status_code == 304
+    response = functions.select_todos(admin_access_token, list_etag)
+    assert response.status_code == 304
+
     response = functions.start_work_on_todo(admin_access_token, todo_id, form_data)
     assert response.status_code == 200
     start_time = response.json()['created_at']
 
+    # Minutes change the todo ETag.
+    response = functions.select_todo(admin_access_token, todo_id, etag)
+    assert response.status_code == 200
+    assert len(response.json()['minutes']) == 1
+    response = functions.select_todos(admin_access_token, list_etag)
+    assert response.status_code == 200
+
     response = functions.start_work_on_todo(admin_access_token, todo_id, form_data)
     assert response.status_code == 409
 
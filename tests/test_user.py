@@ -1,6 +1,8 @@
 from fastapi.testclient import TestClient
+from sqlalchemy import func, select
 
-from app.database import schemas
+from app.database import schemas, tables
+from app.database.database import engine
 from app.main import app
 
 from tests import functions
@@ -168,6 +170,24 @@ def test_select():
     response = functions.select_users(user_access_token)
     assert response.status_code == 200
 
+    response = functions.select_users(admin_access_token)
+    usernames = sorted(user['username'] for user in response.json())
+
+    page_usernames = []
+    params = {"limit": 1, "order_by": "username"}
+    while True:
+        response = functions.select_users(admin_access_token, params)
+        assert response.status_code == 200
+        page_usernames += [user['username'] for user in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": 1, "order_by": "username", "after": cursor}
+    assert page_usernames == usernames
+
+    response = functions.select_users(admin_access_token, {"order_by": "id", "after": params["after"]})
+    assert response.status_code == 400
+
 
 def test_update():
     global user_access_token
@@ -241,9 +261,15 @@ def test_delete():
     assert response.status_code == 200
     assert len(response.json()) == 1
 
+    response = functions.select_me(user_access_token)
+    assert response.status_code == 200
+
     response = functions.delete_user(admin_access_token, user_id)
     assert response.status_code == 200
 
+    response = functions.select_me(user_access_token)
+    assert response.status_code == 401
+
     response = functions.delete_user(admin_access_token, user_id)
     assert response.status_code == 404
 
@@ -347,5 +373,103 @@ def test_user_has_device():
     assert len(response.json()) == 2
 
 
+def test_historical_queries():
+    response = functions.select_me(admin_access_token)
+    assert response.status_code == 200
+
+    with functions.count_queries() as statements:
+        response = functions.select_user_historical_roles(admin_access_token, 1)
+    assert response.status_code == 200
+    history_length = len(response.json())
+    query_count = len(statements)
+
+    form_data = {
+        "user_id": 1,
+        "role_id": role_id,
+    }
+    for _ in range(5):
+        response = functions.create_user_has_role(admin_access_token, 1, form_data)
+        assert response.status_code == 200
+        response = functions.delete_user_has_role(admin_access_token, 1, role_id)
+        assert response.status_code == 200
+
+    # Role changes drop the cached token, warm it up again before counting.
+    response = functions.select_me(admin_access_token)
+    assert response.status_code == 200
+
+    with functions.count_queries() as statements:
+        response = functions.select_user_historical_roles(admin_access_token, 1)
+    assert response.status_code == 200
+    assert len(response.json()) == history_length + 5
+    assert len(statements) == query_count
+
+    with functions.count_queries() as statements:
+        response = functions.select_user_historical_devices(admin_access_token, 1)
+    assert response.status_code == 200
+    assert len(statements) == query_count
+
+
+def test_delete_many():
+    user_ids = []
+    for name in ("test_user_2", "test_user_3"):
+        form_data = {
+            "email": f"{name}@test.com",
+            "name": name,
+            "password": name,
+            "username": name,
+        }
+        response = functions.create_user(admin_access_token, form_data)
+        assert response.status_code == 200
+        user_ids.append(response.json()['id'])
+
+    form_data = {
+        "user_id": user_ids[0],
+        "role_id": role_id,
+    }
+    response = functions.create_user_has_role(admin_access_token, user_ids[0], form_data)
+    assert response.status_code == 200
+    form_data = {
+        "user_id": user_ids[1],
+        "device_id": device_id,
+        "flag": 1,
+    }
+    response = functions.user_has_device_out(admin_access_token, user_ids[1], form_data)
+    assert response.status_code == 200
+
+    response = functions.delete_users(admin_access_token, [user_ids[0], 0])
+    assert response.status_code == 404
+
+    with functions.count_queries() as statements:
+        response = functions.delete_users(admin_access_token, user_ids)
+    assert response.status_code == 200
+    assert [user['id'] for user in response.json()] == user_ids
+    assert all(user['deleted_at'] for user in response.json())
+    # One UPDATE for the users and one for each of their relation tables.
+    updates = [statement for statement, _ in statements if statement.lstrip().upper().startswith("UPDATE")]
+    assert len(updates) == 3
+
+    with engine.connect() as connection:
+        for table in (tables.UserHasRole, tables.UserHasDevice):
+            stmt = (
+                select(func.count())
+                .select_from(table)
+                .where(table.deleted_at.is_(None))
+                .where(table.user_id.in_(user_ids))
+            )
+            assert connection.scalar(stmt) == 0
+
+    # The device is free to be handed out again.
+    form_data = {
+        "user_id": 1,
+        "device_id": device_id,
+        "flag": 1,
+    }
+    response = functions.user_has_device_out(admin_access_token, 1, form_data)
+    assert response.status_code == 200
+
+    response = functions.delete_users(admin_access_token, user_ids)
+    assert response.status_code == 404
+
+
 def test_end():
     functions.end()